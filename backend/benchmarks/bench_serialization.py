@@ -0,0 +1,53 @@
+# Custo de serialização por requisição das respostas de link: response_model + JSONResponse (antes) contra orjson (depois).
+#   poetry run python -m benchmarks.bench_serialization [repetições]
+import sys
+import time
+from datetime import datetime
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+from src.cache import CachedLink
+from src.db.models import Link
+from src.schemas import LinkPublicSchema, LinkStatsSchema
+from src.utils import json_response
+
+def make_link() -> Link:
+    link = Link(original_url='https://www.google.com/search?q=encurtador+de+links', short_url='abcde', user_id=None, clicks=1234)
+    link.id = 1
+    link.created_at = datetime(2026, 10, 18, 15, 42, 10)
+    return link
+
+def fastapi_path(field, content: dict) -> bytes:
+    # O que o FastAPI faz com o retorno de uma rota async: valida no response_model (HttpUrl incluso) e serializa com json.dumps
+    # Com is_coroutine=True a corrotina não espera nada, então roda direto sem event loop
+    try:
+        serialize_response(field=field, response_content=content, is_coroutine=True).send(None)
+    except StopIteration as result:
+        return JSONResponse(result.value).body
+
+def measure(fn, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat * 1_000_000
+
+def main(repeat: int):
+    link = make_link()
+    cached = CachedLink.from_model(link)
+    public = {'original_url': link.original_url, 'clicks': link.clicks, 'created_at': link.created_at}
+    stats = {**public, 'short_url': link.short_url, 'unique_visitors': 987, 'has_password': False, 'expires_at': None}
+    public_field = create_model_field(name='Response_get_url', type_=LinkPublicSchema, mode='serialization')
+    stats_field = create_model_field(name='Response_get_stats', type_=LinkStatsSchema, mode='serialization')
+
+    cases = (
+        ('GET /short (response_model)', lambda: fastapi_path(public_field, public)),
+        ('GET /short (payload em cache)', lambda: json_response(cached.public_payload).body),
+        ('GET /stats (response_model)', lambda: fastapi_path(stats_field, stats)),
+        ('GET /stats (orjson)', lambda: json_response(stats).body),
+    )
+    print(f"{'caso':<32} {'µs/req':>8}")
+    for name, fn in cases:
+        print(f"{name:<32} {measure(fn, repeat):>8.2f}")
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
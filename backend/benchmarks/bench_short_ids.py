@@ -0,0 +1,69 @@
+# Latência de criação de links conforme a tabela cresce: gerador antigo (random + SELECT por candidato) x alocadores.
+#   poetry run python -m benchmarks.bench_short_ids [tamanhos...]
+import random
+import string
+import sys
+import tempfile
+import time
+from pathlib import Path
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.orm import Session
+from src.db.models import table_registry, Link
+from src.short_ids import SequenceAllocator, RandomAllocator
+
+CREATES = 2000
+
+def legacy_generate(db: Session) -> str:
+    chars = string.ascii_letters + string.digits
+    while True:
+        short_url = ''.join(random.choices(chars, k=8))
+        if not db.query(Link).filter(Link.short_url == short_url).first():
+            return short_url
+
+def fill(engine, rows: int):
+    chars = string.ascii_letters + string.digits
+    with engine.begin() as conn:
+        for start in range(0, rows, 50000):
+            conn.execute(insert(Link.__table__), [
+                {'original_url': 'https://www.google.com/', 'short_url': ''.join(random.choices(chars, k=10)), 'clicks': 0}
+                for _ in range(start, min(start + 50000, rows))
+            ])
+
+def run(engine, generate) -> tuple[float, float]:
+    queries = 0
+
+    def count(*args):
+        nonlocal queries
+        queries += 1
+
+    event.listen(engine, 'before_cursor_execute', count)
+    started = time.perf_counter()
+    with Session(engine) as db:
+        for _ in range(CREATES):
+            db.add(Link(original_url='https://www.google.com/', short_url=generate(db), user_id=None))
+            db.commit()
+    elapsed = time.perf_counter() - started
+    event.remove(engine, 'before_cursor_execute', count)
+    # Desconta o INSERT de cada criação, contando só as consultas feitas para gerar o ID
+    return elapsed / CREATES * 1e6, (queries - CREATES) / CREATES
+
+def main(sizes: list[int]):
+    print(f"{'linhas':>10} {'gerador':>10} {'us/criação':>12} {'consultas/ID':>13}")
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            engine = create_engine(f"sqlite:///{Path(tmp) / 'bench.sqlite3'}")
+            table_registry.metadata.create_all(engine)
+            fill(engine, size)
+
+            generators = {
+                'legacy': legacy_generate,
+                'sequence': SequenceAllocator(block_size=1000).allocate,
+                'random': RandomAllocator().allocate,
+            }
+            for name, generate in generators.items():
+                latency, queries = run(engine, generate)
+                print(f"{size:>10} {name:>10} {latency:>12.1f} {queries:>13.3f}")
+            engine.dispose()
+
+if __name__ == '__main__':
+    main([int(size) for size in sys.argv[1:]] or [0, 100_000, 1_000_000])
@@ -0,0 +1,76 @@
+# Vazão de redirecionamentos (leitura) e criações (escrita) com carga mista, sem e com o perfil de PRAGMAs do SQLite.
+#   poetry run python -m benchmarks.bench_sqlite [threads] [segundos]
+import random
+import string
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+from src.db.database import setup_sqlite, SQLITE_PRAGMAS
+from src.db.models import table_registry, Link
+
+ROWS = 50_000
+WRITE_RATIO = 0.1  # 10% de criações, 90% de redirecionamentos
+
+def random_short_url() -> str:
+    return ''.join(random.choices(string.ascii_letters + string.digits, k=10))
+
+def fill(engine) -> list[str]:
+    short_urls = [random_short_url() for _ in range(ROWS)]
+    with engine.begin() as conn:
+        conn.execute(insert(Link.__table__), [{'original_url': 'https://www.google.com/', 'short_url': short_url, 'clicks': 0} for short_url in short_urls])
+    return short_urls
+
+def worker(engine, short_urls: list[str], deadline: float, counts: dict, lock: threading.Lock):
+    reads = writes = errors = 0
+    with Session(engine) as db:
+        while time.perf_counter() < deadline:
+            try:
+                if random.random() < WRITE_RATIO:
+                    db.add(Link(original_url='https://www.google.com/', short_url=random_short_url(), user_id=None))
+                    db.commit()
+                    writes += 1
+                else:
+                    db.execute(select(Link).where(Link.short_url == random.choice(short_urls))).first()
+                    db.rollback()  # Encerra a transação de leitura, como ao fim de cada requisição
+                    reads += 1
+            except OperationalError:  # database is locked
+                db.rollback()
+                errors += 1
+
+    with lock:
+        counts['reads'] += reads
+        counts['writes'] += writes
+        counts['errors'] += errors
+
+def run(pragmas: dict | None, threads: int, seconds: float) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{Path(tmp) / 'bench.sqlite3'}", connect_args={'check_same_thread': False}, pool_size=threads)
+        if pragmas:
+            setup_sqlite(engine, pragmas)
+        table_registry.metadata.create_all(engine)
+        short_urls = fill(engine)
+
+        counts = {'reads': 0, 'writes': 0, 'errors': 0}
+        lock = threading.Lock()
+        deadline = time.perf_counter() + seconds
+        workers = [threading.Thread(target=worker, args=(engine, short_urls, deadline, counts, lock)) for _ in range(threads)]
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        engine.dispose()
+    return {name: value / seconds for name, value in counts.items()}
+
+def main(threads: int, seconds: float):
+    print(f"{'perfil':>8} {'leituras/s':>12} {'criações/s':>12} {'erros/s':>9}")
+    for name, pragmas in (('padrão', None), ('tuned', SQLITE_PRAGMAS)):
+        result = run(pragmas, threads, seconds)
+        print(f"{name:>8} {result['reads']:>12.0f} {result['writes']:>12.0f} {result['errors']:>9.1f}")
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 8, float(sys.argv[2]) if len(sys.argv) > 2 else 10)
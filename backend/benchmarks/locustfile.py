@@ -0,0 +1,27 @@
+# Carga de leitura nas rotas de redirecionamento (GET /short, POST /click e GET /stats).
+# Para comparar os dois modos, suba a API com ASYNC_DATABASE=false e depois com ASYNC_DATABASE=true e rode:
+#   poetry run locust -f benchmarks/locustfile.py --host http://localhost --headless -u 200 -r 50 -t 1m
+import random
+from locust import HttpUser, task, between
+
+def random_ip() -> str:  # IP aleatório no X-Forwarded-For para não esbarrar no rate limit
+    return '.'.join(str(random.randint(1, 254)) for _ in range(4))
+
+class RedirectUser(HttpUser):
+    wait_time = between(0, 0.05)
+
+    def on_start(self):
+        response = self.client.post('/api/short', json={'original_url': 'https://www.google.com/'}, headers={'X-Forwarded-For': random_ip()})
+        self.short_id = response.json()['short_url']
+
+    @task(10)
+    def get_url(self):
+        self.client.get(f'/api/short/{self.short_id}', headers={'X-Forwarded-For': random_ip()}, name='/api/short/[short_id]')
+
+    @task(5)
+    def click_url(self):
+        self.client.post(f'/api/click/{self.short_id}', headers={'X-Forwarded-For': random_ip()}, name='/api/click/[short_id]')
+
+    @task(1)
+    def get_stats(self):
+        self.client.get(f'/api/stats/{self.short_id}', headers={'X-Forwarded-For': random_ip()}, name='/api/stats/[short_id]')
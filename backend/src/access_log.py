@@ -0,0 +1,144 @@
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+import orjson
+from starlette.requests import Request
+from src.utils import get_user_ip
+from src.settings import (
+    ACCESS_LOG_FILE, ACCESS_LOG_MAX_BYTES, ACCESS_LOG_BACKUP_COUNT, ACCESS_LOG_QUEUE_SIZE,
+    ACCESS_LOG_SAMPLE_RATES, ACCESS_LOG_DEFAULT_SAMPLE_RATE, ACCESS_LOG_ERROR_SAMPLE_RATE
+)
+
+def parse_sample_rates(value: str) -> dict[str, float]:
+    # "redirect=0.01,get_url=0.1" -> {'redirect': 0.01, 'get_url': 0.1}
+    rates = {}
+    for item in value.split(','):
+        if '=' in item:
+            name, rate = item.split('=', 1)
+            rates[name.strip()] = float(rate)
+    return rates
+
+class AccessLogWriter:
+    # Escreve as linhas JSON numa thread própria; a requisição só enfileira
+    def __init__(self, path: str | None, max_bytes: int, backup_count: int, max_queue: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.written = 0
+        self.dropped = 0
+        self._queue: queue.Queue[bytes | None] = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._handler: logging.handlers.RotatingFileHandler | None = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path)
+
+    def enqueue(self, line: bytes):
+        if not self.enabled:
+            return
+
+        try:
+            self._queue.put_nowait(line)
+        except queue.Full:  # Backpressure: descarta a linha em vez de bloquear a requisição
+            with self._lock:
+                self.dropped += 1
+
+    def start(self):
+        if not self.enabled or (self._thread and self._thread.is_alive()):
+            return
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._handler = logging.handlers.RotatingFileHandler(self.path, maxBytes=self.max_bytes, backupCount=self.backup_count, encoding='utf-8')
+        self._handler.setFormatter(logging.Formatter('%(message)s'))
+        self._thread = threading.Thread(target=self._run, name='access-log', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        if not self._thread:
+            return
+
+        self._queue.put(None)  # Sentinela: grava o que já está na fila e encerra
+        self._thread.join(timeout)
+        self._thread = None
+        self._handler.close()
+        self._handler = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'queued': self._queue.qsize(), 'written': self.written, 'dropped': self.dropped}
+
+    def _run(self):
+        while True:
+            line = self._queue.get()
+            if line is None:
+                break
+            try:
+                self._handler.handle(logging.makeLogRecord({'msg': line.decode()}))
+            except Exception as e:
+                print(f"[Access Log Error]: {e}", file=sys.stderr)
+                continue
+            with self._lock:
+                self.written += 1
+
+class AccessLogMiddleware:
+    # Middleware ASGI puro: só monta a linha (headers, IP, JSON) das requisições sorteadas
+    def __init__(self, app, writer: AccessLogWriter | None = None, sample_rates: dict[str, float] | None = None,
+                 default_rate: float = ACCESS_LOG_DEFAULT_SAMPLE_RATE, error_rate: float = ACCESS_LOG_ERROR_SAMPLE_RATE):
+        self.app = app
+        self.writer = writer or access_log
+        self.sample_rates = sample_rates if sample_rates is not None else parse_sample_rates(ACCESS_LOG_SAMPLE_RATES)
+        self.default_rate = default_rate
+        self.error_rate = error_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or not self.writer.enabled:
+            return await self.app(scope, receive, send)
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = self.route_name(scope)
+            rate = self.error_rate if status >= 400 else self.sample_rates.get(route, self.default_rate)
+            if rate >= 1 or random.random() < rate:
+                self.writer.enqueue(self.build_line(scope, route, status, time.perf_counter() - started, rate))
+
+    @staticmethod
+    def route_name(scope) -> str | None:
+        # Preenchido pelo roteador do FastAPI depois de encontrar a rota
+        route = scope.get('route')
+        return getattr(route, 'name', None)
+
+    @staticmethod
+    def build_line(scope, route: str | None, status: int, elapsed: float, rate: float) -> bytes:
+        request = Request(scope)
+        return orjson.dumps({
+            'ts': datetime.now(timezone.utc).isoformat(timespec='milliseconds'),
+            'method': request.method,
+            'path': request.url.path,
+            'route': route,
+            'status': status,
+            'duration_ms': round(elapsed * 1000, 3),
+            'ip': get_user_ip(request),
+            'user_agent': request.headers.get('User-Agent'),
+            'referer': request.headers.get('Referer'),
+            'sample_rate': rate  # Para reponderar contagens: cada linha representa 1/sample_rate requisições
+        })
+
+access_log = AccessLogWriter(ACCESS_LOG_FILE, ACCESS_LOG_MAX_BYTES, ACCESS_LOG_BACKUP_COUNT, ACCESS_LOG_QUEUE_SIZE)
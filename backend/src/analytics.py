@@ -0,0 +1,252 @@
+import math
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime, timedelta, timezone
+from urllib.parse import urlparse
+from sqlalchemy import delete, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from src.db.database import SessionLocal
+from src.db.models import ClickBucket, LinkVisitors, LinkVisitorBucket
+from src.hll import HyperLogLog, hash_value
+from src.logger import logger
+from src.settings import CLICK_EVENTS_CAPACITY, CLICK_EVENTS_FLUSH_INTERVAL, CLICK_MINUTE_RETENTION_HOURS, CLICK_HOUR_RETENTION_DAYS, CLICK_DAY_RETENTION_DAYS
+
+buckets_table = ClickBucket.__table__
+
+# Resolução -> (tamanho do intervalo em segundos, retenção)
+RESOLUTIONS = {
+    'minute': (60, timedelta(hours=CLICK_MINUTE_RETENTION_HOURS)),
+    'hour': (3600, timedelta(days=CLICK_HOUR_RETENTION_DAYS)),
+    'day': (86400, timedelta(days=CLICK_DAY_RETENTION_DAYS))
+}
+
+# Sketches por hora só cobrem a maior janela consultada (unique_visitors_7d); o total fica num sketch único por link
+VISITOR_BUCKET_RETENTION = timedelta(days=7)
+
+REFERRERS = ('direct', 'search', 'social', 'other')
+DEVICES = ('desktop', 'mobile', 'bot', 'other')
+UNKNOWN_COUNTRY = '??'
+
+SEARCH_DOMAINS = ('google.', 'bing.', 'duckduckgo.', 'yahoo.', 'yandex.', 'ecosia.')
+SOCIAL_DOMAINS = ('facebook.', 'instagram.', 'twitter.', 't.co', 'x.com', 'linkedin.', 'reddit.', 'tiktok.', 'youtube.', 'whatsapp.', 'telegram.', 't.me')
+
+def classify_referrer(referrer: str | None) -> int:
+    if not referrer:
+        return 0
+    host = (urlparse(referrer).hostname or '').removeprefix('www.')
+    if not host:
+        return 3
+    if any(domain in host for domain in SEARCH_DOMAINS):
+        return 1
+    if any(host == domain or host.startswith(domain) or f'.{domain}' in host for domain in SOCIAL_DOMAINS):
+        return 2
+    return 3
+
+def classify_device(user_agent: str | None) -> int:
+    if not user_agent:
+        return 3
+    user_agent = user_agent.lower()
+    if 'bot' in user_agent or 'crawler' in user_agent or 'spider' in user_agent:
+        return 2
+    if 'mobile' in user_agent or 'android' in user_agent or 'iphone' in user_agent:
+        return 1
+    return 0
+
+def bucket_start(timestamp: int, resolution: str) -> datetime:
+    size = RESOLUTIONS[resolution][0]
+    return datetime.fromtimestamp(timestamp - timestamp % size, timezone.utc).replace(tzinfo=None)
+
+def truncate_to_bucket(value: datetime, resolution: str, ceil: bool = False) -> datetime:
+    # Datas sem timezone são tratadas como UTC, como as salvas no banco
+    timestamp = value.timestamp() if value.tzinfo else value.replace(tzinfo=timezone.utc).timestamp()
+    return bucket_start(math.ceil(timestamp) + RESOLUTIONS[resolution][0] - 1 if ceil else int(timestamp), resolution)
+
+def upsert_buckets(session: Session, rows: list[dict]):
+    # Soma aos contadores existentes: vários workers podem gravar no mesmo intervalo
+    dialect = postgresql if session.get_bind().dialect.name == 'postgresql' else sqlite
+    statement = dialect.insert(buckets_table)
+    statement = statement.on_conflict_do_update(
+        index_elements=[column.name for column in buckets_table.primary_key],
+        set_={'clicks': buckets_table.c.clicks + statement.excluded.clicks}
+    )
+    session.execute(statement, rows)
+
+def merge_visitors(session: Session, sketches: dict[int, HyperLogLog], buckets: dict[tuple[int, datetime], HyperLogLog]):
+    # FOR UPDATE trava as linhas no Postgres; o SQLite o ignora e só serializa flushes concorrentes pelo lock de escrita,
+    # que o upsert_buckets chamado antes na mesma transação já segurou (por isso a ordem no flush importa)
+    stored = session.execute(select(LinkVisitors).where(LinkVisitors.link_id.in_(sketches)).with_for_update()).scalars()
+    for link_visitors in stored:
+        link_visitors.sketch = sketches.pop(link_visitors.link_id).merge(HyperLogLog.from_bytes(link_visitors.sketch)).to_bytes()
+    session.add_all(LinkVisitors(link_id=link_id, sketch=sketch.to_bytes()) for link_id, sketch in sketches.items())
+
+    if not buckets:
+        return
+    stored = session.execute(
+        select(LinkVisitorBucket).where(
+            LinkVisitorBucket.link_id.in_({link_id for link_id, _ in buckets}),
+            LinkVisitorBucket.bucket_start >= min(start for _, start in buckets)
+        ).with_for_update()
+    ).scalars()
+    for bucket in stored:
+        sketch = buckets.pop((bucket.link_id, bucket.bucket_start), None)
+        if sketch:
+            bucket.sketch = sketch.merge(HyperLogLog.from_bytes(bucket.sketch)).to_bytes()
+    session.add_all(LinkVisitorBucket(link_id=link_id, bucket_start=start, sketch=sketch.to_bytes()) for (link_id, start), sketch in buckets.items())
+
+class ClickEvents:
+    def __init__(self, session_factory, capacity: int, flush_interval: float):
+        self.session_factory = session_factory
+        self.flush_interval = flush_interval
+        # Eventos compactos (link_id, timestamp, referrer, device, country, hash do visitante); se encher, descarta os mais antigos
+        self._events: deque[tuple[int, int, int, int, str, int]] = deque(maxlen=capacity)
+        self.dropped = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def add(self, link_id: int, referrer: str | None = None, user_agent: str | None = None, country: str | None = None, ip: str | None = None, timestamp: float | None = None):
+        event = (
+            link_id, int(timestamp or time.time()), classify_referrer(referrer), classify_device(user_agent),
+            country if country and len(country) == 2 else UNKNOWN_COUNTRY, hash_value(f'{ip}|{user_agent}')
+        )
+        with self._lock:
+            if len(self._events) == self._events.maxlen:
+                self.dropped += 1
+            self._events.append(event)
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._events)
+
+    def aggregate(self, events) -> list[dict]:
+        counts = Counter()
+        for link_id, timestamp, referrer, device, country, _ in events:
+            for resolution in RESOLUTIONS:
+                counts[(link_id, resolution, bucket_start(timestamp, resolution), REFERRERS[referrer], DEVICES[device], country)] += 1
+
+        return [
+            {'link_id': link_id, 'resolution': resolution, 'bucket_start': start, 'referrer': referrer, 'device': device, 'country': country, 'clicks': clicks}
+            for (link_id, resolution, start, referrer, device, country), clicks in counts.items()
+        ]
+
+    def visitors(self, events) -> dict[int, HyperLogLog]:
+        sketches: dict[int, HyperLogLog] = {}
+        for link_id, *_, visitor in events:
+            sketches.setdefault(link_id, HyperLogLog()).add_hash(visitor)
+        return sketches
+
+    def visitor_buckets(self, events) -> dict[tuple[int, datetime], HyperLogLog]:
+        oldest = time.time() - VISITOR_BUCKET_RETENTION.total_seconds()
+        sketches: dict[tuple[int, datetime], HyperLogLog] = {}
+        for link_id, timestamp, *_, visitor in events:
+            if timestamp >= oldest:
+                sketches.setdefault((link_id, bucket_start(timestamp, 'hour')), HyperLogLog()).add_hash(visitor)
+        return sketches
+
+    def flush(self, db: Session | None = None) -> int:
+        with self._flush_lock:
+            with self._lock:
+                if not self._events:
+                    return 0
+                events = list(self._events)
+                self._events.clear()
+
+            session = db or self.session_factory()
+            try:
+                upsert_buckets(session, self.aggregate(events))  # Primeiro: no SQLite é a escrita que toma o lock do banco
+                merge_visitors(session, self.visitors(events), self.visitor_buckets(events))
+                session.commit()
+            except Exception as e:
+                session.rollback()
+                with self._lock:  # Devolve os eventos para a próxima tentativa; os mais antigos ficam de fora se não couberem
+                    kept = events[max(len(events) - (self._events.maxlen - len(self._events)), 0):]
+                    self.dropped += len(events) - len(kept)
+                    self._events.extendleft(reversed(kept))
+                logger.error(f"`ClickEvents.flush`: Erro ao agregar cliques\n```{e}```")
+                return 0
+            finally:
+                if db is None:
+                    session.close()
+
+            return len(events)
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name='click-events', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def _run(self):
+        while not self._stopped.wait(self.flush_interval):
+            self.flush()
+
+def load_timeseries(db: Session, link_id: int, resolution: str, start: datetime, end: datetime) -> list:
+    return db.execute(
+        select(ClickBucket.bucket_start, ClickBucket.referrer, ClickBucket.device, ClickBucket.country, ClickBucket.clicks)
+        .where(ClickBucket.link_id == link_id, ClickBucket.resolution == resolution, ClickBucket.bucket_start >= start, ClickBucket.bucket_start < end)
+    ).all()
+
+def load_unique_visitors(db: Session, link_id: int) -> int:
+    sketch = db.execute(select(LinkVisitors.sketch).where(LinkVisitors.link_id == link_id)).scalar()
+    return HyperLogLog.from_bytes(sketch).count() if sketch else 0
+
+def load_visitor_summary(db: Session, link_id: int) -> dict:
+    # Janelas móveis em horas inteiras: a das últimas 24h inclui a hora atual e pode cobrir até 25h
+    last_24h = truncate_to_bucket(datetime.now(timezone.utc) - timedelta(days=1), 'hour')
+    last_7d = truncate_to_bucket(datetime.now(timezone.utc) - VISITOR_BUCKET_RETENTION, 'hour')
+    rows = db.execute(
+        select(LinkVisitorBucket.bucket_start, LinkVisitorBucket.sketch)
+        .where(LinkVisitorBucket.link_id == link_id, LinkVisitorBucket.bucket_start >= last_7d)
+    ).all()
+    return {
+        'unique_visitors': load_unique_visitors(db, link_id),
+        'unique_visitors_24h': HyperLogLog.union(HyperLogLog.from_bytes(row.sketch) for row in rows if row.bucket_start >= last_24h).count(),
+        'unique_visitors_7d': HyperLogLog.union(HyperLogLog.from_bytes(row.sketch) for row in rows).count()
+    }
+
+def delete_link_stats(db: Session, link_ids: list[int]):
+    # Sem depender do ON DELETE CASCADE, que o SQLite só aplica com PRAGMA foreign_keys
+    db.execute(delete(ClickBucket).where(ClickBucket.link_id.in_(link_ids)), execution_options={'synchronize_session': False})
+    db.execute(delete(LinkVisitors).where(LinkVisitors.link_id.in_(link_ids)), execution_options={'synchronize_session': False})
+    db.execute(delete(LinkVisitorBucket).where(LinkVisitorBucket.link_id.in_(link_ids)), execution_options={'synchronize_session': False})
+
+def purge_click_buckets(db: Session | None = None) -> int:
+    session: Session = db or SessionLocal()
+    deleted = 0
+    try:
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        for resolution, (_, retention) in RESOLUTIONS.items():
+            deleted += session.execute(
+                delete(ClickBucket).where(ClickBucket.resolution == resolution, ClickBucket.bucket_start < now - retention),
+                execution_options={'synchronize_session': False}
+            ).rowcount
+        # Uma hora a mais: a janela de 7d começa na hora inteira anterior
+        deleted += session.execute(
+            delete(LinkVisitorBucket).where(LinkVisitorBucket.bucket_start < now - VISITOR_BUCKET_RETENTION - timedelta(hours=1)),
+            execution_options={'synchronize_session': False}
+        ).rowcount
+        session.commit()
+        if deleted:
+            logger.info(f"`purge_click_buckets`: {deleted} intervalos de estatísticas antigos removidos")
+    except Exception as e:
+        session.rollback()
+        logger.error(f"`purge_click_buckets`: Erro ao remover estatísticas antigas\n```{e}```")
+    finally:
+        if db is None:
+            session.close()
+
+    return deleted
+
+click_events = ClickEvents(SessionLocal, CLICK_EVENTS_CAPACITY, CLICK_EVENTS_FLUSH_INTERVAL)
@@ -1,25 +1,58 @@
-from apscheduler.schedulers.background import BackgroundScheduler
+from contextlib import asynccontextmanager
+import os
 from fastapi import FastAPI, Request
-from src.routes import url, auth
+from src.routes import url, auth, metrics as metrics_routes, profiling as profiling_routes, redirect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse
 from slowapi.middleware import SlowAPIMiddleware
 from slowapi.errors import RateLimitExceeded
 from src.utils import limiter, get_user_ip
-import uvicorn
-from src.logger import setup_discord_logging, logger
+from src.logger import setup_discord_logging, shutdown_discord_logging, logger
+from src.clicks import click_buffer
+from src.analytics import click_events
+from src.trending import trending_links
+from src.hashing import password_hasher
+from src.scheduler import start_scheduler, stop_scheduler
+from src.settings import FRONTEND_URL
+from src.access_log import access_log, AccessLogMiddleware
+from src.metrics import metrics, MetricsMiddleware
+from src.profiling import ProfilingMiddleware, start_profiling, stop_profiling
 
-setup_discord_logging()
+# Inicia tudo no lifespan: os workers de hash (spawn) importam este módulo e não devem iniciar threads
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    setup_discord_logging()
+    access_log.start()
+    trending_links.restore()
+    start_scheduler()
+    click_buffer.start()
+    click_events.start()
+    password_hasher.start()
+    start_profiling()
+    logger.info(f"API iniciada!\n```PID: {os.getpid()}```")
+    yield
+    # O uvicorn só chega aqui depois de terminar as requisições em andamento
+    stop_scheduler()
+    click_buffer.stop()  # Grava os cliques pendentes antes de encerrar
+    click_events.stop()
+    password_hasher.shutdown()
+    stop_profiling()
+    logger.info(f"API encerrada\n```PID: {os.getpid()}```")
+    access_log.stop()
+    shutdown_discord_logging()  # Por último, para enviar os logs acima
 
-app = FastAPI(docs_url=None, redoc_url=None)
+app = FastAPI(docs_url=None, redoc_url=None, lifespan=lifespan, default_response_class=ORJSONResponse)
 app.state.limiter = limiter
 app.add_middleware(SlowAPIMiddleware)
 app.include_router(url.router, prefix='/api', tags=['url'])
 app.include_router(auth.router, prefix='/api/auth', tags=['auth'])
+app.include_router(profiling_routes.router, prefix='/api/profiling', tags=['profiling'])
+app.include_router(metrics_routes.router)
+app.include_router(redirect.router)  # Por último: GET /{short_id} na raiz
 
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=['https://encurtar.vercel.app'],
+    allow_origins=[FRONTEND_URL],
     allow_credentials=True,
     allow_methods=['*'],
     allow_headers=['*'],
@@ -30,20 +63,22 @@ async def capture_exceptions(request: Request, call_next):
     try:
         return await call_next(request)
     except Exception as exc:
+        metrics.unhandled_exceptions += 1
         logger.critical(f"`{request.method} {request.url.path}` Erro não tratado!\n- IP: {get_user_ip(request)} - Session ID: {request.cookies.get('session_id')}\n```{exc}```")
         return JSONResponse(status_code=500, content={"detail": "Internal Server Error"})
 
+app.add_middleware(ProfilingMiddleware)
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(AccessLogMiddleware)  # Por último para ser o mais externo e medir a requisição inteira
+
 @app.exception_handler(RateLimitExceeded)
 async def rate_limit_exception_handler(request: Request, exc: RateLimitExceeded):
+    metrics.count_rate_limited(request.scope)
     return JSONResponse(
         status_code=429,
         content={"detail": "Você atingiu o limite de requisições. Por favor, tente novamente mais tarde."}
     )
 
-scheduler = BackgroundScheduler()
-scheduler.add_job(url.clean_expired_links, 'cron', hour=0, minute=0)
-scheduler.start()
-
 if __name__ == '__main__':
-    uvicorn.run(app, host='0.0.0.0', port=80, reload=False)
-    logger.info("API iniciada!")
\ No newline at end of file
+    from src.server import main
+    main()
\ No newline at end of file
@@ -0,0 +1,226 @@
+import hashlib
+import hmac
+import secrets
+import threading
+import time
+import orjson
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Optional
+from sqlalchemy.orm import Session
+from src.db.database import run_db
+from src.db.models import Link, User
+from src.settings import LINK_CACHE_SIZE, LINK_CACHE_TTL, LINK_CACHE_NEGATIVE_TTL, LINK_CACHE_MULTI_WORKER_TTL, SERVER_WORKERS, PASSWORD_CACHE_SIZE, PASSWORD_CACHE_TTL, USER_CACHE_SIZE, USER_CACHE_TTL
+
+MISS = object()  # Sentinela: short_url não está no cache (None = link inexistente em cache)
+
+@dataclass(frozen=True, slots=True)
+class CachedLink:
+    id: int
+    user_id: Optional[int]
+    original_url: str
+    short_url: str
+    password: Optional[str]
+    clicks: int
+    created_at: datetime
+    expires_at: Optional[datetime]
+    public_payload: bytes = field(default=b'', repr=False, compare=False)  # Corpo de GET /short/{short_id}, serializado uma vez por versão do link
+
+    @classmethod
+    def from_model(cls, link: Link) -> 'CachedLink':
+        return cls(
+            id=link.id,
+            user_id=link.user_id,
+            original_url=link.original_url,
+            short_url=link.short_url,
+            password=link.password,
+            clicks=link.clicks,
+            created_at=link.created_at,
+            expires_at=link.expires_at,
+            public_payload=orjson.dumps({'original_url': link.original_url, 'clicks': link.clicks, 'created_at': link.created_at})
+        )
+
+class LinkCache:
+    def __init__(self, max_size: int, ttl: float, negative_ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._entries: OrderedDict[str, tuple[float, CachedLink | None]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, short_url: str):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(short_url)
+            if entry is None:
+                self.misses += 1
+                return MISS
+
+            expires, link = entry
+            if expires <= now:
+                del self._entries[short_url]
+                self.misses += 1
+                return MISS
+
+            self._entries.move_to_end(short_url)
+            if link is None:
+                self.negative_hits += 1
+            else:
+                self.hits += 1
+            return link
+
+    def set(self, short_url: str, link: CachedLink | None):
+        if self.max_size <= 0:
+            return
+
+        expires = time.monotonic() + (self.ttl if link is not None else self.negative_ttl)
+        with self._lock:
+            self._entries[short_url] = (expires, link)
+            self._entries.move_to_end(short_url)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, *short_urls: str):
+        with self._lock:
+            for short_url in short_urls:
+                self._entries.pop(short_url, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.negative_hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'negative_hits': self.negative_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_ratio': (self.hits + self.negative_hits) / lookups if lookups else 0.0
+            }
+
+class PasswordCache:
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._key = secrets.token_bytes(32)  # Chave por processo: a senha só fica em memória como um HMAC sem valor fora daqui
+        self._entries: OrderedDict[tuple[str, bytes, str], float] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _entry_key(self, short_url: str, password: str, hashed_password: str) -> tuple[str, bytes, str]:
+        # O hash atual faz parte da chave: trocar a senha do link invalida as entradas antigas
+        return short_url, hmac.new(self._key, password.encode(), hashlib.sha256).digest(), hashed_password
+
+    def is_verified(self, short_url: str, password: str, hashed_password: str) -> bool:
+        key = self._entry_key(short_url, password, hashed_password)
+        now = time.monotonic()
+        with self._lock:
+            expires = self._entries.get(key)
+            if expires is None or expires <= now:
+                self._entries.pop(key, None)
+                self.misses += 1
+                return False
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True
+
+    def add(self, short_url: str, password: str, hashed_password: str):
+        if self.max_size <= 0:
+            return
+
+        key = self._entry_key(short_url, password, hashed_password)
+        with self._lock:
+            self._entries[key] = time.monotonic() + self.ttl
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'size': len(self._entries), 'max_size': self.max_size, 'hits': self.hits, 'misses': self.misses}
+
+class UserCache:
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: OrderedDict[int, tuple[float, dict]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: int) -> dict | None:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry[0] <= now:
+                self._entries.pop(user_id, None)
+                return None
+
+            self._entries.move_to_end(user_id)
+            return entry[1]
+
+    def set(self, user: User) -> dict:
+        data = {'id': user.id, 'username': user.username, 'email': user.email, 'token_version': user.token_version}
+        if self.max_size <= 0:
+            return data
+
+        with self._lock:
+            self._entries[user.id] = (time.monotonic() + self.ttl, data)
+            self._entries.move_to_end(user.id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return data
+
+    def invalidate(self, user_id: int):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+def link_cache_ttls(workers: int, ttl: float, negative_ttl: float, multi_worker_ttl: float) -> tuple[float, float]:
+    # A invalidação só acontece no worker que atendeu a escrita (link removido, destino ou senha alterados, alias criado);
+    # com vários workers, o TTL curto limita por quanto tempo os outros servem a versão antiga
+    if workers <= 1:
+        return ttl, negative_ttl
+    return min(ttl, multi_worker_ttl), min(negative_ttl, multi_worker_ttl)
+
+link_cache = LinkCache(LINK_CACHE_SIZE, *link_cache_ttls(SERVER_WORKERS, LINK_CACHE_TTL, LINK_CACHE_NEGATIVE_TTL, LINK_CACHE_MULTI_WORKER_TTL))
+password_cache = PasswordCache(PASSWORD_CACHE_SIZE, PASSWORD_CACHE_TTL)
+user_cache = UserCache(USER_CACHE_SIZE, USER_CACHE_TTL)
+
+def load_link(db: Session, short_url: str) -> CachedLink | None:
+    link_db = db.query(Link).filter(Link.short_url == short_url).first()
+    link = CachedLink.from_model(link_db) if link_db else None
+    link_cache.set(short_url, link)
+    return link
+
+async def get_cached_link(short_url: str, open_db) -> CachedLink | None:
+    # open_db vem de get_async_read_sessionmaker: num acerto do cache nenhuma sessão é aberta
+    link = link_cache.get(short_url)
+    if link is MISS:
+        async with open_db() as db:
+            link = await run_db(db, load_link, short_url)
+    return link
+
+def load_user(db: Session, user_id: int, fresh: bool = False) -> dict | None:
+    user = None if fresh else user_cache.get(user_id)
+    if user is None:
+        user_db = db.query(User).filter(User.id == user_id).first()
+        user = user_cache.set(user_db) if user_db else None
+    return user
@@ -0,0 +1,90 @@
+import threading
+from sqlalchemy import bindparam, update
+from sqlalchemy.orm import Session
+from src.db.database import SessionLocal
+from src.db.models import Link
+from src.logger import logger
+from src.settings import CLICK_FLUSH_INTERVAL_MS, CLICK_FLUSH_THRESHOLD
+
+links_table = Link.__table__
+increment_clicks = (
+    update(links_table)
+    .where(links_table.c.id == bindparam('link_id'))
+    .values(clicks=links_table.c.clicks + bindparam('count'))
+)
+
+class ClickBuffer:
+    def __init__(self, session_factory, flush_interval: float, flush_threshold: int):
+        self.session_factory = session_factory
+        self.flush_interval = flush_interval
+        self.flush_threshold = flush_threshold
+        self._pending: dict[int, int] = {}
+        self._total = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def add(self, link_id: int, count: int = 1):
+        with self._lock:
+            self._pending[link_id] = self._pending.get(link_id, 0) + count
+            self._total += count
+            if self._total >= self.flush_threshold:
+                self._wakeup.set()
+
+    def pending(self, link_id: int) -> int:
+        with self._lock:
+            return self._pending.get(link_id, 0)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'pending': self._total, 'links': len(self._pending)}
+
+    def flush(self, db: Session | None = None) -> int:
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return 0
+                batch, self._pending, self._total = self._pending, {}, 0
+
+            session = db or self.session_factory()
+            try:
+                session.execute(increment_clicks, [{'link_id': link_id, 'count': count} for link_id, count in batch.items()])
+                session.commit()
+            except Exception as e:
+                session.rollback()
+                for link_id, count in batch.items():  # Devolve os cliques para a próxima tentativa
+                    self.add(link_id, count)
+                logger.error(f"`ClickBuffer.flush`: Erro ao salvar cliques\n```{e}```")
+                return 0
+            finally:
+                if db is None:
+                    session.close()
+
+            return sum(batch.values())
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name='click-buffer', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            if not self._stopped.is_set():
+                self.flush()
+
+click_buffer = ClickBuffer(SessionLocal, CLICK_FLUSH_INTERVAL_MS / 1000, CLICK_FLUSH_THRESHOLD)
@@ -1,13 +1,170 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from fastapi import Request, Response
 from sqlalchemy.orm import sessionmaker
-from src.settings import DATABASE_URL
+import time
+from contextlib import asynccontextmanager
+from starlette.concurrency import run_in_threadpool
+from src.logger import logger
+from src.metrics import instrument_engine
+from src.settings import (DATABASE_URL, DATABASE_REPLICA_URL, READ_YOUR_WRITES_SECONDS, ASYNC_DATABASE, SQLITE_JOURNAL_MODE, SQLITE_SYNCHRONOUS, SQLITE_MMAP_SIZE,
+    SQLITE_CACHE_SIZE, SQLITE_BUSY_TIMEOUT, SQLITE_TEMP_STORE)
+
+ASYNC_DRIVERS = {'sqlite': 'sqlite+aiosqlite', 'postgresql': 'postgresql+asyncpg'}
+
+def get_async_url(url: str) -> str:
+    scheme, rest = url.split('://', 1)
+    return f"{ASYNC_DRIVERS.get(scheme.split('+')[0], scheme)}://{rest}"
+
+SQLITE_PRAGMAS = {
+    'journal_mode': SQLITE_JOURNAL_MODE,
+    'synchronous': SQLITE_SYNCHRONOUS,
+    'mmap_size': SQLITE_MMAP_SIZE,
+    'cache_size': SQLITE_CACHE_SIZE,
+    'busy_timeout': SQLITE_BUSY_TIMEOUT,
+    'temp_store': SQLITE_TEMP_STORE
+}
+
+def sqlite_pragmas_listener(pragmas: dict):
+    def apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+    return apply_pragmas
+
+def setup_sqlite(engine, pragmas: dict = SQLITE_PRAGMAS):
+    # Aplicado em cada conexão nova do pool; os valores vazios mantêm o padrão do SQLite
+    if engine.dialect.name == 'sqlite':
+        event.listen(engine, 'connect', sqlite_pragmas_listener({name: value for name, value in pragmas.items() if value != ''}))
+
+def checkpoint_wal(mode: str = 'PASSIVE'):
+    # PASSIVE (job periódico) copia o que der sem esperar leitores nem bloquear escritas;
+    # TRUNCATE espera todos e zera o arquivo, por isso só no desligamento ou em manutenção
+    if engine.dialect.name != 'sqlite':
+        return
+    if mode not in ('PASSIVE', 'FULL', 'RESTART', 'TRUNCATE'):
+        raise ValueError(f'invalid checkpoint mode: {mode}')
+    with engine.connect() as conn:
+        busy, log_pages, checkpointed = conn.execute(text(f"PRAGMA wal_checkpoint({mode})")).one()
+    logger.debug(f"`checkpoint_wal`: {checkpointed} de {log_pages} páginas do WAL gravadas (busy: {busy})")
 
 engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False}) # TODO: remover quando migrar pra Postgre
+setup_sqlite(engine)
+instrument_engine(engine, 'primary')
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+async_engine = create_async_engine(get_async_url(DATABASE_URL)) if ASYNC_DATABASE else None
+if async_engine:
+    setup_sqlite(async_engine.sync_engine)
+    instrument_engine(async_engine.sync_engine, 'primary_async')
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False) if ASYNC_DATABASE else None
+
+# Réplica de leitura: sem DATABASE_REPLICA_URL as leituras usam o banco principal
+READ_REPLICA = bool(DATABASE_REPLICA_URL)
+replica_engine = create_engine(DATABASE_REPLICA_URL, connect_args={"check_same_thread": False}) if READ_REPLICA else engine
+if READ_REPLICA:
+    setup_sqlite(replica_engine)
+    instrument_engine(replica_engine, 'replica')
+ReplicaSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=replica_engine)
+
+async_replica_engine = create_async_engine(get_async_url(DATABASE_REPLICA_URL)) if ASYNC_DATABASE and READ_REPLICA else async_engine
+if ASYNC_DATABASE and READ_REPLICA:
+    setup_sqlite(async_replica_engine.sync_engine)
+    instrument_engine(async_replica_engine.sync_engine, 'replica_async')
+AsyncReplicaSessionLocal = async_sessionmaker(async_replica_engine, autoflush=False, expire_on_commit=False) if ASYNC_DATABASE else None
+
+READ_YOUR_WRITES_COOKIE = 'rw_until'
+
+def mark_write(response: Response):
+    # Depois de uma escrita, as leituras desse cliente vão para o principal até a réplica alcançar
+    if not READ_REPLICA:
+        return
+    response.set_cookie(
+        key=READ_YOUR_WRITES_COOKIE,
+        value=str(int(time.time()) + READ_YOUR_WRITES_SECONDS),
+        max_age=READ_YOUR_WRITES_SECONDS,
+        httponly=True,
+        secure=True,
+        samesite='none'
+    )
+
+def reads_from_primary(request: Request) -> bool:
+    if not READ_REPLICA:
+        return True
+    try:
+        return int(request.cookies.get(READ_YOUR_WRITES_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
 def get_db():  # pragma: no cover
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+def get_write_db(response: Response):  # pragma: no cover
+    mark_write(response)
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+def get_read_db(request: Request):  # pragma: no cover
+    db = SessionLocal() if reads_from_primary(request) else ReplicaSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+async def get_async_db():  # pragma: no cover
+    if not ASYNC_DATABASE:  # Sessão síncrona, executada no threadpool pelo run_db
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            await run_in_threadpool(db.close)
+        return
+
+    async with AsyncSessionLocal() as db:
+        yield db
+
+async def get_async_read_db(request: Request):  # pragma: no cover
+    primary = reads_from_primary(request)
+    if not ASYNC_DATABASE:
+        db = SessionLocal() if primary else ReplicaSessionLocal()
+        try:
+            yield db
+        finally:
+            await run_in_threadpool(db.close)
+        return
+
+    async with (AsyncSessionLocal() if primary else AsyncReplicaSessionLocal()) as db:
+        yield db
+
+@asynccontextmanager
+async def sync_session(factory: sessionmaker):
+    db = factory()
+    try:
+        yield db
+    finally:
+        await run_in_threadpool(db.close)
+
+# Em vez da sessão, devolvem uma função que a abre: rotas com cache só abrem (e fecham) a sessão quando precisam do banco
+async def get_async_sessionmaker():  # pragma: no cover
+    if not ASYNC_DATABASE:
+        return lambda: sync_session(SessionLocal)
+    return AsyncSessionLocal
+
+async def get_async_read_sessionmaker(request: Request):  # pragma: no cover
+    primary = reads_from_primary(request)
+    if not ASYNC_DATABASE:
+        return lambda: sync_session(SessionLocal if primary else ReplicaSessionLocal)
+    return AsyncSessionLocal if primary else AsyncReplicaSessionLocal
+
+async def run_db(db, fn, *args):
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(fn, *args)
+    return await run_in_threadpool(fn, db, *args)
@@ -1,5 +1,5 @@
 from sqlalchemy.orm import Mapped, mapped_column, registry
-from sqlalchemy import func, ForeignKey
+from sqlalchemy import func, text, BigInteger, ForeignKey, Index, LargeBinary
 from datetime import datetime
 from typing import Optional
 
@@ -14,10 +14,17 @@ class User:
     email: Mapped[str] = mapped_column(unique=True)
     password: Mapped[str]
     created_at: Mapped[datetime] = mapped_column(init=False, server_default=func.now())
+    token_version: Mapped[int] = mapped_column(init=False, default=0, server_default='0')  # Incrementado para revogar os access tokens emitidos
 
 @table_registry.mapped_as_dataclass
 class Link:
     __tablename__ = 'links'
+    __table_args__ = (
+        Index('ix_links_expires_at', 'expires_at', sqlite_where=text('expires_at IS NOT NULL'), postgresql_where=text('expires_at IS NOT NULL')),
+        Index('ix_links_user_id_id', 'user_id', 'id'),
+        Index('ix_links_user_id_clicks_id', 'user_id', 'clicks', 'id'),
+        Index('ix_links_user_id_short_url', 'user_id', 'short_url'),
+    )
 
     id: Mapped[int] = mapped_column(init=False, primary_key=True)
     user_id: Mapped[Optional[int]] = mapped_column(ForeignKey('users.id'), nullable=True)
@@ -31,6 +38,9 @@ class Link:
 @table_registry.mapped_as_dataclass
 class RefreshToken:
     __tablename__ = 'refresh_tokens'
+    __table_args__ = (
+        Index('ix_refresh_tokens_user_id_is_active', 'user_id', 'is_active'),
+    )
 
     id: Mapped[int] = mapped_column(init=False, primary_key=True)
     user_id: Mapped[int] = mapped_column(ForeignKey('users.id'))
@@ -42,4 +52,59 @@ class RefreshToken:
     remember: Mapped[bool] = mapped_column(default=False)
     is_active: Mapped[bool] = mapped_column(default=True)
     created_at: Mapped[datetime] = mapped_column(init=False, server_default=func.now())
-    last_used_at: Mapped[Optional[datetime]] = mapped_column(nullable=True, default=None)
\ No newline at end of file
+    last_used_at: Mapped[Optional[datetime]] = mapped_column(nullable=True, default=None)
+
+@table_registry.mapped_as_dataclass
+class ShortIdSequence:
+    __tablename__ = 'short_id_sequences'
+
+    name: Mapped[str] = mapped_column(primary_key=True)
+    next_value: Mapped[int] = mapped_column(BigInteger, default=0)
+
+@table_registry.mapped_as_dataclass
+class ClickBucket:
+    # Cliques agregados por link e intervalo (minute, hour, day), com as dimensões já reduzidas a poucas classes
+    __tablename__ = 'click_buckets'
+    __table_args__ = (
+        Index('ix_click_buckets_resolution_bucket_start', 'resolution', 'bucket_start'),
+    )
+
+    link_id: Mapped[int] = mapped_column(ForeignKey('links.id', ondelete='CASCADE'), primary_key=True)
+    resolution: Mapped[str] = mapped_column(primary_key=True)
+    bucket_start: Mapped[datetime] = mapped_column(primary_key=True)
+    referrer: Mapped[str] = mapped_column(primary_key=True)
+    device: Mapped[str] = mapped_column(primary_key=True)
+    country: Mapped[str] = mapped_column(primary_key=True)
+    clicks: Mapped[int] = mapped_column(default=0)
+
+@table_registry.mapped_as_dataclass
+class LinkVisitors:
+    # HyperLogLog (src/hll.py) dos visitantes únicos do link; substituído pela união com os novos visitantes a cada agregação
+    __tablename__ = 'link_visitors'
+
+    link_id: Mapped[int] = mapped_column(ForeignKey('links.id', ondelete='CASCADE'), primary_key=True)
+    sketch: Mapped[bytes] = mapped_column(LargeBinary)
+
+@table_registry.mapped_as_dataclass
+class LinkVisitorBucket:
+    # Um HyperLogLog por link e hora, só dos últimos 7 dias: unidos na consulta para as janelas de 24h e 7d
+    __tablename__ = 'link_visitor_buckets'
+    __table_args__ = (
+        Index('ix_link_visitor_buckets_bucket_start', 'bucket_start'),
+    )
+
+    link_id: Mapped[int] = mapped_column(ForeignKey('links.id', ondelete='CASCADE'), primary_key=True)
+    bucket_start: Mapped[datetime] = mapped_column(primary_key=True)
+    sketch: Mapped[bytes] = mapped_column(LargeBinary)
+
+@table_registry.mapped_as_dataclass
+class TrendingSnapshot:
+    # Cópia periódica dos contadores de cada worker (src/trending.py), somados na leitura
+    __tablename__ = 'trending_snapshots'
+
+    worker: Mapped[str] = mapped_column(primary_key=True)
+    period: Mapped[str] = mapped_column(primary_key=True)
+    short_url: Mapped[str] = mapped_column(primary_key=True)
+    score: Mapped[float]
+    error: Mapped[float]
+    taken_at: Mapped[datetime]
@@ -0,0 +1,174 @@
+import asyncio
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from fastapi import HTTPException
+from passlib.context import CryptContext
+from starlette.concurrency import run_in_threadpool
+from src.metrics import Histogram
+from src.settings import ARGON2_TIME_COST, ARGON2_MEMORY_COST, ARGON2_PARALLELISM, HASH_WORKERS, HASH_MAX_CONCURRENCY, HASH_QUEUE_TIMEOUT, HASH_BULK_MAX_CONCURRENCY
+
+pwd_context = CryptContext(
+    schemes=['argon2'],
+    deprecated='auto',
+    argon2__time_cost=ARGON2_TIME_COST,
+    argon2__memory_cost=ARGON2_MEMORY_COST,
+    argon2__parallelism=ARGON2_PARALLELISM
+)
+
+# Executadas dentro dos processos do pool; devolvem também o tempo gasto no argon2
+def _hash(password: str) -> tuple[str, float]:
+    started = time.perf_counter()
+    return pwd_context.hash(password), time.perf_counter() - started
+
+def _verify(password: str, hashed_password: str) -> tuple[bool, float]:
+    started = time.perf_counter()
+    return pwd_context.verify(password, hashed_password), time.perf_counter() - started
+
+class PasswordHasher:
+    def __init__(self, workers: int, max_concurrency: int, queue_timeout: float, bulk_concurrency: int = 1):
+        self.workers = workers
+        self.queue_timeout = queue_timeout
+        self.calls = 0
+        self.rejected = 0
+        self.in_flight = 0
+        self.queue_time = 0.0
+        self.max_queue_time = 0.0
+        self.hash_time = 0.0
+        self.hash_latency = Histogram()
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._bulk_slots = threading.BoundedSemaphore(bulk_concurrency)  # Lotes não disputam as vagas das requisições interativas
+        self._lock = threading.Lock()
+        self._executor: Executor | None = None
+
+    def start(self):
+        with self._lock:
+            if self._executor or self.workers <= 0:
+                return
+            # spawn: os workers não herdam as threads (flusher, webhooks, scheduler) do processo principal
+            self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context('spawn'))
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def hash(self, password: str) -> str:
+        return self._call(_hash, password)
+
+    def verify(self, password: str, hashed_password: str) -> bool:
+        return self._call(_verify, password, hashed_password)
+
+    def hash_many(self, passwords: list[str]) -> list[str | None]:
+        # Enfileira todos de uma vez para usar os workers em paralelo; sem vaga, o item fica None e os seguintes
+        # nem esperam, para o lote terminar com os hashes já feitos em vez de falhar inteiro
+        futures = []
+        timeout = self.queue_timeout
+        for password in passwords:
+            started = time.perf_counter()
+            acquired = self._bulk_slots.acquire(timeout=timeout) if timeout else self._bulk_slots.acquire(blocking=False)
+            if acquired:
+                self._enter()
+                futures.append(self._submit(started, _hash, password, slots=self._bulk_slots))
+                continue
+
+            timeout = 0
+            with self._lock:
+                self.rejected += 1
+            futures.append(None)
+        return [future.result()[0] if future else None for future in futures]
+
+    async def hash_async(self, password: str) -> str:
+        return await self._call_async(_hash, password)
+
+    async def verify_async(self, password: str, hashed_password: str) -> bool:
+        return await self._call_async(_verify, password, hashed_password)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'in_flight': self.in_flight,
+                'calls': self.calls,
+                'rejected': self.rejected,
+                'queue_seconds': self.queue_time,
+                'avg_queue_ms': round(self.queue_time / self.calls * 1000, 3) if self.calls else 0.0,
+                'max_queue_ms': round(self.max_queue_time * 1000, 3),
+                'avg_hash_ms': round(self.hash_time / self.calls * 1000, 3) if self.calls else 0.0
+            }
+
+    def latency(self) -> Histogram:
+        # Cópia: o /metrics formata fora do lock enquanto novos hashes continuam sendo registrados
+        with self._lock:
+            return self.hash_latency.copy()
+
+    def _call(self, fn, *args):
+        started = time.perf_counter()
+        self._acquire()
+        return self._submit(started, fn, *args).result()[0]
+
+    async def _call_async(self, fn, *args):
+        started = time.perf_counter()
+        if self._slots.acquire(blocking=False):
+            self._enter()
+        else:  # Sem vaga: espera fora do event loop
+            await run_in_threadpool(self._acquire)
+
+        if not self._get_executor():  # Sem pool: executa numa thread para não bloquear o event loop
+            return await run_in_threadpool(lambda: self._submit(started, fn, *args).result()[0])
+        return (await asyncio.wrap_future(self._submit(started, fn, *args)))[0]
+
+    def _submit(self, started: float, fn, *args, slots: threading.BoundedSemaphore | None = None) -> Future:
+        # A vaga já foi reservada por quem chamou; é liberada quando o hash termina
+        try:
+            executor = self._get_executor()
+            if executor:
+                future = executor.submit(fn, *args)
+            else:
+                future = Future()
+                future.set_result(fn(*args))
+        except BaseException:
+            self._release(slots)
+            raise
+
+        future.add_done_callback(lambda done: self._finish(done, started, slots))
+        return future
+
+    def _finish(self, future: Future, started: float, slots: threading.BoundedSemaphore | None = None):
+        self._release(slots)
+        if future.cancelled() or future.exception():
+            return
+
+        elapsed = future.result()[1]
+        queued = max(time.perf_counter() - started - elapsed, 0.0)  # Tempo esperando vaga, na fila do pool e em IPC
+        with self._lock:
+            self.calls += 1
+            self.queue_time += queued
+            self.max_queue_time = max(self.max_queue_time, queued)
+            self.hash_time += elapsed
+            self.hash_latency.observe(elapsed)
+
+    def _get_executor(self) -> Executor | None:
+        if not self._executor and self.workers > 0:
+            self.start()
+        return self._executor
+
+    def _acquire(self):
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            with self._lock:
+                self.rejected += 1
+            raise HTTPException(status_code=503, detail="Server is busy, please try again later")
+        self._enter()
+
+    def _enter(self):
+        with self._lock:
+            self.in_flight += 1
+
+    def _release(self, slots: threading.BoundedSemaphore | None = None):
+        with self._lock:
+            self.in_flight -= 1
+        (slots or self._slots).release()
+
+password_hasher = PasswordHasher(HASH_WORKERS, HASH_MAX_CONCURRENCY, HASH_QUEUE_TIMEOUT, HASH_BULK_MAX_CONCURRENCY)
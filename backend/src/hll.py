@@ -0,0 +1,63 @@
+import hashlib
+import math
+import zlib
+
+# 2^11 registradores de 1 byte: 2KB sem compressão e erro padrão de ~2,3%
+PRECISION = 11
+
+def hash_value(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), 'big')
+
+class HyperLogLog:
+    def __init__(self, precision: int = PRECISION, registers: bytearray | None = None):
+        if not 4 <= precision <= 16:
+            raise ValueError('precision must be between 4 and 16')
+        self.precision = precision
+        self.size = 1 << precision
+        self.registers = registers if registers is not None else bytearray(self.size)
+        if len(self.registers) != self.size:
+            raise ValueError('invalid number of registers')
+
+    def add(self, value: str):
+        self.add_hash(hash_value(value))
+
+    def add_hash(self, hashed: int):
+        # Os primeiros bits escolhem o registrador; o restante guarda a posição do primeiro bit 1
+        bits = 64 - self.precision
+        index = hashed >> bits
+        rank = bits - (hashed & ((1 << bits) - 1)).bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other: 'HyperLogLog') -> 'HyperLogLog':
+        if other.precision != self.precision:
+            raise ValueError('cannot merge sketches with different precisions')
+        self.registers = bytearray(map(max, self.registers, other.registers))
+        return self
+
+    @classmethod
+    def union(cls, sketches, precision: int = PRECISION) -> 'HyperLogLog':
+        # Um max por registrador com todos os sketches de uma vez, em vez de uma união por sketch
+        sketches = list(sketches)
+        if any(sketch.precision != precision for sketch in sketches):
+            raise ValueError('cannot merge sketches with different precisions')
+        if len(sketches) < 2:
+            return cls(precision, bytearray(sketches[0].registers) if sketches else None)
+        return cls(precision, bytearray(map(max, *(sketch.registers for sketch in sketches))))
+
+    def count(self) -> int:
+        size = self.size
+        alpha = {16: 0.673, 32: 0.697, 64: 0.709}.get(size, 0.7213 / (1 + 1.079 / size))
+        estimate = alpha * size * size / sum(2.0 ** -register for register in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * size and zeros:  # Poucos elementos: contagem linear é mais precisa
+            estimate = size * math.log(size / zeros)
+        return round(estimate)
+
+    def to_bytes(self) -> bytes:
+        # Sketches de links com poucos visitantes são quase só zeros e comprimem para poucos bytes
+        return bytes([self.precision]) + zlib.compress(self.registers)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'HyperLogLog':
+        return cls(data[0], bytearray(zlib.decompress(data[1:])))
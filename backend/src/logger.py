@@ -1,30 +1,130 @@
-import asyncio
-from datetime import datetime
+import queue
+import sys
 import threading
+import time
+from datetime import datetime
 import httpx
 from loguru import logger
-from src.settings import WEBHOOK_INFO, WEBHOOK_ERROR
+from src.settings import WEBHOOK_INFO, WEBHOOK_ERROR, WEBHOOK_QUEUE_SIZE, WEBHOOK_BATCH_INTERVAL
+
+DISCORD_MESSAGE_LIMIT = 2000
+
+class WebhookShipper:
+    def __init__(self, webhook_url: str | None, max_queue: int = 1000, batch_interval: float = 2.0, timeout: float = 5.0):
+        self.webhook_url = webhook_url
+        self.batch_interval = batch_interval
+        self.timeout = timeout
+        self.sent = 0
+        self.dropped = 0
+        self.failed = 0
+        self._queue: queue.Queue[str] = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._client: httpx.Client | None = None
+
+    def enqueue(self, message: str):
+        if not self.webhook_url:
+            return
+
+        try:
+            self._queue.put_nowait(message)
+        except queue.Full:  # Backpressure: descarta o log em vez de bloquear a requisição
+            with self._lock:
+                self.dropped += 1
+
+    def start(self):
+        if not self.webhook_url or (self._thread and self._thread.is_alive()):
+            return
+
+        self._stopped.clear()
+        self._client = httpx.Client(timeout=self.timeout)  # Reaproveita a conexão (keep-alive) entre os envios
+        self._thread = threading.Thread(target=self._run, name='webhook-shipper', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        self._stopped.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+        if self._client:
+            self._client.close()
+            self._client = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'queued': self._queue.qsize(), 'sent': self.sent, 'dropped': self.dropped, 'failed': self.failed}
 
-def send_webhook(message: str, webhook_url: str):
-    def runner():
-        async def task():
+    def _run(self):
+        while not (self._stopped.is_set() and self._queue.empty()):
             try:
-                async with httpx.AsyncClient(timeout=5) as client:
-                    await client.post(webhook_url, json={"content": message})
-            except Exception as e:
-                logger.error(f"[Log Error]: {e}")
+                messages = [self._queue.get(timeout=0.5)]
+            except queue.Empty:
+                continue
 
-        asyncio.run(task())
+            while True:
+                try:
+                    messages.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
 
-    threading.Thread(target=runner, daemon=True).start()
+            for content in coalesce_messages(messages):
+                self._post(content)
+
+            self._stopped.wait(self.batch_interval)  # Acumula novos logs entre os envios
+
+    def _post(self, content: str):
+        try:
+            response = self._client.post(self.webhook_url, json={'content': content})
+            if response.status_code == 429:  # Rate limit do Discord
+                time.sleep(min(float(response.json().get('retry_after', 1)), 5))
+                response = self._client.post(self.webhook_url, json={'content': content})
+            response.raise_for_status()
+        except Exception as e:
+            with self._lock:
+                self.failed += 1
+            print(f"[Log Error]: {e}", file=sys.stderr)  # Não usa o logger para não gerar um novo webhook
+            return
+
+        with self._lock:
+            self.sent += 1
+
+def coalesce_messages(messages: list[str], limit: int = DISCORD_MESSAGE_LIMIT) -> list[str]:
+    contents = []
+    current = ''
+    for message in messages:
+        if len(message) > limit:
+            message = message[:limit - 3] + '...'
+
+        if current and len(current) + 1 + len(message) > limit:
+            contents.append(current)
+            current = ''
+
+        current = f"{current}\n{message}" if current else message
+
+    if current:
+        contents.append(current)
+    return contents
+
+info_shipper = WebhookShipper(WEBHOOK_INFO, WEBHOOK_QUEUE_SIZE, WEBHOOK_BATCH_INTERVAL)
+error_shipper = WebhookShipper(WEBHOOK_ERROR, WEBHOOK_QUEUE_SIZE, WEBHOOK_BATCH_INTERVAL)
+
+def format_message(message) -> str:
+    return f"**[{message.record['level'].name}]** {message.record['message']}\n-# **{datetime.now().strftime('%d/%m/%Y - %H:%M:%S')}**"
 
 def info_sink(message):
-    send_webhook(f"**[{message.record['level'].name}]** {message.record['message']}\n-# **{datetime.now().strftime('%d/%m/%Y - %H:%M:%S')}**", WEBHOOK_INFO)
+    info_shipper.enqueue(format_message(message))
 
 def error_sink(message):
-    send_webhook(f"**[{message.record['level'].name}]** {message.record['message']}\n-# **{datetime.now().strftime('%d/%m/%Y - %H:%M:%S')}**", WEBHOOK_ERROR)
+    error_shipper.enqueue(format_message(message))
 
 def setup_discord_logging():
     logger.remove()
     logger.add(info_sink, level="INFO", filter=lambda r: r["level"].name in ("INFO", "WARNING"))
-    logger.add(error_sink, level="ERROR", filter=lambda r: r["level"].name in ("ERROR", "CRITICAL"))
\ No newline at end of file
+    logger.add(error_sink, level="ERROR", filter=lambda r: r["level"].name in ("ERROR", "CRITICAL"))
+    info_shipper.start()
+    error_shipper.start()
+
+def shutdown_discord_logging():
+    info_shipper.stop()
+    error_shipper.stop()
@@ -0,0 +1,260 @@
+import bisect
+import threading
+import time
+from contextvars import ContextVar
+from sqlalchemy import event
+
+# Limites (em segundos) dos histogramas de latência
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+UNMATCHED_ROUTE = 'unmatched'
+
+# Consultas da requisição atual ([quantidade, tempo]); fica None nas requisições do modo leve
+request_queries: ContextVar[list | None] = ContextVar('request_queries', default=None)
+
+class Histogram:
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets: tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # O último é o +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def copy(self) -> 'Histogram':
+        histogram = Histogram(self.buckets)
+        histogram.counts = self.counts.copy()
+        histogram.sum = self.sum
+        histogram.count = self.count
+        return histogram
+
+class RouteMetrics:
+    __slots__ = ('latency', 'statuses', 'db_queries', 'db_time')
+
+    def __init__(self):
+        self.latency = Histogram()
+        self.statuses: dict[int, int] = {}
+        self.db_queries = 0
+        self.db_time = 0.0
+
+def format_labels(labels: dict) -> str:
+    if not labels:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for value in labels.values())
+    return '{' + ','.join(f'{name}="{value}"' for name, value in zip(labels, escaped)) + '}'
+
+def format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+def format_metric(name: str, kind: str, help_text: str, samples: list[tuple[dict, float]]) -> list[str]:
+    lines = [f'# HELP {name} {help_text}', f'# TYPE {name} {kind}']
+    lines.extend(f'{name}{format_labels(labels)} {format_value(value)}' for labels, value in samples)
+    return lines
+
+def format_histogram(name: str, help_text: str, histograms: list[tuple[dict, Histogram]]) -> list[str]:
+    lines = [f'# HELP {name} {help_text}', f'# TYPE {name} histogram']
+    for labels, histogram in histograms:
+        cumulative = 0
+        for bound, count in zip((*histogram.buckets, float('inf')), histogram.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{format_labels({**labels, "le": format_value(bound)})} {cumulative}')
+        lines.append(f'{name}_sum{format_labels(labels)} {format_value(histogram.sum)}')
+        lines.append(f'{name}_count{format_labels(labels)} {histogram.count}')
+    return lines
+
+class Metrics:
+    # Métricas por processo: com vários workers, cada coleta mostra o worker que atendeu
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.pools = {}  # Registrados uma vez, no import do database
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            # Métricas de requisição só são alteradas no event loop (middleware e /metrics), sem lock
+            self.routes: dict[str, RouteMetrics] = {}
+            self.unhandled_exceptions = 0
+            # As demais vêm de threads (threadpool, scheduler, pool do banco)
+            self.db_queries: dict[str, Histogram] = {}
+            self.db_errors: dict[str, int] = {}
+            self.pool_checkouts: dict[str, int] = {}
+            self.pool_connects: dict[str, int] = {}
+            self.jobs: dict[str, Histogram] = {}
+            self.job_failures: dict[str, int] = {}
+            self.rate_limited: dict[str, int] = {}
+
+    def route(self, name: str) -> RouteMetrics:
+        metrics = self.routes.get(name)
+        if metrics is None:
+            metrics = self.routes[name] = RouteMetrics()
+        return metrics
+
+    def observe_request(self, route: str, status: int, elapsed: float, queries: list | None = None):
+        metrics = self.route(route)
+        metrics.latency.observe(elapsed)
+        metrics.statuses[status] = metrics.statuses.get(status, 0) + 1
+        if queries is not None:
+            metrics.db_queries += queries[0]
+            metrics.db_time += queries[1]
+
+    def observe_query(self, engine: str, elapsed: float):
+        with self._lock:
+            histogram = self.db_queries.get(engine)
+            if histogram is None:
+                histogram = self.db_queries[engine] = Histogram()
+            histogram.observe(elapsed)
+
+        queries = request_queries.get()
+        if queries is not None:
+            queries[0] += 1
+            queries[1] += elapsed
+
+    def count_db_error(self, engine: str):
+        with self._lock:
+            self.db_errors[engine] = self.db_errors.get(engine, 0) + 1
+
+    def count_pool_checkout(self, engine: str):
+        with self._lock:
+            self.pool_checkouts[engine] = self.pool_checkouts.get(engine, 0) + 1
+
+    def count_pool_connect(self, engine: str):
+        with self._lock:
+            self.pool_connects[engine] = self.pool_connects.get(engine, 0) + 1
+
+    def observe_job(self, job: str, elapsed: float, failed: bool = False):
+        with self._lock:
+            histogram = self.jobs.get(job)
+            if histogram is None:
+                histogram = self.jobs[job] = Histogram()
+            histogram.observe(elapsed)
+            if failed:
+                self.job_failures[job] = self.job_failures.get(job, 0) + 1
+
+    def count_rate_limited(self, scope):
+        route = route_name(scope)
+        with self._lock:
+            self.rate_limited[route] = self.rate_limited.get(route, 0) + 1
+
+    def render(self, extra: list[str] | None = None) -> str:
+        lines = []
+        routes = sorted(self.routes.items())
+        lines += format_metric('shorturl_http_requests_total', 'counter', 'Requisições HTTP por rota e status.', [
+            ({'route': route, 'status': status}, count) for route, metrics in routes for status, count in sorted(metrics.statuses.items())
+        ])
+        lines += format_histogram('shorturl_http_request_duration_seconds', 'Latência das requisições HTTP por rota.', [
+            ({'route': route}, metrics.latency) for route, metrics in routes
+        ])
+        lines += format_metric('shorturl_http_db_queries_total', 'counter', 'Consultas ao banco feitas durante as requisições de cada rota.', [
+            ({'route': route}, metrics.db_queries) for route, metrics in routes
+        ])
+        lines += format_metric('shorturl_http_db_seconds_total', 'counter', 'Tempo gasto no banco durante as requisições de cada rota.', [
+            ({'route': route}, metrics.db_time) for route, metrics in routes
+        ])
+        lines += format_metric('shorturl_http_unhandled_exceptions_total', 'counter', 'Exceções não tratadas nas rotas.', [({}, self.unhandled_exceptions)])
+
+        with self._lock:
+            lines += format_histogram('shorturl_db_query_duration_seconds', 'Duração das consultas ao banco.', [
+                ({'engine': engine}, histogram) for engine, histogram in sorted(self.db_queries.items())
+            ])
+            lines += format_metric('shorturl_db_errors_total', 'counter', 'Consultas ao banco que falharam.', [
+                ({'engine': engine}, count) for engine, count in sorted(self.db_errors.items())
+            ])
+            lines += format_metric('shorturl_db_pool_checkouts_total', 'counter', 'Conexões retiradas do pool.', [
+                ({'engine': engine}, count) for engine, count in sorted(self.pool_checkouts.items())
+            ])
+            lines += format_metric('shorturl_db_pool_connects_total', 'counter', 'Conexões novas abertas pelo pool.', [
+                ({'engine': engine}, count) for engine, count in sorted(self.pool_connects.items())
+            ])
+            pools = sorted(self.pools.items())
+            lines += format_histogram('shorturl_scheduler_job_duration_seconds', 'Duração das tarefas agendadas.', [
+                ({'job': job}, histogram) for job, histogram in sorted(self.jobs.items())
+            ])
+            lines += format_metric('shorturl_scheduler_job_failures_total', 'counter', 'Tarefas agendadas que terminaram com erro.', [
+                ({'job': job}, count) for job, count in sorted(self.job_failures.items())
+            ])
+            lines += format_metric('shorturl_rate_limited_total', 'counter', 'Requisições recusadas pelo rate limit.', [
+                ({'route': route}, count) for route, count in sorted(self.rate_limited.items())
+            ])
+
+        if pools:
+            lines += format_metric('shorturl_db_pool_checked_out', 'gauge', 'Conexões do pool em uso.', [
+                ({'engine': engine}, pool.checkedout()) for engine, pool in pools if hasattr(pool, 'checkedout')
+            ])
+            lines += format_metric('shorturl_db_pool_size', 'gauge', 'Tamanho configurado do pool.', [
+                ({'engine': engine}, pool.size()) for engine, pool in pools if hasattr(pool, 'size')
+            ])
+
+        lines += extra or []
+        return '\n'.join(lines) + '\n'
+
+def route_name(scope) -> str:
+    # Preenchido pelo roteador do FastAPI depois de encontrar a rota
+    route = scope.get('route')
+    return getattr(route, 'name', None) or UNMATCHED_ROUTE
+
+def instrument_engine(engine, name: str, registry: Metrics | None = None):
+    registry = registry or metrics
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        context._query_started = time.perf_counter()
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        registry.observe_query(name, time.perf_counter() - context._query_started)
+
+    @event.listens_for(engine, 'handle_error')
+    def handle_error(exception_context):
+        registry.count_db_error(name)
+
+    # Só eventos públicos do pool: sem evento antes do checkout, a espera pela conexão não é medida
+    @event.listens_for(engine, 'checkout')
+    def checkout(dbapi_connection, connection_record, connection_proxy):
+        registry.count_pool_checkout(name)
+
+    @event.listens_for(engine, 'connect')
+    def connect(dbapi_connection, connection_record):
+        registry.count_pool_connect(name)
+
+    with registry._lock:
+        registry.pools[name] = engine.pool
+
+class MetricsMiddleware:
+    # Middleware ASGI puro; nas rotas do modo leve não cria o contador de consultas da requisição
+    def __init__(self, app, registry: Metrics | None = None, full_prefix: str = '/api/'):
+        self.app = app
+        self.registry = registry or metrics
+        self.full_prefix = full_prefix
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+
+        started = time.perf_counter()
+        status = 500
+        queries = None
+        token = None
+        if scope['path'].startswith(self.full_prefix):  # Fora da API (o redirecionamento na raiz) roda no modo leve
+            queries = [0, 0.0]
+            token = request_queries.set(queries)
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if token is not None:
+                request_queries.reset(token)
+            self.registry.observe_request(route_name(scope), status, time.perf_counter() - started, queries)
+
+metrics = Metrics()
@@ -0,0 +1,204 @@
+import glob
+import os
+import random
+import re
+import secrets
+import sys
+import threading
+import time
+from collections import Counter
+from starlette.concurrency import run_in_threadpool
+from src.logger import logger
+from src.settings import (
+    PROFILING_TOKEN, PROFILING_DIR, PROFILING_SAMPLE_RATE, PROFILING_REQUEST_INTERVAL_MS, PROFILING_MAX_FILES,
+    PROFILING_CONTINUOUS, PROFILING_CONTINUOUS_INTERVAL_MS, PROFILING_CONTINUOUS_FLUSH_SECONDS
+)
+
+PROFILE_NAME = re.compile(r'^[A-Za-z0-9_.-]+\.folded$')
+CONTINUOUS_PATTERN = 'continuous-*.folded'
+
+def collapse_stack(frame, root: str) -> str:
+    # Formato "collapsed" do flamegraph.pl/speedscope: raiz;...;função_atual
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f'{code.co_qualname} ({os.path.basename(code.co_filename)})')
+        frame = frame.f_back
+    names.append(root)
+    return ';'.join(reversed(names))
+
+def format_collapsed(stacks: Counter) -> str:
+    return ''.join(f'{stack} {count}\n' for stack, count in stacks.most_common())
+
+def parse_collapsed(text: str) -> Counter:
+    stacks = Counter()
+    for line in text.splitlines():
+        stack, _, count = line.rpartition(' ')
+        if stack and count.isdigit():
+            stacks[stack] += int(count)
+    return stacks
+
+class StackSampler:
+    # Amostra a pilha de todas as threads (event loop, threadpool do banco, flushers), não só a que chamou
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.samples = 0
+        self._stacks: Counter = Counter()
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def sample(self):
+        own = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        frames = sys._current_frames()
+        stacks = [collapse_stack(frame, names.get(ident, str(ident))) for ident, frame in frames.items() if ident != own]
+        with self._lock:
+            self._stacks.update(stacks)
+            self.samples += 1
+
+    def stacks(self) -> Counter:
+        with self._lock:
+            return self._stacks.copy()
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            self.sample()
+
+class ContinuousProfiler(StackSampler):
+    # Taxa baixa e contínua; cada worker grava o próprio arquivo e o endpoint de download soma todos
+    def __init__(self, directory: str, interval: float, flush_interval: float):
+        super().__init__(interval)
+        self.directory = directory
+        self.flush_interval = flush_interval
+
+    @property
+    def path(self) -> str:
+        return os.path.join(self.directory, f'continuous-{os.getpid()}.folded')
+
+    def start(self):
+        os.makedirs(self.directory, exist_ok=True)
+        super().start()
+
+    def stop(self):
+        if not self._thread:
+            return
+        super().stop()
+        self.flush()
+
+    def flush(self):
+        try:
+            with open(self.path, 'w', encoding='utf-8') as file:
+                file.write(format_collapsed(self.stacks()))
+        except OSError as e:
+            logger.error(f"`ContinuousProfiler.flush`: Erro ao salvar o perfil\n```{e}```")
+
+    def _run(self):
+        last_flush = time.monotonic()
+        while not self._stopped.wait(self.interval):
+            self.sample()
+            if time.monotonic() - last_flush >= self.flush_interval:
+                self.flush()
+                last_flush = time.monotonic()
+
+def load_continuous(directory: str = PROFILING_DIR) -> Counter:
+    stacks = Counter()
+    for path in glob.glob(os.path.join(directory, CONTINUOUS_PATTERN)):
+        with open(path, encoding='utf-8') as file:
+            stacks.update(parse_collapsed(file.read()))
+    return stacks
+
+def list_profiles(directory: str = PROFILING_DIR) -> list[dict]:
+    profiles = []
+    for entry in os.scandir(directory) if os.path.isdir(directory) else ():
+        if entry.is_file() and PROFILE_NAME.match(entry.name) and not entry.name.startswith('continuous-'):
+            stat = entry.stat()
+            profiles.append({'name': entry.name, 'size': stat.st_size, 'created_at': stat.st_mtime})
+    return sorted(profiles, key=lambda profile: (profile['created_at'], profile['name']), reverse=True)
+
+def profile_path(name: str, directory: str = PROFILING_DIR) -> str | None:
+    if not PROFILE_NAME.match(name):  # Só nomes simples: nada de ../
+        return None
+    path = os.path.join(directory, name)
+    return path if os.path.isfile(path) else None
+
+def check_token(value: str | None, token: str = PROFILING_TOKEN) -> bool:
+    return bool(token and value) and secrets.compare_digest(value.encode(), token.encode())
+
+class ProfilingMiddleware:
+    # Perfil de uma requisição: com o header X-Profile (valor = PROFILING_TOKEN) ou sorteada por PROFILING_SAMPLE_RATE
+    def __init__(self, app, directory: str = PROFILING_DIR, token: str = PROFILING_TOKEN, sample_rate: float = PROFILING_SAMPLE_RATE,
+                 interval: float = PROFILING_REQUEST_INTERVAL_MS / 1000, max_files: int = PROFILING_MAX_FILES):
+        self.app = app
+        self.directory = directory
+        self.token = token
+        self.sample_rate = sample_rate
+        self.interval = interval
+        self.max_files = max_files
+        self._slot = threading.Lock()  # Um perfil por vez: as amostras pegam todas as threads do processo
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or not self.should_profile(scope) or not self._slot.acquire(blocking=False):
+            return await self.app(scope, receive, send)
+
+        name = f'{int(time.time() * 1000)}-{os.getpid()}-{secrets.token_hex(3)}.folded'
+        sampler = StackSampler(self.interval)
+
+        async def send_wrapper(message):
+            if message['type'] == 'http.response.start':
+                message['headers'] = [*message.get('headers', []), (b'x-profile-id', name.encode())]
+            await send(message)
+
+        started = time.perf_counter()
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            sampler.stop()
+            self._slot.release()
+            await run_in_threadpool(self.save, name, scope, sampler, time.perf_counter() - started)
+
+    def should_profile(self, scope) -> bool:
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            return True
+        if not self.token:
+            return False
+        for header, value in scope['headers']:
+            if header == b'x-profile':
+                return check_token(value.decode('latin-1'), self.token)
+        return False
+
+    def save(self, name: str, scope, sampler: StackSampler, elapsed: float):
+        route = getattr(scope.get('route'), 'name', None) or 'unmatched'
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(os.path.join(self.directory, name), 'w', encoding='utf-8') as file:
+                file.write(f"# {scope['method']} {scope['path']} route={route} duration_ms={elapsed * 1000:.3f} samples={sampler.samples}\n")
+                file.write(format_collapsed(sampler.stacks()))
+            for profile in list_profiles(self.directory)[self.max_files:]:  # Mantém só os mais recentes
+                os.remove(os.path.join(self.directory, profile['name']))
+        except OSError as e:
+            logger.error(f"`ProfilingMiddleware.save`: Erro ao salvar o perfil\n```{e}```")
+
+continuous_profiler = ContinuousProfiler(PROFILING_DIR, PROFILING_CONTINUOUS_INTERVAL_MS / 1000, PROFILING_CONTINUOUS_FLUSH_SECONDS)
+
+def start_profiling():
+    if PROFILING_CONTINUOUS:
+        continuous_profiler.start()
+
+def stop_profiling():
+    continuous_profiler.stop()
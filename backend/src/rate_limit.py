@@ -0,0 +1,179 @@
+import sqlite3
+import threading
+import time
+from math import floor
+from limits.storage import Storage, SlidingWindowCounterSupport
+from limits.storage.base import TimestampedSlidingWindow
+
+class SQLiteStorage(Storage, SlidingWindowCounterSupport, TimestampedSlidingWindow):
+    # Armazena os contadores num arquivo SQLite compartilhado entre os workers de um mesmo host
+    # Uso: sqlite:///caminho/ratelimit.db
+    STORAGE_SCHEME = ['sqlite']
+
+    def __init__(self, uri: str, wrap_exceptions: bool = False, compact_interval: float = 60, **options):
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+        self.path = uri.removeprefix('sqlite://').removeprefix('/') or ':memory:'
+        self.compact_interval = compact_interval
+        self._local = threading.local()
+        self._last_compaction = time.time()
+        with self._connection() as conn:
+            conn.execute('CREATE TABLE IF NOT EXISTS rate_limits (key TEXT PRIMARY KEY, value INTEGER NOT NULL, expires_at REAL NOT NULL) WITHOUT ROWID')
+
+    @property
+    def base_exceptions(self) -> type[Exception]:
+        return sqlite3.Error
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:  # Uma conexão por thread
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def _transaction(self):
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')  # Trava a escrita já no início para o ler-e-incrementar ser atômico entre processos
+        return conn
+
+    def incr(self, key: str, expiry: float, amount: int = 1) -> int:
+        now = time.time()
+        self._maybe_compact(now)
+        row = self._connection().execute(
+            'INSERT INTO rate_limits (key, value, expires_at) VALUES (?, ?, ?) '
+            'ON CONFLICT (key) DO UPDATE SET '
+            'value = CASE WHEN expires_at <= ? THEN excluded.value ELSE value + excluded.value END, '
+            'expires_at = CASE WHEN expires_at <= ? THEN excluded.expires_at ELSE expires_at END '
+            'RETURNING value',
+            (key, amount, now + expiry, now, now)
+        ).fetchone()
+        return row[0]
+
+    def decr(self, key: str, amount: int = 1) -> int:
+        row = self._connection().execute(
+            'UPDATE rate_limits SET value = MAX(value - ?, 0) WHERE key = ? AND expires_at > ? RETURNING value',
+            (amount, key, time.time())
+        ).fetchone()
+        return row[0] if row else 0
+
+    def get(self, key: str) -> int:
+        row = self._connection().execute('SELECT value FROM rate_limits WHERE key = ? AND expires_at > ?', (key, time.time())).fetchone()
+        return row[0] if row else 0
+
+    def get_expiry(self, key: str) -> float:
+        now = time.time()
+        row = self._connection().execute('SELECT expires_at FROM rate_limits WHERE key = ? AND expires_at > ?', (key, now)).fetchone()
+        return row[0] if row else now
+
+    def check(self) -> bool:
+        try:
+            self._connection().execute('SELECT 1')
+            return True
+        except sqlite3.Error:
+            return False
+
+    def reset(self) -> int | None:
+        return self._connection().execute('DELETE FROM rate_limits').rowcount
+
+    def clear(self, key: str) -> None:
+        self._connection().execute('DELETE FROM rate_limits WHERE key = ?', (key,))
+
+    def compact(self) -> int:
+        return self._connection().execute('DELETE FROM rate_limits WHERE expires_at <= ?', (time.time(),)).rowcount
+
+    def _maybe_compact(self, now: float):
+        if now - self._last_compaction < self.compact_interval:
+            return
+        self._last_compaction = now
+        self.compact()
+
+    def acquire_sliding_window_entry(self, key: str, limit: int, expiry: int, amount: int = 1) -> bool:
+        if amount > limit:
+            return False
+
+        now = time.time()
+        self._maybe_compact(now)
+        previous_key, current_key = self.sliding_window_keys(key, expiry, now)
+        conn = self._transaction()
+        try:
+            previous_count, previous_ttl, current_count, _ = self._window(conn, previous_key, current_key, expiry, now)
+            if floor(previous_count * previous_ttl / expiry + current_count) + amount > limit:
+                conn.execute('COMMIT')
+                return False
+
+            conn.execute(
+                'INSERT INTO rate_limits (key, value, expires_at) VALUES (?, ?, ?) '
+                'ON CONFLICT (key) DO UPDATE SET '
+                'value = CASE WHEN expires_at <= ? THEN excluded.value ELSE value + excluded.value END, '
+                'expires_at = CASE WHEN expires_at <= ? THEN excluded.expires_at ELSE expires_at END',
+                (current_key, amount, now + 2 * expiry, now, now)
+            )
+            conn.execute('COMMIT')
+            return True
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+
+    def get_sliding_window(self, key: str, expiry: int) -> tuple[int, float, int, float]:
+        now = time.time()
+        previous_key, current_key = self.sliding_window_keys(key, expiry, now)
+        return self._window(self._connection(), previous_key, current_key, expiry, now)
+
+    def clear_sliding_window(self, key: str, expiry: int) -> None:
+        previous_key, current_key = self.sliding_window_keys(key, expiry, time.time())
+        self._connection().execute('DELETE FROM rate_limits WHERE key IN (?, ?)', (previous_key, current_key))
+
+    def _window(self, conn: sqlite3.Connection, previous_key: str, current_key: str, expiry: int, now: float) -> tuple[int, float, int, float]:
+        counts = dict(conn.execute('SELECT key, value FROM rate_limits WHERE key IN (?, ?) AND expires_at > ?', (previous_key, current_key, now)).fetchall())
+        previous_count = counts.get(previous_key, 0)
+        current_count = counts.get(current_key, 0)
+        previous_ttl = (1 - (((now - expiry) / expiry) % 1)) * expiry if previous_count else 0.0
+        current_ttl = (1 - ((now / expiry) % 1)) * expiry + expiry
+        return previous_count, previous_ttl, current_count, current_ttl
+
+class TimedRateLimiter:
+    # Envolve a estratégia do limits para medir o tempo de cada consulta ao storage
+    def __init__(self, strategy):
+        self.strategy = strategy
+        self.lookups = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        return getattr(self.strategy, name)
+
+    def hit(self, *args, **kwargs) -> bool:
+        return self._timed(self.strategy.hit, *args, **kwargs)
+
+    def test(self, *args, **kwargs) -> bool:
+        return self._timed(self.strategy.test, *args, **kwargs)
+
+    def get_window_stats(self, *args, **kwargs):
+        return self._timed(self.strategy.get_window_stats, *args, **kwargs)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'lookups': self.lookups,
+                'errors': self.errors,
+                'avg_ms': round(self.total_time / self.lookups * 1000, 3) if self.lookups else 0.0,
+                'max_ms': round(self.max_time * 1000, 3)
+            }
+
+    def _timed(self, fn, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        except Exception:
+            with self._lock:
+                self.errors += 1
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self.lookups += 1
+                self.total_time += elapsed
+                self.max_time = max(self.max_time, elapsed)
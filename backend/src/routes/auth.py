@@ -2,11 +2,12 @@ from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from fastapi.responses import JSONResponse
 from src.db.database import get_db
 from src.db.models import User, RefreshToken
-from src.security import get_user, verify_password, generate_password_hash, generate_jwt_token, clear_auth_cookie, generate_session_id, invalidate_all_sessions
+from src.security import get_user, verify_password, generate_password_hash, generate_jwt_token, generate_access_token, clear_auth_cookie, generate_session_id, invalidate_all_sessions
 from src.schemas import LoginRequestSchema, RegisterRequestSchema, LoginResponseSchema, UsernameUpdateSchema, EmailUpdateSchema, PasswordUpdateSchema
 from src.utils import limiter, get_user_ip
 from sqlalchemy.orm import Session
 from src.logger import logger
+from src.cache import user_cache
 
 router = APIRouter()
 
@@ -23,7 +24,7 @@ def login(login: LoginRequestSchema, request: Request, response: Response, db: S
         raise HTTPException(status_code=401, detail='E-mail ou senha estão inválidos. Por favor, tente novamente.')
 
     session_id = generate_session_id(response)
-    token = generate_jwt_token(user.id, user.username, session_id, request, response, login.remember, db)
+    token = generate_jwt_token(user.id, user.username, session_id, request, response, login.remember, db, user.email, user.token_version)
     logger.info(f"`/auth/login`: Login realizado com sucesso\n```Email: {login.email}\nIP: {get_user_ip(request)} | User-Agent: {request.headers.get('User-Agent')}```")
     return {
         'access_token': token['access_token'],
@@ -56,7 +57,7 @@ def register(register: RegisterRequestSchema, request: Request, response: Respon
     db.refresh(user)
 
     session_id = generate_session_id(response)
-    token = generate_jwt_token(user.id, user.username, session_id, request, response, True, db)
+    token = generate_jwt_token(user.id, user.username, session_id, request, response, True, db, user.email, user.token_version)
     logger.info(f"`/auth/register`: Registro realizado com sucesso\n```Username: {register.username} - Email: {register.email}\nIP: {get_user_ip(request)} | User-Agent: {request.headers.get('User-Agent')}```")
     return {
         'access_token': token['access_token'],
@@ -81,7 +82,7 @@ def logout(response: Response, request: Request, db: Session = Depends(get_db)):
 
 @router.get('/me')
 def get_current_user(request: Request, response: Response, db: Session = Depends(get_db)):
-    user = get_user(request, response, db)
+    user = get_user(request, response, db, fresh=True)
     if not user:
         return JSONResponse(status_code=401, content={'detail': 'Invalid token or user not found'}, headers=response.headers)
     return user
@@ -89,7 +90,7 @@ def get_current_user(request: Request, response: Response, db: Session = Depends
 @router.patch('/me/username')
 @limiter.limit("5/day")
 def update_username(new: UsernameUpdateSchema, request: Request, response: Response, db: Session = Depends(get_db)):
-    user = get_user(request, response, db)
+    user = get_user(request, response, db, fresh=True)
     if not user:
         logger.warning(f"`/auth/me/username`: Tentativa com token inválido\n```IP: {get_user_ip(request)} | User-Agent: {request.headers.get('User-Agent')}```")
         raise HTTPException(status_code=401, detail='Invalid token or user not found')
@@ -100,13 +101,15 @@ def update_username(new: UsernameUpdateSchema, request: Request, response: Respo
     user_db = db.query(User).filter(User.id == user['id']).first()
     user_db.username = new.username
     db.commit()
+    user_cache.invalidate(user_db.id)
+    generate_access_token(user_db.id, user_db.username, user_db.email, user_db.token_version, response)  # Atualiza as claims da sessão atual
     logger.info(f"`/auth/me/username`: Username atualizado com sucesso\n```Username: {user['username']} -> {new.username}\nSession ID: {request.cookies.get('session_id')}\nIP: {get_user_ip(request)} | User-Agent: {request.headers.get('User-Agent')}```")
     return {'message': 'Username updated successfully'}
 
 @router.patch('/me/email')
 @limiter.limit("3/day")
 def update_email(new: EmailUpdateSchema, request: Request, response: Response, db: Session = Depends(get_db)):
-    user = get_user(request, response, db)
+    user = get_user(request, response, db, fresh=True)
     if not user:
         logger.warning(f"`/auth/me/email`: Tentativa com token inválido\n```IP: {get_user_ip(request)} | User-Agent: {request.headers.get('User-Agent')}```")
         raise HTTPException(status_code=401, detail='Invalid token or user not found')
@@ -118,13 +121,15 @@ def update_email(new: EmailUpdateSchema, request: Request, response: Response, d
     user_db.email = new.email
     db.commit()
     invalidate_all_sessions(user['id'], request.cookies.get('session_id'), True, db)
+    db.refresh(user_db)
+    generate_access_token(user_db.id, user_db.username, user_db.email, user_db.token_version, response)  # A sessão atual continua válida
     logger.info(f"`/auth/me/email`: E-mail atualizado com sucesso\n```Email: {user['email']} -> {new.email}\nSession ID: {request.cookies.get('session_id')}\nIP: {get_user_ip(request)} | User-Agent: {request.headers.get('User-Agent')}```")
     return {'message': 'E-mail updated successfully'}
 
 @router.patch('/me/password')
 @limiter.limit("3/day")
 def update_password(new: PasswordUpdateSchema, request: Request, response: Response, db: Session = Depends(get_db)):
-    user = get_user(request, response, db)
+    user = get_user(request, response, db, fresh=True)
     if not user:
         logger.warning(f"`/auth/me/password`: Tentativa com token inválido\n```IP: {get_user_ip(request)} | User-Agent: {request.headers.get('User-Agent')}```")
         raise HTTPException(status_code=401, detail='Invalid token or user not found')
@@ -136,5 +141,7 @@ def update_password(new: PasswordUpdateSchema, request: Request, response: Respo
     user_db.password = generate_password_hash(new.password)
     db.commit()
     invalidate_all_sessions(user['id'], request.cookies.get('session_id'), True, db)
+    db.refresh(user_db)
+    generate_access_token(user_db.id, user_db.username, user_db.email, user_db.token_version, response)  # A sessão atual continua válida
     logger.info(f"`/auth/me/password`: Senha atualizada com sucesso\n```Email: {user['email']} - Session ID: {request.cookies.get('session_id')}\nIP: {get_user_ip(request)} | User-Agent: {request.headers.get('User-Agent')}```")
     return {'message': 'Password updated successfully'}
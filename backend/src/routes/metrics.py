@@ -0,0 +1,56 @@
+import secrets
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import PlainTextResponse
+from src.access_log import access_log
+from src.analytics import click_events
+from src.cache import link_cache, password_cache
+from src.clicks import click_buffer
+from src.hashing import password_hasher
+from src.logger import info_shipper, error_shipper
+from src.metrics import metrics, format_metric, format_histogram
+from src.settings import METRICS_TOKEN
+from src.utils import limiter
+
+router = APIRouter()
+
+def collect_components() -> list[str]:
+    # Contadores que os componentes já mantêm, lidos só na hora da coleta
+    caches = {'link': link_cache.stats(), 'password': password_cache.stats()}
+    lines = format_metric('shorturl_cache_hits_total', 'counter', 'Acertos dos caches em memória.', [({'cache': name}, stats['hits']) for name, stats in caches.items()])
+    lines += format_metric('shorturl_cache_misses_total', 'counter', 'Faltas dos caches em memória.', [({'cache': name}, stats['misses']) for name, stats in caches.items()])
+    lines += format_metric('shorturl_cache_size', 'gauge', 'Entradas nos caches em memória.', [({'cache': name}, stats['size']) for name, stats in caches.items()])
+
+    hasher_stats = password_hasher.stats()
+    lines += format_histogram('shorturl_argon2_duration_seconds', 'Tempo de cada hash ou verificação argon2.', [({}, password_hasher.latency())])
+    lines += format_metric('shorturl_argon2_queue_seconds_total', 'counter', 'Tempo esperando vaga e worker para o argon2.', [({}, hasher_stats['queue_seconds'])])
+    lines += format_metric('shorturl_argon2_rejected_total', 'counter', 'Hashes recusados por falta de vaga.', [({}, hasher_stats['rejected'])])
+    lines += format_metric('shorturl_argon2_in_flight', 'gauge', 'Hashes em andamento.', [({}, hasher_stats['in_flight'])])
+
+    limiter_stats = limiter.limiter.stats()
+    lines += format_metric('shorturl_rate_limit_lookups_total', 'counter', 'Consultas ao storage do rate limit.', [({}, limiter_stats['lookups'])])
+    lines += format_metric('shorturl_rate_limit_errors_total', 'counter', 'Consultas ao storage do rate limit que falharam.', [({}, limiter_stats['errors'])])
+
+    lines += format_metric('shorturl_click_buffer_pending', 'gauge', 'Cliques aguardando gravação.', [({}, click_buffer.stats()['pending'])])
+    lines += format_metric('shorturl_click_events_pending', 'gauge', 'Eventos de clique aguardando agregação.', [({}, click_events.pending())])
+    lines += format_metric('shorturl_click_events_dropped_total', 'counter', 'Eventos de clique descartados com o buffer cheio.', [({}, click_events.dropped)])
+
+    access_stats = access_log.stats()
+    lines += format_metric('shorturl_access_log_written_total', 'counter', 'Linhas gravadas no log de acesso.', [({}, access_stats['written'])])
+    lines += format_metric('shorturl_access_log_dropped_total', 'counter', 'Linhas do log de acesso descartadas com a fila cheia.', [({}, access_stats['dropped'])])
+
+    shippers = {'info': info_shipper.stats(), 'error': error_shipper.stats()}
+    lines += format_metric('shorturl_webhook_sent_total', 'counter', 'Logs enviados ao Discord.', [({'level': name}, stats['sent']) for name, stats in shippers.items()])
+    lines += format_metric('shorturl_webhook_dropped_total', 'counter', 'Logs descartados com a fila cheia.', [({'level': name}, stats['dropped']) for name, stats in shippers.items()])
+    return lines
+
+@router.get('/metrics', include_in_schema=False)
+async def get_metrics(request: Request):
+    # Sem token configurado o endpoint fica desligado: atrás de um proxy todo cliente pareceria local
+    if not METRICS_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+
+    authorization = request.headers.get('Authorization', '')
+    if not secrets.compare_digest(authorization.encode(), f'Bearer {METRICS_TOKEN}'.encode()):
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+
+    return PlainTextResponse(metrics.render(collect_components()), media_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,32 @@
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import FileResponse, PlainTextResponse
+from starlette.concurrency import run_in_threadpool
+from src.profiling import check_token, format_collapsed, list_profiles, load_continuous, profile_path
+from src.settings import PROFILING_TOKEN, PROFILING_DIR
+
+def require_profiling_token(request: Request):
+    if not PROFILING_TOKEN:  # Sem token configurado as rotas de perfil nem existem
+        raise HTTPException(status_code=404, detail="Not Found")
+
+    authorization = request.headers.get('Authorization', '')
+    if not check_token(authorization.removeprefix('Bearer '), PROFILING_TOKEN):
+        raise HTTPException(status_code=401, detail="Invalid profiling token")
+
+router = APIRouter(dependencies=[Depends(require_profiling_token)])
+
+@router.get('/profiles')
+async def get_profiles():
+    return {'profiles': await run_in_threadpool(list_profiles, PROFILING_DIR)}
+
+@router.get('/profiles/{name}')
+async def download_profile(name: str):
+    path = profile_path(name, PROFILING_DIR)
+    if not path:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type='text/plain; charset=utf-8', filename=name)
+
+@router.get('/continuous')
+async def download_continuous():
+    # Soma os arquivos de todos os workers do host
+    stacks = await run_in_threadpool(load_continuous, PROFILING_DIR)
+    return PlainTextResponse(format_collapsed(stacks), headers={'Content-Disposition': 'attachment; filename="continuous.folded"'})
@@ -0,0 +1,49 @@
+import hashlib
+from datetime import datetime, timezone
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import RedirectResponse, Response
+from src.analytics import click_events
+from src.cache import get_cached_link
+from src.clicks import click_buffer
+from src.db.database import get_async_read_sessionmaker
+from src.settings import FRONTEND_URL, REDIRECT_CACHE_SECONDS
+from src.trending import trending_links
+from src.utils import limiter, get_user_ip, get_user_agent
+
+router = APIRouter()
+
+def frontend_redirect(short_id: str) -> RedirectResponse:
+    # Links com senha, expirados ou inexistentes ficam com a página de confirmação do frontend
+    return RedirectResponse(f'{FRONTEND_URL}/{short_id}', status_code=302, headers={'Cache-Control': 'no-store'})
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    # Comparação fraca (RFC 9110): ignora o prefixo W/ e aceita lista de tags ou *
+    if not if_none_match:
+        return False
+    tags = [tag.strip().removeprefix('W/') for tag in if_none_match.split(',')]
+    return '*' in tags or etag in tags
+
+# Caminho rápido: sem JSON nem response_model; com o link em cache não toca no banco e o clique é gravado em lote
+@router.get('/{short_id}', include_in_schema=False)
+@limiter.limit("120/minute")
+async def redirect(short_id: str, request: Request, open_db = Depends(get_async_read_sessionmaker)):
+    link = await get_cached_link(short_id, open_db)  # Principal só na janela do rw_until, como em GET /api/short/{short_id}
+
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    if not link or link.password or (link.expires_at and link.expires_at <= now):
+        return frontend_redirect(short_id)
+
+    # Cache curto: redirecionamentos servidos pelo navegador ou CDN não contam cliques
+    max_age = REDIRECT_CACHE_SECONDS
+    if link.expires_at:
+        max_age = min(max_age, int((link.expires_at - now).total_seconds()))
+    etag = '"' + hashlib.blake2b(f'{link.id}:{link.original_url}'.encode(), digest_size=8).hexdigest() + '"'
+    headers = {'Cache-Control': f'public, max-age={max_age}' if max_age > 0 else 'no-cache', 'ETag': etag}
+    # Revalidação do navegador ou CDN: não conta clique, ela não indica que o link foi seguido de novo
+    if etag_matches(request.headers.get('If-None-Match'), etag):
+        return Response(status_code=304, headers=headers)
+
+    click_buffer.add(link.id)
+    click_events.add(link.id, request.headers.get('Referer'), get_user_agent(request), request.headers.get('cf-ipcountry'), get_user_ip(request))
+    trending_links.add(link.short_url)
+    return RedirectResponse(link.original_url, status_code=302, headers=headers)
@@ -1,73 +1,154 @@
-from fastapi import APIRouter, Depends, HTTPException, Header, Request, Response
+from fastapi import APIRouter, Depends, HTTPException, Header, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from src.db.models import Link
-from src.db.database import get_db
-from sqlalchemy import or_
+from src.db.database import get_write_db, get_read_db, get_db, get_async_read_db, get_async_sessionmaker, get_async_read_sessionmaker, run_db
+from sqlalchemy import or_, select, delete, insert, tuple_
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from src.schemas import LinkCreateSchema, LinkCreateResponseSchema, LinkPublicSchema, LinkStatsSchema, UserLinksResponseSchema, LinkUpdateSchema, LinkPasswordUpdateSchema, LinkExpirationUpdateSchema
-from src.utils import validate_short_url, limiter, get_user_ip
-from src.security import generate_password_hash, verify_password, get_user
+from src.schemas import LinkCreateSchema, LinkCreateResponseSchema, BulkLinkCreateResponseSchema, LinkPublicSchema, LinkStatsSchema, LinkTimeseriesSchema, TrendingLinksSchema, UserLinksResponseSchema, LinkUpdateSchema, LinkPasswordUpdateSchema, LinkExpirationUpdateSchema
+from src.utils import validate_short_url, json_response, limiter, get_user_ip, get_user_agent, hit_cost_limit, encode_cursor, decode_cursor
+from src.short_ids import short_id_allocator
+from src.security import generate_password_hash, verify_password_async, get_user
+from src.hashing import password_hasher
 from src.db.database import SessionLocal
+from src.cache import link_cache, password_cache, get_cached_link
+from src.clicks import click_buffer
+from src.trending import trending_links
+from src.analytics import click_events, load_timeseries, load_visitor_summary, delete_link_stats, truncate_to_bucket, RESOLUTIONS
 from datetime import datetime, timedelta, timezone
+from starlette.concurrency import run_in_threadpool
 from src.logger import logger
+from src.settings import PURGE_BATCH_SIZE, PURGE_BATCH_PAUSE, BULK_MAX_ITEMS, BULK_ITEMS_RATE_LIMIT, EXPORT_BATCH_SIZE
+from pydantic import ValidationError
+from typing import Literal
+from collections import Counter
+import re
+import csv
+import io
+import json
+import time
 
 router = APIRouter()
 
-def clean_expired_links():
-    db: Session = SessionLocal()
+def clean_expired_links(db: Session | None = None, batch_size: int = PURGE_BATCH_SIZE, pause: float = PURGE_BATCH_PAUSE) -> int:
+    session: Session = db or SessionLocal()
+    deleted = 0
+    batches = 0
+    started = time.perf_counter()
     try:
-        expired_links = db.query(Link).filter(Link.expires_at.isnot(None), Link.expires_at < datetime.now(timezone.utc)).all()
-
-        if expired_links:
-            for link in expired_links:
-                db.delete(link)
-            db.commit()
-            logger.info(f"`clean_expired_links`: {len(expired_links)} links expirados removidos com sucesso!")
+        while True:  # Remove em lotes para não segurar o lock de escrita do SQLite por muito tempo
+            batch_started = time.perf_counter()
+            expired = session.execute(
+                select(Link.id, Link.short_url)
+                .where(Link.expires_at.isnot(None), Link.expires_at < datetime.now(timezone.utc))
+                .limit(batch_size)
+            ).all()
+            if not expired:
+                break
+
+            expired_ids = [link.id for link in expired]
+            delete_link_stats(session, expired_ids)
+            session.execute(delete(Link).where(Link.id.in_(expired_ids)), execution_options={'synchronize_session': False})
+            session.commit()
+            link_cache.invalidate(*(link.short_url for link in expired))
+            trending_links.discard(*(link.short_url for link in expired))
+
+            deleted += len(expired)
+            batches += 1
+            logger.debug(f"`clean_expired_links`: Lote {batches} com {len(expired)} links removido em {(time.perf_counter() - batch_started) * 1000:.1f}ms")
+            if len(expired) < batch_size:
+                break
+            time.sleep(pause)
+
+        if deleted:
+            logger.info(f"`clean_expired_links`: {deleted} links expirados removidos com sucesso em {batches} lotes ({(time.perf_counter() - started) * 1000:.1f}ms)")
     except Exception as e:
+        session.rollback()
         logger.error(f"`clean_expired_links`: Erro ao limpar links expirados\n```{e}```")
     finally:
-        db.close()
+        if db is None:
+            session.close()
+
+    return deleted
+
+def validate_expiration(expires_at: datetime) -> datetime:
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    expiration_date = expires_at.replace(tzinfo=None)
+
+    if expiration_date <= now + timedelta(minutes=5):
+        raise HTTPException(status_code=400, detail="Expiration date must be at least 5 minutes in the future")
+
+    if expiration_date.year > 2999 or expiration_date.year < now.year:
+        raise HTTPException(status_code=400, detail="Invalid expiration date")
+
+    return expiration_date
+
+async def check_link_password(link, password: str) -> bool:
+    if password_cache.is_verified(link.short_url, password, link.password):
+        return True
+
+    if not await verify_password_async(password, link.password):
+        return False
+
+    password_cache.add(link.short_url, password, link.password)
+    return True
+
+def delete_link(db: Session, link_id: int):
+    delete_link_stats(db, [link_id])
+    db.query(Link).filter(Link.id == link_id).delete()
+    db.commit()
+
+def load_active_link(db: Session, short_url: str) -> Link | None:
+    return db.query(Link).filter(Link.short_url == short_url, or_(Link.expires_at.is_(None), Link.expires_at > datetime.now(timezone.utc))).first()
 
 @router.get('/short/{short_id}', response_model=LinkPublicSchema)
 @limiter.shared_limit("30/hour;80/day", scope='get_url')
-def get_url(short_id: str, request: Request, password: str = Header(default=None), db: Session = Depends(get_db)):
-    link = db.query(Link).filter(Link.short_url == short_id).first()
+async def get_url(short_id: str, request: Request, password: str = Header(default=None),
+        open_db = Depends(get_async_read_sessionmaker), open_write_db = Depends(get_async_sessionmaker)):
+    # Dentro da janela do rw_until o `open_db` já abre o principal; fora dela uma falta vai para a réplica e fica em cache,
+    # sem repassar ao principal as buscas por IDs inexistentes
+    link = await get_cached_link(short_id, open_db)
     if not link:
         logger.warning(f"`GET /short/{short_id}`: Link não encontrado\n```IP: {get_user_ip(request)} | User-Agent: {request.headers.get('User-Agent')}```")
         raise HTTPException(status_code=404, detail="Link not found")
 
     if link.expires_at and link.expires_at < datetime.now(timezone.utc).replace(tzinfo=None):
         logger.warning(f"`GET /short/{short_id}`: Link expirado\n```IP: {get_user_ip(request)} | User-Agent: {request.headers.get('User-Agent')}```")
-        db.delete(link)
-        db.commit()
+        async with open_write_db() as write_db:  # Caso raro: a sessão de escrita só é aberta aqui
+            await run_db(write_db, delete_link, link.id)
+        link_cache.invalidate(short_id)
+        trending_links.discard(short_id)
         raise HTTPException(status_code=404, detail="Link not found")
 
     if link.password and not password:
         raise HTTPException(status_code=401, detail="Link is password protected")
-    if link.password and not verify_password(password, link.password):
+    if link.password and not await check_link_password(link, password):
         logger.warning(f"`GET /short/{short_id}`: Senha do link inválida\n```IP: {get_user_ip(request)} | User-Agent: {request.headers.get('User-Agent')}```")
         raise HTTPException(status_code=401, detail="Invalid password")
 
-    logger.info(f"`GET /short/{short_id}`: Link encontrado\n```IP: {get_user_ip(request)} | User-Agent: {request.headers.get('User-Agent')}```")
-    return {'original_url': link.original_url, 'clicks': link.clicks, 'created_at': link.created_at}
+    if not link.password:  # Links com senha não aparecem nos links em alta
+        trending_links.add(short_id)
+    return json_response(link.public_payload)
 
 @router.post('/click/{short_id}')
 @limiter.shared_limit("30/hour;80/day", scope='click_url')
-def click_url(short_id: str, request: Request, db: Session = Depends(get_db)):
-    link = db.query(Link).filter(Link.short_url == short_id).first()
+async def click_url(short_id: str, request: Request, open_db = Depends(get_async_read_sessionmaker)):
+    link = await get_cached_link(short_id, open_db)
     if not link:
         logger.warning(f"`/click/{short_id}`: Link não encontrado\n```IP: {get_user_ip(request)} | User-Agent: {request.headers.get('User-Agent')}```")
         raise HTTPException(status_code=404, detail="Link not found")
 
-    link.clicks += 1
-    db.commit()
-    db.refresh(link)
-    logger.info(f"`/click/{short_id}`: Adicionado clique ao link\n```IP: {get_user_ip(request)} | User-Agent: {request.headers.get('User-Agent')}```")
+    click_buffer.add(link.id)  # Gravado em lote no banco pelo ClickBuffer
+    if not link.password:
+        trending_links.add(link.short_url)
+    click_events.add(link.id, request.headers.get('Referer'), get_user_agent(request), request.headers.get('cf-ipcountry'), get_user_ip(request))
     return {'message': 'Link clicked successfully'}
 
 @router.post('/short', response_model=LinkCreateResponseSchema)
 @limiter.limit("6/minute;35/day")
-def create_url(url: LinkCreateSchema, request: Request, response: Response, db: Session = Depends(get_db)):
+def create_url(url: LinkCreateSchema, request: Request, response: Response, db: Session = Depends(get_write_db)):
     user = get_user(request, response, db)
+    generated = not url.short_url or url.short_url.strip() == ""
     validated_short = validate_short_url(url.short_url, db)
     if not validated_short:
         logger.warning(f"`POST /short`: ShortURL inválida\n```URL: {url.original_url}\nShort URL: {url.short_url} - User ID: {user['id'] if user else 'N/A'}\nIP: {get_user_ip(request)} | User-Agent: {request.headers.get('User-Agent')}```")
@@ -78,7 +159,7 @@ def create_url(url: LinkCreateSchema, request: Request, response: Response, db:
 
     url.short_url = validated_short
 
-    if db.query(Link).filter(Link.short_url == url.short_url).first():
+    if not generated and db.query(Link).filter(Link.short_url == url.short_url).first():
         logger.warning(f"`POST /short`: ShortURL já existe\n```URL: {url.original_url}\nShort URL: {url.short_url} - User ID: {user['id'] if user else 'N/A'}\nIP: {get_user_ip(request)} | User-Agent: {request.headers.get('User-Agent')}```")
         raise HTTPException(status_code=400, detail="Short URL already exists")
 
@@ -90,27 +171,146 @@ def create_url(url: LinkCreateSchema, request: Request, response: Response, db:
         link.user_id = user['id']
 
     if url.expires_at:
-        now = datetime.now(timezone.utc).replace(tzinfo=None)
-        expiration_date = url.expires_at.replace(tzinfo=None)
+        link.expires_at = validate_expiration(url.expires_at)
 
-        if expiration_date <= now + timedelta(minutes=5):
-            raise HTTPException(status_code=400, detail="Expiration date must be at least 5 minutes in the future")
-
-        if expiration_date.year > 2999 or expiration_date.year < now.year:
-            raise HTTPException(status_code=400, detail="Invalid expiration date")
-
-        link.expires_at = expiration_date
+    for _ in range(3):
+        try:
+            db.add(link)
+            db.commit()
+            break
+        except IntegrityError:  # ID gerado já usado por uma URL personalizada (ou criada ao mesmo tempo)
+            db.rollback()
+            if not generated:
+                raise HTTPException(status_code=400, detail="Short URL already exists")
+            link.short_url = url.short_url = validate_short_url(None, db)
+    else:
+        raise HTTPException(status_code=500, detail="Could not generate a short URL")
 
-    db.add(link)
-    db.commit()
     db.refresh(link)
+    link_cache.invalidate(link.short_url)  # Remove uma possível entrada negativa
     logger.info(f"`POST /short`: Link criado com sucesso\n```URL: {url.original_url}\nShort URL: {url.short_url} - Password: {'Sim' if url.password else 'Não'} - Expira em: {url.expires_at if url.expires_at else 'Nunca'}\nUser ID: {user['id'] if user else 'N/A'} - Session ID: {request.cookies.get('session_id')}\nIP: {get_user_ip(request)} | User-Agent: {request.headers.get('User-Agent')}```")
-    return link
+    return json_response({'id': link.id, 'original_url': link.original_url, 'short_url': link.short_url, 'created_at': link.created_at}, response)
+
+def create_links_bulk(items: list, user: dict | bool, db: Session) -> list[dict]:
+    results: list[dict | None] = [None] * len(items)
+    pending: dict[int, dict] = {}
+    generated: set[int] = set()
+    custom: dict[str, int] = {}
+
+    for index, item in enumerate(items):
+        try:
+            url = LinkCreateSchema.model_validate(item)
+            if url.password and len(url.password.strip()) < 3:
+                raise HTTPException(status_code=400, detail="Password must be at least 3 characters long")
+
+            expires_at = validate_expiration(url.expires_at) if url.expires_at else None
+            if not url.short_url or url.short_url.strip() == "":
+                generated.add(index)
+            elif not validate_short_url(url.short_url, auto_generate=False):
+                raise HTTPException(status_code=400, detail="Invalid short URL")
+            elif url.short_url in custom:
+                raise HTTPException(status_code=400, detail="Short URL already exists")
+            else:
+                custom[url.short_url] = index
+        except ValidationError as e:
+            results[index] = {'index': index, 'success': False, 'detail': e.errors()[0]['msg']}
+            continue
+        except HTTPException as e:
+            results[index] = {'index': index, 'success': False, 'detail': e.detail}
+            continue
+
+        pending[index] = {
+            'original_url': str(url.original_url),
+            'short_url': url.short_url if index not in generated else None,
+            'user_id': user['id'] if user else None,
+            'password': url.password,
+            'expires_at': expires_at
+        }
+
+    if custom:  # Uma única consulta para todas as URLs personalizadas
+        for short_url in db.scalars(select(Link.short_url).where(Link.short_url.in_(custom))):
+            index = custom[short_url]
+            results[index] = {'index': index, 'success': False, 'detail': 'Short URL already exists'}
+            del pending[index]
+
+    for index, short_url in zip(generated, short_id_allocator.allocate_many(db, len(generated))):
+        pending[index]['short_url'] = short_url
+
+    protected = [index for index, row in pending.items() if row['password']]
+    for index, hashed in zip(protected, password_hasher.hash_many([pending[index]['password'] for index in protected])):
+        if hashed is None:  # Sem vaga para o argon2: só este item falha
+            results[index] = {'index': index, 'success': False, 'detail': 'Server is busy, please try again later'}
+            del pending[index]
+        else:
+            pending[index]['password'] = hashed
+
+    created = []
+    for _ in range(3):
+        if not pending:
+            break
+        try:
+            created = db.execute(insert(Link).returning(Link.id, Link.short_url, Link.created_at, sort_by_parameter_order=True), list(pending.values())).all()
+            db.commit()
+            break
+        except IntegrityError:  # Conflito com um link criado ao mesmo tempo: resolve e tenta novamente
+            db.rollback()
+            taken = set(db.scalars(select(Link.short_url).where(Link.short_url.in_([row['short_url'] for row in pending.values()]))))
+            for index, row in list(pending.items()):
+                if row['short_url'] not in taken:
+                    continue
+                if index in generated:
+                    row['short_url'] = short_id_allocator.allocate(db)
+                else:
+                    results[index] = {'index': index, 'success': False, 'detail': 'Short URL already exists'}
+                    del pending[index]
+    else:
+        for index in pending:
+            results[index] = {'index': index, 'success': False, 'detail': 'Could not create short URL'}
+        pending = {}
+
+    for index, link in zip(pending, created):
+        results[index] = {'index': index, 'success': True, 'id': link.id, 'short_url': link.short_url, 'created_at': link.created_at}
+
+    link_cache.invalidate(*(row['short_url'] for row in pending.values()))
+    return results
+
+@router.post('/short/bulk', response_model=BulkLinkCreateResponseSchema)
+@limiter.limit("5/minute;50/day")
+async def create_url_bulk(request: Request, response: Response, db: Session = Depends(get_write_db)):
+    body = await request.body()
+    try:
+        if 'ndjson' in request.headers.get('Content-Type', ''):
+            items = [json.loads(line) for line in body.splitlines() if line.strip()]
+        else:
+            items = json.loads(body)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid request body")
+
+    if not isinstance(items, list) or not items:
+        raise HTTPException(status_code=400, detail="Request body must be a non-empty list of links")
+
+    if len(items) > BULK_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"A maximum of {BULK_MAX_ITEMS} links can be created per request")
+
+    if not hit_cost_limit(BULK_ITEMS_RATE_LIMIT, 'create_url_bulk_items', request, len(items)):
+        raise HTTPException(status_code=429, detail="Você atingiu o limite de requisições. Por favor, tente novamente mais tarde.")
+
+    user = await run_in_threadpool(get_user, request, response, db)
+    results = await run_in_threadpool(create_links_bulk, items, user, db)
+    created = sum(1 for result in results if result['success'])
+    logger.info(f"`POST /short/bulk`: {created} de {len(results)} links criados em lote\n```User ID: {user['id'] if user else 'N/A'} - Session ID: {request.cookies.get('session_id')}\nIP: {get_user_ip(request)} | User-Agent: {request.headers.get('User-Agent')}```")
+    return {'created': created, 'failed': len(results) - created, 'results': results}
+
+# Declarada antes de /stats/{short_id} para "trending" não ser tratado como um link
+@router.get('/stats/trending', response_model=TrendingLinksSchema)
+@limiter.limit("60/minute")
+async def get_trending_links(request: Request, window: Literal['5m', '1h', '24h'] = '1h', k: int = Query(default=50, ge=1, le=100)):
+    return {'window': window, 'links': trending_links.top(window, k)}
 
 @router.get('/stats/{short_id}', response_model=LinkStatsSchema)
 @limiter.shared_limit("50/day", scope='get_stats')
-def get_stats(short_id: str, request: Request, db: Session = Depends(get_db)):
-    link = db.query(Link).filter(Link.short_url == short_id, or_(Link.expires_at.is_(None), Link.expires_at > datetime.now(timezone.utc))).first()
+async def get_stats(short_id: str, request: Request, db = Depends(get_async_read_db)):
+    link = await run_db(db, load_active_link, short_id)
     if not link:
         logger.warning(f"`/stats/{short_id}`: Link não encontrado\n```IP: {get_user_ip(request)} | User-Agent: {request.headers.get('User-Agent')}```")
         raise HTTPException(status_code=404, detail="Link not found")
@@ -118,27 +318,164 @@ def get_stats(short_id: str, request: Request, db: Session = Depends(get_db)):
     if link.password:  # Links com senha só o usuário que criou pode ver as estatísticas
         raise HTTPException(status_code=401, detail="Link is password protected")
 
-    logger.info(f"`/stats/{short_id}`: Estatísticas do link\n```IP: {get_user_ip(request)} | User-Agent: {request.headers.get('User-Agent')}```")
-    return {'original_url': link.original_url, 'short_url': link.short_url, 'clicks': link.clicks, 'created_at': link.created_at}
+    visitors = await run_db(db, load_visitor_summary, link.id)
+    return json_response({
+        'original_url': link.original_url, 'short_url': link.short_url, 'clicks': link.clicks + click_buffer.pending(link.id),
+        **visitors, 'created_at': link.created_at, 'has_password': False, 'expires_at': link.expires_at
+    })
+
+TIMESERIES_MAX_POINTS = 1500
+TIMESERIES_DEFAULT_POINTS = {'minute': 60, 'hour': 24, 'day': 30}
+
+@router.get('/stats/{short_id}/timeseries', response_model=LinkTimeseriesSchema)
+@limiter.shared_limit("50/day", scope='get_stats')
+async def get_stats_timeseries(short_id: str, request: Request, resolution: Literal['minute', 'hour', 'day'] = 'hour',
+        start: datetime | None = None, end: datetime | None = None, db = Depends(get_async_read_db)):
+    size = RESOLUTIONS[resolution][0]
+    try:
+        end = truncate_to_bucket(end or datetime.now(timezone.utc), resolution, ceil=True)
+        start = truncate_to_bucket(start, resolution) if start else end - timedelta(seconds=size * TIMESERIES_DEFAULT_POINTS[resolution])
+    except (ValueError, OverflowError, OSError):  # Datas nos extremos do datetime: o intervalo arredondado não existe
+        raise HTTPException(status_code=400, detail="Invalid time range")
+
+    if start >= end:
+        raise HTTPException(status_code=400, detail="Invalid time range")
+
+    if (end - start).total_seconds() / size > TIMESERIES_MAX_POINTS:
+        raise HTTPException(status_code=400, detail=f"Time range too large, a maximum of {TIMESERIES_MAX_POINTS} points can be returned")
+
+    link = await run_db(db, load_active_link, short_id)
+    if not link:
+        logger.warning(f"`/stats/{short_id}/timeseries`: Link não encontrado\n```IP: {get_user_ip(request)} | User-Agent: {request.headers.get('User-Agent')}```")
+        raise HTTPException(status_code=404, detail="Link not found")
+
+    if link.password:
+        raise HTTPException(status_code=401, detail="Link is password protected")
+
+    # Só lê os intervalos já agregados, nunca os eventos brutos
+    rows = await run_db(db, load_timeseries, link.id, resolution, start, end)
+    points = {start + timedelta(seconds=size * index): 0 for index in range(int((end - start).total_seconds()) // size)}
+    referrers, devices, countries = Counter(), Counter(), Counter()
+    for row in rows:
+        points[row.bucket_start] = points.get(row.bucket_start, 0) + row.clicks
+        referrers[row.referrer] += row.clicks
+        devices[row.device] += row.clicks
+        countries[row.country] += row.clicks
+
+    return {
+        'short_url': link.short_url, 'resolution': resolution, 'start': start, 'end': end,
+        'points': [{'timestamp': timestamp, 'clicks': clicks} for timestamp, clicks in points.items()],
+        'referrers': referrers, 'devices': devices, 'countries': countries
+    }
+
+# created_at usa a ordem do id: os ids são atribuídos na ordem de criação
+USER_LINKS_SORT_COLUMNS = {'id': Link.id, 'created_at': Link.id, 'clicks': Link.clicks}
+
+def user_links_select(user_id: int):
+    return select(
+        Link.id, Link.original_url, Link.short_url, Link.clicks, Link.created_at, Link.expires_at,
+        Link.password.isnot(None).label('has_password')
+    ).where(Link.user_id == user_id, or_(Link.expires_at.is_(None), Link.expires_at > datetime.now(timezone.utc)))
+
+def user_links_query(user_id: int, limit: int, cursor: list | None, sort: str, order: str, search: str | None):
+    sort_column = USER_LINKS_SORT_COLUMNS[sort]
+    query = user_links_select(user_id)
+
+    if search:  # Intervalo em vez de LIKE para usar o índice (user_id, short_url)
+        query = query.where(Link.short_url >= search, Link.short_url < search + '\x7f')
+
+    keys = (Link.id,) if sort_column is Link.id else (sort_column, Link.id)
+    if cursor:
+        position = tuple_(*keys) if len(keys) > 1 else keys[0]
+        value = tuple_(*cursor) if len(keys) > 1 else cursor[0]
+        query = query.where(position > value if order == 'asc' else position < value)
+
+    return query.order_by(*(key.asc() if order == 'asc' else key.desc() for key in keys)).limit(limit + 1)
+
+def load_user_links(db: Session, user_id: int, limit: int, cursor: list | None, sort: str, order: str, search: str | None) -> tuple[list, str | None]:
+    rows = db.execute(user_links_query(user_id, limit, cursor, sort, order, search)).all()
+
+    next_cursor = None
+    if len(rows) > limit:  # Busca um a mais só para saber se há próxima página
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor([last.id] if USER_LINKS_SORT_COLUMNS[sort] is Link.id else [last.clicks, last.id])
+    # Soma os cliques ainda no buffer, como o /stats e a exportação; o cursor continua com o valor do banco, que é o da ordenação
+    return [{**row._mapping, 'clicks': row.clicks + click_buffer.pending(row.id)} for row in rows], next_cursor
+
+def is_cursor_value(value) -> bool:
+    # bool é subclasse de int; fora de 64 bits o SQLite não aceita o parâmetro
+    return type(value) is int and -2**63 <= value < 2**63
 
 @router.get('/user/links', response_model=UserLinksResponseSchema)
 @limiter.limit("80/day")
-def get_user_links(request: Request, response: Response, db: Session = Depends(get_db)):
+def get_user_links(request: Request, response: Response, limit: int = Query(default=100, ge=1, le=1000), cursor: str | None = None,
+        sort: Literal['id', 'created_at', 'clicks'] = 'id', order: Literal['asc', 'desc'] = 'asc', search: str | None = None,
+        db: Session = Depends(get_db), read_db: Session = Depends(get_read_db)):
     user = get_user(request, response, db)
     if not user:
         logger.warning(f"`/user/links`: Tentativa com token inválido\n```IP: {get_user_ip(request)} | User-Agent: {request.headers.get('User-Agent')}```")
         raise HTTPException(status_code=401, detail="You must be logged in to access this resource")
 
-    links = db.query(Link).filter(Link.user_id == user['id'], or_(Link.expires_at.is_(None), Link.expires_at > datetime.now(timezone.utc))).all()
-    for link in links:
-        link.has_password = bool(link.password)
+    position = decode_cursor(cursor) if cursor else None
+    if cursor and (not position or len(position) != (1 if USER_LINKS_SORT_COLUMNS[sort] is Link.id else 2) or not all(is_cursor_value(value) for value in position)):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
 
-    logger.info(f"`/user/links`: Todos os links do usuário\n```User ID: {user['id']}\nIP: {get_user_ip(request)} | User-Agent: {request.headers.get('User-Agent')}```")
-    return {'links': links}
+    if search and not re.fullmatch(r"[a-zA-Z0-9_-]{1,16}", search):
+        raise HTTPException(status_code=400, detail="Invalid search")
+
+    links, next_cursor = load_user_links(read_db, user['id'], limit, position, sort, order, search)
+    return {'links': links, 'next_cursor': next_cursor}
+
+EXPORT_COLUMNS = ['id', 'original_url', 'short_url', 'clicks', 'created_at', 'expires_at', 'has_password']
+
+def export_row(row) -> dict:
+    link = dict(row._mapping)
+    link['clicks'] += click_buffer.pending(link['id'])
+    for column in ('created_at', 'expires_at'):
+        link[column] = link[column].isoformat() if link[column] else None
+    return link
+
+def stream_user_links(db: Session, user_id: int, export_format: str):
+    # A sessão do Depends já foi encerrada quando o corpo começa a ser enviado; o gerador a reabre e fecha ao terminar
+    try:
+        if export_format == 'csv':
+            buffer = io.StringIO()
+            writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS)
+            writer.writeheader()
+            yield buffer.getvalue()
+
+        # yield_per: cursor do lado do servidor, lido em lotes para a memória não crescer com a quantidade de links
+        result = db.execute(user_links_select(user_id).order_by(Link.id).execution_options(yield_per=EXPORT_BATCH_SIZE))
+        for rows in result.partitions():
+            if export_format == 'csv':
+                buffer.seek(0)
+                buffer.truncate()
+                writer.writerows(export_row(row) for row in rows)
+                yield buffer.getvalue()
+            else:
+                yield ''.join(json.dumps(export_row(row)) + '\n' for row in rows)
+    finally:
+        db.close()
+
+@router.get('/user/links/export')
+@limiter.limit("10/hour;30/day")
+def export_user_links(request: Request, response: Response, export_format: Literal['ndjson', 'csv'] = Query(default='ndjson', alias='format'), db: Session = Depends(get_db), read_db: Session = Depends(get_read_db)):
+    user = get_user(request, response, db)
+    if not user:
+        logger.warning(f"`/user/links/export`: Tentativa com token inválido\n```IP: {get_user_ip(request)} | User-Agent: {request.headers.get('User-Agent')}```")
+        raise HTTPException(status_code=401, detail="You must be logged in to access this resource")
+
+    logger.info(f"`/user/links/export`: Exportação dos links do usuário ({export_format})\n```User ID: {user['id']}\nIP: {get_user_ip(request)} | User-Agent: {request.headers.get('User-Agent')}```")
+    return StreamingResponse(
+        stream_user_links(read_db, user['id'], export_format),
+        media_type='text/csv' if export_format == 'csv' else 'application/x-ndjson',
+        headers={'Content-Disposition': f'attachment; filename="links.{export_format}"'}
+    )
 
 @router.patch('/short/{short_id}')
 @limiter.shared_limit("50/day", scope='update_short_url')
-def update_short_url(short_id: str, new_url: LinkUpdateSchema, request: Request, response: Response, db: Session = Depends(get_db)):
+def update_short_url(short_id: str, new_url: LinkUpdateSchema, request: Request, response: Response, db: Session = Depends(get_write_db)):
     user = get_user(request, response, db)
     if not user:
         logger.warning(f"`PATCH /short/{short_id}`: Tentativa com token inválido\n```IP: {get_user_ip(request)} | User-Agent: {request.headers.get('User-Agent')}```")
@@ -159,12 +496,14 @@ def update_short_url(short_id: str, new_url: LinkUpdateSchema, request: Request,
     link.short_url = new_url.short_url
     db.commit()
     db.refresh(link)
+    link_cache.invalidate(short_id, link.short_url)
+    trending_links.discard(short_id)
     logger.info(f"`PATCH /short/{short_id}`: ShortURL atualizada\n```Nova Shorturl: {new_url.short_url}\nUser ID: {user['id']} - Session ID: {request.cookies.get('session_id')}\nIP: {get_user_ip(request)} | User-Agent: {request.headers.get('User-Agent')}```")
     return {'message': 'Short URL updated successfully', 'short_url': link.short_url}
 
 @router.patch('/short/{short_id}/password')
 @limiter.shared_limit("50/day", scope='update_link_password')
-def update_link_password(short_id: str, password: LinkPasswordUpdateSchema, request: Request, response: Response, db: Session = Depends(get_db)):
+def update_link_password(short_id: str, password: LinkPasswordUpdateSchema, request: Request, response: Response, db: Session = Depends(get_write_db)):
     user = get_user(request, response, db)
     if not user:
         logger.warning(f"`PATCH /short/{short_id}/password`: Tentativa com token inválido\n```IP: {get_user_ip(request)} | User-Agent: {request.headers.get('User-Agent')}```")
@@ -180,26 +519,21 @@ def update_link_password(short_id: str, password: LinkPasswordUpdateSchema, requ
 
     link.password = generate_password_hash(password.password)
     db.commit()
+    link_cache.invalidate(short_id)
+    trending_links.discard(short_id)
     logger.info(f"`PATCH /short/{short_id}/password`: Senha atualizada\n```User ID: {user['id']} - Session ID: {request.cookies.get('session_id')}\nIP: {get_user_ip(request)} | User-Agent: {request.headers.get('User-Agent')}```")
     return {'message': 'Password updated successfully'}
 
 @router.patch('/short/{short_id}/expiration')
 @limiter.shared_limit('50/day', scope='update_link_expiration')
-def update_link_expiration(short_id: str, expiration: LinkExpirationUpdateSchema, request: Request, response: Response, db: Session = Depends(get_db)):
+def update_link_expiration(short_id: str, expiration: LinkExpirationUpdateSchema, request: Request, response: Response, db: Session = Depends(get_write_db)):
     user = get_user(request, response, db)
     if not user:
         logger.warning(f"`PATCH /short/{short_id}/expiration`: Tentativa com token inválido\n```IP: {get_user_ip(request)} | User-Agent: {request.headers.get('User-Agent')}```")
         raise HTTPException(status_code=401, detail="You must be logged in to access this resource")
 
     if expiration.expires_at:
-        now = datetime.now(timezone.utc).replace(tzinfo=None)
-        expiration_date = expiration.expires_at.replace(tzinfo=None)
-
-        if expiration_date <= now + timedelta(minutes=5):
-            raise HTTPException(status_code=400, detail="Expiration date must be at least 5 minutes in the future")
-
-        if expiration_date.year > 2999 or expiration_date.year < now.year:
-            raise HTTPException(status_code=400, detail="Invalid expiration date")
+        validate_expiration(expiration.expires_at)
 
     link = db.query(Link).filter(Link.short_url == short_id, Link.user_id == user['id']).first()
     if not link:
@@ -208,12 +542,13 @@ def update_link_expiration(short_id: str, expiration: LinkExpirationUpdateSchema
 
     link.expires_at = expiration.expires_at.replace(tzinfo=None) if expiration.expires_at else None
     db.commit()
+    link_cache.invalidate(short_id)
     logger.info(f"`PATCH /short/{short_id}/expiration`: Expiração atualizada\n```Expira em: {expiration.expires_at if expiration.expires_at else 'Nunca'}\nUser ID: {user['id']} - Session ID: {request.cookies.get('session_id')}\nIP: {get_user_ip(request)} | User-Agent: {request.headers.get('User-Agent')}```")
     return {'message': 'Expiration updated successfully'}
 
 @router.delete('/short/{short_id}')
 @limiter.shared_limit("8/hour;30/day", scope='delete_short_url')
-def delete_short_url(short_id: str, request: Request, response: Response, db: Session = Depends(get_db)):
+def delete_short_url(short_id: str, request: Request, response: Response, db: Session = Depends(get_write_db)):
     user = get_user(request, response, db)
     if not user:
         logger.warning(f"`DELETE /short/{short_id}`: Tentativa com token inválido\n```IP: {get_user_ip(request)} | User-Agent: {request.headers.get('User-Agent')}```")
@@ -224,7 +559,10 @@ def delete_short_url(short_id: str, request: Request, response: Response, db: Se
         logger.warning(f"`DELETE /short/{short_id}`: Link não encontrado\n```IP: {get_user_ip(request)} | User-Agent: {request.headers.get('User-Agent')}```")
         raise HTTPException(status_code=404, detail="Link not found")
 
+    delete_link_stats(db, [link.id])
     db.delete(link)
     db.commit()
+    link_cache.invalidate(short_id)
+    trending_links.discard(short_id)
     logger.info(f"`DELETE /short/{short_id}`: Link deletado\n```Link original: {link.original_url}\nUser ID: {user['id']} - Session ID: {request.cookies.get('session_id')}\nIP: {get_user_ip(request)} | User-Agent: {request.headers.get('User-Agent')}```")
     return {'message': 'URL deleted successfully'}
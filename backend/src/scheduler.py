@@ -0,0 +1,90 @@
+import os
+import time
+from apscheduler.schedulers.background import BackgroundScheduler
+from src.routes import url
+from src.analytics import purge_click_buckets
+from src.trending import trending_links
+from src.logger import logger
+from src.metrics import metrics
+from src.db.database import engine, checkpoint_wal
+from src.settings import PURGE_INTERVAL_MINUTES, SCHEDULER_LOCK_FILE, SQLITE_CHECKPOINT_MINUTES, TRENDING_SNAPSHOT_MINUTES
+
+try:
+    import fcntl
+except ImportError:  # Windows: sem flock, roda como processo único
+    fcntl = None
+
+class FileLockLeader:
+    # Só o processo que segura o lock do arquivo executa os jobs; os outros tentam assumir periodicamente
+    def __init__(self, path: str):
+        self.path = path
+        self._fd: int | None = None
+
+    @property
+    def is_leader(self) -> bool:
+        return self._fd is not None or fcntl is None
+
+    def try_acquire(self) -> bool:
+        if self.is_leader:
+            return True
+
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+
+        os.ftruncate(fd, 0)
+        os.write(fd, str(os.getpid()).encode())
+        self._fd = fd
+        logger.info(f"`scheduler`: Processo {os.getpid()} assumiu as tarefas agendadas")
+        return True
+
+    def release(self):
+        if self._fd is None:
+            return
+        fcntl.flock(self._fd, fcntl.LOCK_UN)
+        os.close(self._fd)
+        self._fd = None
+
+leader = FileLockLeader(SCHEDULER_LOCK_FILE)
+
+def leader_only(fn):
+    def job():
+        if not leader.is_leader:
+            return
+        started = time.perf_counter()
+        try:
+            fn()
+        except Exception:
+            metrics.observe_job(fn.__name__, time.perf_counter() - started, failed=True)
+            raise
+        metrics.observe_job(fn.__name__, time.perf_counter() - started)
+    job.__name__ = fn.__name__
+    return job
+
+scheduler = BackgroundScheduler()
+scheduler.add_job(leader.try_acquire, 'interval', seconds=30)  # Assume se o líder atual morrer
+scheduler.add_job(leader_only(url.clean_expired_links), 'interval', minutes=PURGE_INTERVAL_MINUTES)
+scheduler.add_job(leader_only(purge_click_buckets), 'interval', minutes=PURGE_INTERVAL_MINUTES)
+# Todo worker salva os próprios contadores (e lê os dos outros); o líder adota os de workers que morreram
+scheduler.add_job(trending_links.snapshot, 'interval', minutes=TRENDING_SNAPSHOT_MINUTES)
+scheduler.add_job(leader_only(trending_links.adopt_stale), 'interval', minutes=TRENDING_SNAPSHOT_MINUTES)
+if engine.dialect.name == 'sqlite' and SQLITE_CHECKPOINT_MINUTES > 0:
+    scheduler.add_job(leader_only(checkpoint_wal), 'interval', minutes=SQLITE_CHECKPOINT_MINUTES)
+
+def start_scheduler():
+    leader.try_acquire()
+    scheduler.start()
+
+def stop_scheduler():
+    if scheduler.running:
+        scheduler.shutdown(wait=True)  # Espera um job em andamento terminar
+    trending_links.snapshot()
+    if leader.is_leader:
+        try:  # Sem requisições chegando, o TRUNCATE não disputa com ninguém e devolve o espaço do WAL
+            checkpoint_wal('TRUNCATE')
+        except Exception as e:
+            logger.error(f"`stop_scheduler`: Erro no checkpoint do WAL\n```{e}```")
+    leader.release()
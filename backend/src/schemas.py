@@ -16,6 +16,19 @@ class LinkCreateResponseSchema(BaseModel):
     short_url: str
     created_at: datetime
 
+class BulkLinkResultSchema(BaseModel):
+    index: int
+    success: bool
+    id: Optional[int] = Field(default=None)
+    short_url: Optional[str] = Field(default=None)
+    created_at: Optional[datetime] = Field(default=None)
+    detail: Optional[str] = Field(default=None)
+
+class BulkLinkCreateResponseSchema(BaseModel):
+    created: int
+    failed: int
+    results: list[BulkLinkResultSchema]
+
 class LinkPublicSchema(BaseModel):
     original_url: HttpUrl
     clicks: int
@@ -25,10 +38,36 @@ class LinkStatsSchema(BaseModel):
     original_url: HttpUrl
     short_url: str
     clicks: int
+    # Aproximados (HyperLogLog); só em /stats/{short_id}. As janelas usam os sketches por hora dos últimos 7 dias
+    unique_visitors: Optional[int] = Field(default=None)
+    unique_visitors_24h: Optional[int] = Field(default=None)
+    unique_visitors_7d: Optional[int] = Field(default=None)
     created_at: datetime
     has_password: bool = Field(default=False)
     expires_at: Optional[datetime] = Field(default=None)
 
+class TimeseriesPointSchema(BaseModel):
+    timestamp: datetime
+    clicks: int
+
+class LinkTimeseriesSchema(BaseModel):
+    short_url: str
+    resolution: str
+    start: datetime
+    end: datetime
+    points: list[TimeseriesPointSchema]
+    referrers: dict[str, int]
+    devices: dict[str, int]
+    countries: dict[str, int]
+
+class TrendingLinkSchema(BaseModel):
+    short_url: str
+    score: float
+
+class TrendingLinksSchema(BaseModel):
+    window: str
+    links: list[TrendingLinkSchema]
+
 class LoginRequestSchema(BaseModel):
     email: EmailStr
     password: str
@@ -75,6 +114,7 @@ class LoginResponseSchema(BaseModel):
 
 class UserLinksResponseSchema(BaseModel):
     links: list[LinkStatsSchema]
+    next_cursor: Optional[str] = Field(default=None)
 
 class LinkUpdateSchema(BaseModel):
     short_url: str
@@ -1,5 +1,4 @@
 from fastapi import HTTPException, Request, Depends, Response
-from passlib.context import CryptContext
 from datetime import datetime, timezone, timedelta
 from jwt import encode, decode, InvalidAlgorithmError, InvalidSignatureError, InvalidTokenError, ExpiredSignatureError
 from sqlalchemy.orm import Session
@@ -8,33 +7,56 @@ from src.db.models import User, RefreshToken
 from src.settings import JWT_SECRET_KEY, JWT_EXPIRATION_TIME
 from src.utils import get_user_agent, get_user_ip
 from src.logger import logger
+from src.hashing import password_hasher
+from src.cache import user_cache, load_user
 import hashlib
 import secrets
 import uuid
 
-pwd_context = CryptContext(schemes=['argon2'], deprecated='auto')
 ALGORITHM = 'HS256'
 
 def generate_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return password_hasher.hash(password)
 
 def verify_password(password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(password, hashed_password)
+    return password_hasher.verify(password, hashed_password)
+
+async def generate_password_hash_async(password: str) -> str:
+    return await password_hasher.hash_async(password)
+
+async def verify_password_async(password: str, hashed_password: str) -> bool:
+    return await password_hasher.verify_async(password, hashed_password)
 
 def generate_jwt_token(user_id: int, username: str, session_id: str,
-        request: Request, response: Response, remember: bool = False, db: Session = Depends(get_db)):
+        request: Request, response: Response, remember: bool = False, db: Session = Depends(get_db),
+        email: str | None = None, token_version: int = 0):
+
+    jwt = generate_access_token(user_id, username, email, token_version, response)
+    refresh_token = generate_refresh_token(user_id, session_id, request, remember, db)
+
+    response.set_cookie(
+        key='refresh_token',
+        value=refresh_token,
+        max_age=60 * 60 * 24 * 30 if remember else None,
+        httponly=True,
+        secure=True,
+        samesite='none'
+    )
+    logger.info(f"`generate_jwt_token`: Token JWT gerado com sucesso\n```User ID: {user_id} - Username: {username} - Session ID: {session_id}\nIP: {get_user_ip(request)} | User-Agent: {request.headers.get('User-Agent')}```")
+    return {'access_token': jwt, 'refresh_token': refresh_token}
 
+def generate_access_token(user_id: int, username: str, email: str | None, token_version: int, response: Response) -> str:
     payload = {
         'sub': str(user_id),
         'username': username,
+        'email': email,
+        'ver': token_version,
         'iat': datetime.now(timezone.utc),
         'type': 'access',
         'exp': datetime.now(timezone.utc) + timedelta(minutes=JWT_EXPIRATION_TIME)
     }
 
     jwt = encode(payload, JWT_SECRET_KEY, algorithm='HS256')
-    refresh_token = generate_refresh_token(user_id, session_id, request, remember, db)
-
     response.set_cookie(
         key='access_token',
         value=jwt,
@@ -43,17 +65,7 @@ def generate_jwt_token(user_id: int, username: str, session_id: str,
         secure=True,
         samesite='none'
     )
-
-    response.set_cookie(
-        key='refresh_token',
-        value=refresh_token,
-        max_age=60 * 60 * 24 * 30 if remember else None,
-        httponly=True,
-        secure=True,
-        samesite='none'
-    )
-    logger.info(f"`generate_jwt_token`: Token JWT gerado com sucesso\n```User ID: {user_id} - Username: {username} - Session ID: {session_id}\nIP: {get_user_ip(request)} | User-Agent: {request.headers.get('User-Agent')}```")
-    return {'access_token': jwt, 'refresh_token': refresh_token}
+    return jwt
 
 def generate_refresh_token(user_id: int, session_id: str, request: Request, remember: bool, db: Session):
     token = hashlib.sha256(secrets.token_urlsafe(32).encode()).hexdigest()
@@ -90,7 +102,19 @@ def decode_jwt_token(token: str):
 
     return jwt
 
-def get_user(request: Request, response: Response, db: Session = Depends(get_db)):
+def get_user_from_claims(payload: dict, db: Session, fresh: bool = False) -> dict | None:
+    user_id = int(payload.get('sub'))
+    # token_version vem do user_cache: sem consulta no caso comum. Este processo vê a revogação na hora;
+    # os outros workers, quando a entrada expira (no máximo USER_CACHE_TTL segundos depois)
+    user = load_user(db, user_id, fresh)
+    if not user or user['token_version'] != payload.get('ver', 0):  # Usuário removido ou token revogado
+        return None
+
+    if fresh or not payload.get('email'):  # Tokens antigos não têm e-mail nas claims
+        return {'id': user['id'], 'username': user['username'], 'email': user['email']}
+    return {'id': user_id, 'username': payload['username'], 'email': payload['email']}
+
+def get_user(request: Request, response: Response, db: Session = Depends(get_db), fresh: bool = False):
     token = request.cookies.get('access_token')
     refresh_token = request.cookies.get('refresh_token')
     session_id = request.cookies.get('session_id')
@@ -99,19 +123,15 @@ def get_user(request: Request, response: Response, db: Session = Depends(get_db)
         clear_auth_cookie(response)
         return False
 
-    try:  # Verifica access token apenas
-        payload = decode_jwt_token(token)
-        user_id = int(payload.get('sub'))
-        user = db.query(User).filter(User.id == user_id).first()
-        if user:
-            return {
-                'id': user.id,
-                'username': user.username,
-                'email': user.email
-            }
-    except Exception as e:
-        logger.error(f"`get_user`: Erro ao decodificar token JWT\n```Token: {token}\nError: {e}```")
-        pass
+    if token:  # Verifica access token apenas
+        try:
+            user = get_user_from_claims(decode_jwt_token(token), db, fresh)
+            if user:
+                return user
+        except HTTPException:  # Expirado ou inválido: tenta o refresh token
+            pass
+        except Exception as e:
+            logger.error(f"`get_user`: Erro ao verificar token JWT\n```Token: {token}\nError: {e}```")
 
     if not refresh_token:
         clear_auth_cookie(response)
@@ -142,8 +162,9 @@ def get_user(request: Request, response: Response, db: Session = Depends(get_db)
             clear_auth_cookie(response)
             return False
 
+        user_cache.set(user)
         session_id = generate_session_id(response)
-        generate_jwt_token(user.id, user.username, session_id, request, response, refresh_token_db.remember, db)
+        generate_jwt_token(user.id, user.username, session_id, request, response, refresh_token_db.remember, db, user.email, user.token_version)
         return {
             'id': user.id,
             'username': user.username,
@@ -163,8 +184,13 @@ def invalidate_all_sessions(user_id: int, session_id: str, keep_current_session:
         query = query.filter(RefreshToken.session_id != session_id)
 
     query.update({'is_active': False})
+    db.query(User).filter(User.id == user_id).update({'token_version': User.token_version + 1})  # Revoga os access tokens já emitidos
     db.commit()
 
+    user = db.query(User).filter(User.id == user_id).first()
+    if user:  # Versão nova no cache deste processo: os tokens revogados param de valer aqui imediatamente
+        user_cache.set(user)
+
 def clear_auth_cookie(response: Response):
     response.set_cookie(
         key='access_token',
@@ -0,0 +1,21 @@
+import uvicorn
+from importlib.util import find_spec
+from uvicorn.importer import import_from_string
+from src.settings import SERVER_HOST, SERVER_PORT, SERVER_WORKERS, SERVER_GRACEFUL_TIMEOUT
+
+APP = 'src.app:app'
+
+def main():
+    import_from_string(APP)  # Falha aqui, antes de subir os workers, se a aplicação não importar
+    uvicorn.run(
+        APP,
+        host=SERVER_HOST,
+        port=SERVER_PORT,
+        workers=SERVER_WORKERS,
+        loop='uvloop' if find_spec('uvloop') else 'asyncio',
+        http='httptools' if find_spec('httptools') else 'h11',
+        timeout_graceful_shutdown=SERVER_GRACEFUL_TIMEOUT
+    )
+
+if __name__ == '__main__':
+    main()
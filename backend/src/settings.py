@@ -1,4 +1,5 @@
 import os
+import tempfile
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -6,7 +7,78 @@ env_path = Path(__file__).parent.parent / '.env'
 load_dotenv(dotenv_path=env_path)
 
 DATABASE_URL = os.getenv("DATABASE_URL")
+DATABASE_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL")  # opcional, réplica usada pelas rotas de leitura
+READ_YOUR_WRITES_SECONDS = int(os.getenv("READ_YOUR_WRITES_SECONDS", 5))  # após uma escrita, o cliente lê do principal por esse tempo
 JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY")
 JWT_EXPIRATION_TIME = int(os.getenv("JWT_EXPIRATION_TIME"))  # em minutos
 WEBHOOK_INFO = os.getenv("WEBHOOK_LOG_INFO")
-WEBHOOK_ERROR = os.getenv("WEBHOOK_LOG_ERROR")
\ No newline at end of file
+WEBHOOK_ERROR = os.getenv("WEBHOOK_LOG_ERROR")
+LINK_CACHE_SIZE = int(os.getenv("LINK_CACHE_SIZE", 10000))  # máximo de links em cache por processo
+LINK_CACHE_TTL = float(os.getenv("LINK_CACHE_TTL", 60))  # em segundos
+LINK_CACHE_NEGATIVE_TTL = float(os.getenv("LINK_CACHE_NEGATIVE_TTL", 30))  # em segundos, para links inexistentes
+LINK_CACHE_MULTI_WORKER_TTL = float(os.getenv("LINK_CACHE_MULTI_WORKER_TTL", 5))  # em segundos, limite dos dois TTLs acima com SERVER_WORKERS > 1
+CLICK_FLUSH_INTERVAL_MS = int(os.getenv("CLICK_FLUSH_INTERVAL_MS", 1000))  # em milissegundos
+CLICK_FLUSH_THRESHOLD = int(os.getenv("CLICK_FLUSH_THRESHOLD", 500))  # cliques pendentes que forçam a gravação
+CLICK_EVENTS_CAPACITY = int(os.getenv("CLICK_EVENTS_CAPACITY", 100000))  # eventos de clique guardados em memória até a agregação
+CLICK_EVENTS_FLUSH_INTERVAL = int(os.getenv("CLICK_EVENTS_FLUSH_INTERVAL", 10))  # em segundos
+CLICK_MINUTE_RETENTION_HOURS = int(os.getenv("CLICK_MINUTE_RETENTION_HOURS", 48))
+CLICK_HOUR_RETENTION_DAYS = int(os.getenv("CLICK_HOUR_RETENTION_DAYS", 90))
+CLICK_DAY_RETENTION_DAYS = int(os.getenv("CLICK_DAY_RETENTION_DAYS", 730))
+TRENDING_CAPACITY = int(os.getenv("TRENDING_CAPACITY", 1000))  # links acompanhados por janela em /stats/trending
+TRENDING_SNAPSHOT_MINUTES = int(os.getenv("TRENDING_SNAPSHOT_MINUTES", 5))  # também o atraso com que cada worker vê os cliques dos outros
+FRONTEND_URL = os.getenv("FRONTEND_URL", "https://encurtar.vercel.app").rstrip('/')
+REDIRECT_CACHE_SECONDS = int(os.getenv("REDIRECT_CACHE_SECONDS", 60))  # max-age dos redirecionamentos em GET /{short_id}
+ACCESS_LOG_FILE = os.getenv("ACCESS_LOG_FILE", "logs/access.log")  # vazio desativa o log de acesso
+ACCESS_LOG_MAX_BYTES = int(os.getenv("ACCESS_LOG_MAX_BYTES", 10 * 1024 * 1024))
+ACCESS_LOG_BACKUP_COUNT = int(os.getenv("ACCESS_LOG_BACKUP_COUNT", 5))
+ACCESS_LOG_QUEUE_SIZE = int(os.getenv("ACCESS_LOG_QUEUE_SIZE", 10000))  # linhas pendentes antes de descartar
+ACCESS_LOG_SAMPLE_RATES = os.getenv("ACCESS_LOG_SAMPLE_RATES", "redirect=0.01,get_url=0.1,click_url=0.1")  # fração registrada por rota (nome da função)
+ACCESS_LOG_DEFAULT_SAMPLE_RATE = float(os.getenv("ACCESS_LOG_DEFAULT_SAMPLE_RATE", 1.0))
+ACCESS_LOG_ERROR_SAMPLE_RATE = float(os.getenv("ACCESS_LOG_ERROR_SAMPLE_RATE", 1.0))  # respostas com status >= 400
+WEBHOOK_QUEUE_SIZE = int(os.getenv("WEBHOOK_QUEUE_SIZE", 1000))  # logs pendentes antes de descartar
+WEBHOOK_BATCH_INTERVAL = float(os.getenv("WEBHOOK_BATCH_INTERVAL", 2))  # em segundos, entre envios ao webhook
+ASYNC_DATABASE = os.getenv("ASYNC_DATABASE", "false").lower() == "true"  # usa o engine assíncrono nas rotas de redirecionamento
+PURGE_INTERVAL_MINUTES = int(os.getenv("PURGE_INTERVAL_MINUTES", 15))  # intervalo da limpeza de links expirados
+PURGE_BATCH_SIZE = int(os.getenv("PURGE_BATCH_SIZE", 500))  # links removidos por transação
+PURGE_BATCH_PAUSE = float(os.getenv("PURGE_BATCH_PAUSE", 0.05))  # em segundos, pausa entre os lotes
+SHORT_ID_ALLOCATOR = os.getenv("SHORT_ID_ALLOCATOR", "random")  # "random" (imprevisível) ou "sequence" (blocos reservados no banco, enumerável)
+SHORT_ID_BLOCK_SIZE = int(os.getenv("SHORT_ID_BLOCK_SIZE", 1000))  # IDs reservados por consulta ao banco
+BULK_MAX_ITEMS = int(os.getenv("BULK_MAX_ITEMS", 1000))  # links por requisição em POST /short/bulk
+BULK_ITEMS_RATE_LIMIT = os.getenv("BULK_ITEMS_RATE_LIMIT", "2000/hour;10000/day")  # links criados em lote por IP
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", 1000))  # linhas lidas do banco por lote em /user/links/export
+
+ARGON2_TIME_COST = int(os.getenv("ARGON2_TIME_COST", 3))  # iterações do argon2
+ARGON2_MEMORY_COST = int(os.getenv("ARGON2_MEMORY_COST", 65536))  # em KiB
+ARGON2_PARALLELISM = int(os.getenv("ARGON2_PARALLELISM", 4))  # threads usadas por hash
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", min(4, os.cpu_count() or 1)))  # processos dedicados ao argon2, 0 executa na própria thread
+HASH_MAX_CONCURRENCY = int(os.getenv("HASH_MAX_CONCURRENCY", 16))  # hashes simultâneos (em execução ou na fila do pool)
+HASH_QUEUE_TIMEOUT = float(os.getenv("HASH_QUEUE_TIMEOUT", 5))  # em segundos, espera por uma vaga antes de responder 503
+HASH_BULK_MAX_CONCURRENCY = int(os.getenv("HASH_BULK_MAX_CONCURRENCY", 4))  # vagas separadas para os hashes de POST /short/bulk
+PASSWORD_CACHE_SIZE = int(os.getenv("PASSWORD_CACHE_SIZE", 10000))  # senhas de links verificadas mantidas por processo
+PASSWORD_CACHE_TTL = float(os.getenv("PASSWORD_CACHE_TTL", 300))  # em segundos
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", 1000))  # usuários mantidos em memória por processo
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", 30))  # em segundos; também é o atraso máximo da revogação de tokens nos outros workers
+RATE_LIMIT_STORAGE_URI = os.getenv("RATE_LIMIT_STORAGE_URI", "memory://")  # memory://, sqlite:///ratelimit.db (vários workers no mesmo host) ou redis://host:6379 (extra redis)
+RATE_LIMIT_STRATEGY = os.getenv("RATE_LIMIT_STRATEGY", "sliding-window-counter")  # dois contadores por chave, memória constante
+RATE_LIMIT_COMPACT_INTERVAL = float(os.getenv("RATE_LIMIT_COMPACT_INTERVAL", 60))  # em segundos, remoção dos contadores expirados no SQLite
+SERVER_HOST = os.getenv("SERVER_HOST", "0.0.0.0")
+SERVER_PORT = int(os.getenv("SERVER_PORT", 80))
+SERVER_WORKERS = int(os.getenv("SERVER_WORKERS", 1))  # processos do uvicorn; os caches em memória são por processo
+SERVER_GRACEFUL_TIMEOUT = int(os.getenv("SERVER_GRACEFUL_TIMEOUT", 30))  # em segundos, espera pelas requisições em andamento ao encerrar
+SCHEDULER_LOCK_FILE = os.getenv("SCHEDULER_LOCK_FILE", str(Path(tempfile.gettempdir()) / "shorturl-scheduler.lock"))  # só o worker que segura o lock executa as tarefas agendadas
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")  # leitores não bloqueiam o escritor
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")  # com WAL, fsync só nos checkpoints
+SQLITE_MMAP_SIZE = os.getenv("SQLITE_MMAP_SIZE", "268435456")  # em bytes
+SQLITE_CACHE_SIZE = os.getenv("SQLITE_CACHE_SIZE", "-65536")  # negativo = em KiB, por conexão
+SQLITE_BUSY_TIMEOUT = os.getenv("SQLITE_BUSY_TIMEOUT", "5000")  # em milissegundos, espera pelo lock de escrita
+SQLITE_TEMP_STORE = os.getenv("SQLITE_TEMP_STORE", "MEMORY")
+SQLITE_CHECKPOINT_MINUTES = int(os.getenv("SQLITE_CHECKPOINT_MINUTES", 10))  # intervalo do checkpoint do WAL, 0 desativa
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")  # exigido em GET /metrics como "Authorization: Bearer <token>"; vazio desliga o endpoint
+PROFILING_TOKEN = os.getenv("PROFILING_TOKEN", "")  # header X-Profile e rotas /api/profiling; vazio desativa
+PROFILING_DIR = os.getenv("PROFILING_DIR", "profiles")
+PROFILING_SAMPLE_RATE = float(os.getenv("PROFILING_SAMPLE_RATE", 0.0))  # fração das requisições perfiladas sem o header
+PROFILING_REQUEST_INTERVAL_MS = float(os.getenv("PROFILING_REQUEST_INTERVAL_MS", 1))
+PROFILING_MAX_FILES = int(os.getenv("PROFILING_MAX_FILES", 100))
+PROFILING_CONTINUOUS = os.getenv("PROFILING_CONTINUOUS", "false").lower() == "true"
+PROFILING_CONTINUOUS_INTERVAL_MS = float(os.getenv("PROFILING_CONTINUOUS_INTERVAL_MS", 50))
+PROFILING_CONTINUOUS_FLUSH_SECONDS = float(os.getenv("PROFILING_CONTINUOUS_FLUSH_SECONDS", 60))
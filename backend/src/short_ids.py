@@ -0,0 +1,87 @@
+import secrets
+import string
+import threading
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from src.db.models import ShortIdSequence
+from src.settings import SHORT_ID_ALLOCATOR, SHORT_ID_BLOCK_SIZE
+
+BASE62 = string.digits + string.ascii_letters
+SHORT_ID_LENGTH = 8
+ID_SPACE = len(BASE62) ** SHORT_ID_LENGTH
+
+# Permutação bijetora do contador (62^8 = 2^8 * 31^8, então o multiplicador não pode ser par nem múltiplo de 31).
+# Só evita que links gerados em sequência fiquem parecidos: as constantes estão no código e a função é invertível,
+# então os IDs NÃO são secretos. Para IDs imprevisíveis use SHORT_ID_ALLOCATOR="random". NÃO altere depois de ir para produção.
+PERMUTATION_MULTIPLIER = 160_481_183_551
+PERMUTATION_OFFSET = 91_527_410_302_977
+
+def encode_base62(value: int, length: int = SHORT_ID_LENGTH) -> str:
+    chars = []
+    for _ in range(length):
+        value, remainder = divmod(value, len(BASE62))
+        chars.append(BASE62[remainder])
+    return ''.join(reversed(chars))
+
+def permute(value: int) -> int:
+    return (value * PERMUTATION_MULTIPLIER + PERMUTATION_OFFSET) % ID_SPACE
+
+class SequenceAllocator:
+    sequence_name = 'links'
+
+    def __init__(self, block_size: int):
+        self.block_size = block_size
+        self._next = 0
+        self._end = 0
+        self._lock = threading.Lock()
+
+    def allocate(self, db: Session) -> str:
+        return self.allocate_many(db, 1)[0]
+
+    def allocate_many(self, db: Session, count: int) -> list[str]:
+        with self._lock:
+            values = list(range(self._next, min(self._next + count, self._end)))
+            if len(values) < count:  # Reserva de uma vez tudo o que falta para o lote
+                size = max(self.block_size, count - len(values))
+                self._next = self._lease(db, size)
+                self._end = self._next + size
+                missing = count - len(values)
+                values += range(self._next, self._next + missing)
+                self._next += missing
+            else:
+                self._next += count
+
+        return [encode_base62(permute(value)) for value in values]
+
+    def _lease(self, db: Session, size: int) -> int:
+        # Reserva um bloco inteiro numa transação própria; o UPDATE atômico garante blocos distintos entre processos
+        sequence = ShortIdSequence.__table__
+        while True:
+            with db.get_bind().connect() as conn:
+                conn.execute(update(sequence).where(sequence.c.name == self.sequence_name).values(next_value=sequence.c.next_value + size))
+                end = conn.execute(select(sequence.c.next_value).where(sequence.c.name == self.sequence_name)).scalar()
+                if end is not None:
+                    conn.commit()
+                    return end - size
+
+                try:
+                    conn.execute(insert(sequence).values(name=self.sequence_name, next_value=size))
+                    conn.commit()
+                    return 0
+                except IntegrityError:  # Outro processo criou a sequência ao mesmo tempo
+                    conn.rollback()
+
+class RandomAllocator:
+    def allocate(self, db: Session) -> str:
+        return encode_base62(secrets.randbelow(ID_SPACE))
+
+    def allocate_many(self, db: Session, count: int) -> list[str]:
+        return [self.allocate(db) for _ in range(count)]
+
+def get_allocator(name: str):
+    if name == 'sequence':  # Opcional: troca a privacidade dos IDs por nenhuma colisão
+        return SequenceAllocator(SHORT_ID_BLOCK_SIZE)
+    return RandomAllocator()
+
+short_id_allocator = get_allocator(SHORT_ID_ALLOCATOR)
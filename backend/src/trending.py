@@ -0,0 +1,206 @@
+import heapq
+import math
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import Session
+from src.db.database import SessionLocal
+from src.db.models import TrendingSnapshot
+from src.logger import logger
+from src.settings import TRENDING_CAPACITY, TRENDING_SNAPSHOT_MINUTES
+
+# Janela -> constante de tempo do decaimento exponencial (em segundos)
+TRENDING_WINDOWS = {'5m': 300, '1h': 3600, '24h': 86400}
+
+class DecayedSpaceSaving:
+    # Space-Saving com decaimento exponencial: guarda no máximo `capacity` contadores e, quando cheio,
+    # o link novo herda o contador do menor (o valor herdado fica como erro máximo da estimativa)
+    # Forward decay: os pesos crescem com exp((t - landmark) / tau) em vez de decair todos os contadores a cada clique
+    def __init__(self, capacity: int, tau: float, now: float | None = None):
+        self.capacity = capacity
+        self.tau = tau
+        self.landmark = now if now is not None else time.time()
+        self._counters: dict[str, list[float]] = {}  # short_url -> [contador, erro]
+        self._heap: list[tuple[float, str]] = []  # Contadores antigos são ignorados ao retirar o menor
+
+    def add(self, key: str, weight: float = 1.0, error: float = 0.0, now: float | None = None):
+        now = now if now is not None else time.time()
+        if (now - self.landmark) / self.tau > 50:  # Evita overflow: traz os contadores para um landmark novo
+            self._rescale(now)
+        weight *= math.exp((now - self.landmark) / self.tau)
+        error *= math.exp((now - self.landmark) / self.tau)
+
+        counter = self._counters.get(key)
+        if counter is None:
+            if len(self._counters) >= self.capacity:
+                _, count = self._pop_min()
+                weight += count
+                error += count
+            counter = self._counters[key] = [0.0, error]
+        counter[0] += weight
+        heapq.heappush(self._heap, (counter[0], key))
+        if len(self._heap) > 4 * self.capacity:
+            self._rebuild_heap()
+
+    def discard(self, key: str):
+        self._counters.pop(key, None)
+
+    def top(self, k: int, now: float | None = None) -> list[tuple[str, float, float]]:
+        scale = math.exp(-((now if now is not None else time.time()) - self.landmark) / self.tau)
+        return [(key, count * scale, error * scale) for key, (count, error) in heapq.nlargest(k, self._counters.items(), key=lambda item: item[1][0])]
+
+    def items(self, now: float | None = None) -> list[tuple[str, float, float]]:
+        return self.top(len(self._counters), now)
+
+    def __len__(self) -> int:
+        return len(self._counters)
+
+    def _pop_min(self) -> tuple[str, float]:
+        while True:
+            count, key = heapq.heappop(self._heap)
+            counter = self._counters.get(key)
+            if counter is not None and counter[0] == count:
+                del self._counters[key]
+                return key, count
+
+    def _rescale(self, now: float):
+        scale = math.exp(-(now - self.landmark) / self.tau)
+        for counter in self._counters.values():
+            counter[0] *= scale
+            counter[1] *= scale
+        self.landmark = now
+        self._rebuild_heap()
+
+    def _rebuild_heap(self):
+        self._heap = [(counter[0], key) for key, counter in self._counters.items()]
+        heapq.heapify(self._heap)
+
+class TrendingLinks:
+    # Cada worker conta só os cliques que recebe: salva as próprias linhas e soma as dos outros na leitura
+    def __init__(self, session_factory, capacity: int, worker: str | None = None, stale_after: float = 900):
+        self.session_factory = session_factory
+        self.capacity = capacity
+        self.worker = worker or f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+        self.stale_after = stale_after  # Linhas de um worker sem snapshot há mais tempo que isso são de um processo morto
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            self._sketches = {window: DecayedSpaceSaving(self.capacity, tau) for window, tau in TRENDING_WINDOWS.items()}
+            self._peers: dict[str, list[tuple[str, float, float]]] = {window: [] for window in TRENDING_WINDOWS}  # short_url, score, taken_at
+
+    def add(self, short_url: str):
+        now = time.time()
+        with self._lock:
+            for sketch in self._sketches.values():
+                sketch.add(short_url, now=now)
+
+    def discard(self, *short_urls: str):
+        removed = set(short_urls)
+        with self._lock:
+            for sketch in self._sketches.values():
+                for short_url in short_urls:
+                    sketch.discard(short_url)
+            for window, rows in self._peers.items():
+                self._peers[window] = [row for row in rows if row[0] not in removed]
+
+    def top(self, window: str, k: int) -> list[dict]:
+        now = time.time()
+        tau = TRENDING_WINDOWS[window]
+        with self._lock:
+            scores = {short_url: score for short_url, score, _ in self._sketches[window].items(now)}
+            for short_url, score, taken_at in self._peers[window]:
+                scores[short_url] = scores.get(short_url, 0.0) + score * math.exp(-(now - taken_at) / tau)
+        top = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+        return [{'short_url': short_url, 'score': round(score, 2)} for short_url, score in top]
+
+    def snapshot(self, db: Session | None = None) -> int:
+        session: Session = db or self.session_factory()
+        now = time.time()
+        with self._lock:
+            rows = [
+                {'worker': self.worker, 'period': window, 'short_url': short_url, 'score': score, 'error': error}
+                for window, sketch in self._sketches.items() for short_url, score, error in sketch.items(now)
+            ]
+
+        try:
+            taken_at = datetime.fromtimestamp(now, timezone.utc).replace(tzinfo=None)
+            session.execute(delete(TrendingSnapshot).where(TrendingSnapshot.worker == self.worker))
+            if rows:
+                session.execute(insert(TrendingSnapshot), [{**row, 'taken_at': taken_at} for row in rows])
+            session.commit()
+            self._load_peers(session)  # Aproveita a sessão para trazer os contadores mais recentes dos outros workers
+        except Exception as e:
+            session.rollback()
+            logger.error(f"`TrendingLinks.snapshot`: Erro ao salvar os links em alta\n```{e}```")
+            return 0
+        finally:
+            if db is None:
+                session.close()
+
+        return len(rows)
+
+    def restore(self, db: Session | None = None) -> int:
+        # Ao iniciar, os contadores salvos antes do restart entram como os de outro worker até serem adotados
+        session: Session = db or self.session_factory()
+        try:
+            return self._load_peers(session)
+        except Exception as e:
+            logger.error(f"`TrendingLinks.restore`: Erro ao carregar os links em alta\n```{e}```")
+            return 0
+        finally:
+            if db is None:
+                session.close()
+
+    def adopt_stale(self, db: Session | None = None) -> int:
+        # Só o líder roda: incorpora ao próprio sketch as linhas de workers que pararam de salvar
+        session: Session = db or self.session_factory()
+        now = time.time()
+        cutoff = now - self.stale_after
+        stale = (TrendingSnapshot.worker != self.worker) & (TrendingSnapshot.taken_at < datetime.fromtimestamp(cutoff, timezone.utc).replace(tzinfo=None))
+        try:
+            rows = session.execute(select(TrendingSnapshot.period, TrendingSnapshot.short_url, TrendingSnapshot.score, TrendingSnapshot.error, TrendingSnapshot.taken_at).where(stale)).all()
+            if rows:
+                session.execute(delete(TrendingSnapshot).where(stale))
+                session.commit()
+        except Exception as e:
+            session.rollback()
+            logger.error(f"`TrendingLinks.adopt_stale`: Erro ao adotar os links em alta de workers parados\n```{e}```")
+            return 0
+        finally:
+            if db is None:
+                session.close()
+
+        with self._lock:
+            for period, short_url, score, error, taken_at in rows:
+                sketch = self._sketches.get(period)
+                if sketch is None:
+                    continue
+                # Aplica o decaimento do tempo desde o último snapshot do worker
+                scale = math.exp(-(now - taken_at.replace(tzinfo=timezone.utc).timestamp()) / sketch.tau)
+                sketch.add(short_url, score * scale, error * scale, now=now)
+            if rows:
+                for window, peers in self._peers.items():
+                    self._peers[window] = [row for row in peers if row[2] >= cutoff]
+
+        return len(rows)
+
+    def _load_peers(self, session: Session) -> int:
+        rows = session.execute(
+            select(TrendingSnapshot.period, TrendingSnapshot.short_url, TrendingSnapshot.score, TrendingSnapshot.taken_at)
+            .where(TrendingSnapshot.worker != self.worker)
+        ).all()
+        peers = {window: [] for window in TRENDING_WINDOWS}
+        for period, short_url, score, taken_at in rows:
+            if period in peers:
+                peers[period].append((short_url, score, taken_at.replace(tzinfo=timezone.utc).timestamp()))
+        with self._lock:
+            self._peers = peers
+        return len(rows)
+
+trending_links = TrendingLinks(SessionLocal, TRENDING_CAPACITY, stale_after=3 * TRENDING_SNAPSHOT_MINUTES * 60)
@@ -1,9 +1,14 @@
+import base64
+import json
 import re
-import string
-from random import choices
-from fastapi import Request
-from src.db.models import Link
+from fastapi import Request, Response
+from fastapi.responses import ORJSONResponse
+from limits import parse_many
 from slowapi import Limiter
+from src.short_ids import short_id_allocator
+from src.rate_limit import TimedRateLimiter
+from src.metrics import metrics
+from src.settings import RATE_LIMIT_STORAGE_URI, RATE_LIMIT_STRATEGY, RATE_LIMIT_COMPACT_INTERVAL
 
 def get_user_ip(request: Request) -> str | None:
     forwarded_for = request.headers.get('X-Forwarded-For')
@@ -14,7 +19,37 @@ def get_user_ip(request: Request) -> str | None:
 def get_user_agent(request: Request) -> str:
     return request.headers.get('User-Agent', 'Unknown')
 
-limiter = Limiter(key_func=get_user_ip)
+limiter = Limiter(
+    key_func=get_user_ip,
+    storage_uri=RATE_LIMIT_STORAGE_URI,
+    strategy=RATE_LIMIT_STRATEGY,
+    storage_options={'compact_interval': RATE_LIMIT_COMPACT_INTERVAL} if RATE_LIMIT_STORAGE_URI.startswith('sqlite://') else {},
+    in_memory_fallback_enabled=not RATE_LIMIT_STORAGE_URI.startswith('memory://')  # Se o storage compartilhado cair, limita por processo
+)
+limiter._limiter = TimedRateLimiter(limiter._limiter)
+
+def hit_cost_limit(limit_value: str, scope: str, request: Request, cost: int) -> bool:
+    # Consome `cost` unidades de uma vez (ex: quantidade de links de uma requisição em lote)
+    key = get_user_ip(request)
+    if not key or not limiter.enabled:
+        return True
+
+    items = parse_many(limit_value)
+    if not all(limiter.limiter.test(item, key, scope, cost=cost) for item in items):
+        metrics.count_rate_limited(request.scope)
+        return False
+
+    for item in items:
+        limiter.limiter.hit(item, key, scope, cost=cost)
+    return True
+
+def json_response(content, response: Response | None = None) -> Response:
+    # Dados vindos do banco já foram validados na criação: serializa direto, sem passar pelo response_model
+    # Retornar uma Response descarta os cookies/headers do parâmetro `response`, então eles são copiados
+    result = Response(content, media_type='application/json') if isinstance(content, bytes) else ORJSONResponse(content)
+    if response is not None:
+        result.headers.raw.extend(response.headers.raw)
+    return result
 
 def validate_short_url(short_url: str | None, db = None, auto_generate = True):
     if not short_url or short_url.strip() == "":
@@ -23,7 +58,7 @@ def validate_short_url(short_url: str | None, db = None, auto_generate = True):
         else:
             return False
 
-    blacklist = ['links', 'auth', 'perfil', 'api', 'admin']
+    blacklist = ['links', 'auth', 'perfil', 'api', 'admin', 'metrics', 'trending', 'profiling']
     if short_url in blacklist:
         return False
 
@@ -32,14 +67,18 @@ def validate_short_url(short_url: str | None, db = None, auto_generate = True):
 
     return short_url
 
-def generate_short_url(db):
-    chars = string.ascii_letters + string.digits
-    while True:
-        short_url = ''.join(choices(chars, k=8))
+def encode_cursor(values: list) -> str:
+    return base64.urlsafe_b64encode(json.dumps(values, separators=(',', ':')).encode()).decode().rstrip('=')
+
+def decode_cursor(cursor: str) -> list | None:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except ValueError:
+        return None
+    return values if isinstance(values, list) else None
 
-        if not db.query(Link).filter(Link.short_url == short_url).first():
-            db.close()
-            return short_url
+def generate_short_url(db):
+    return short_id_allocator.allocate(db)
 
 def validate_username(username: str) -> bool:
     if len(username) < 3 or len(username) > 16:
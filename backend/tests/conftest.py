@@ -1,29 +1,85 @@
+from contextlib import asynccontextmanager
 from pytest import fixture
 from fastapi import Response, Request
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
-from sqlalchemy.pool import StaticPool
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool, StaticPool
+from sqlalchemy.orm import Session, sessionmaker
 from src.app import app
 from src.db.models import table_registry
-from src.db.database import get_db
+from src.db.database import get_db, get_write_db, get_read_db, get_async_db, get_async_read_db, get_async_sessionmaker, get_async_read_sessionmaker, get_async_url
 from src.db.models import Link, User
 from src.security import generate_password_hash, generate_jwt_token, generate_session_id
 from unittest.mock import MagicMock
 from src.logger import logger
+from src.cache import link_cache, password_cache, user_cache
+from src.clicks import click_buffer
+from src.analytics import click_events
+from src.trending import trending_links
+from src.hashing import password_hasher
+from src.access_log import access_log
 
 logger.remove()
+password_hasher.workers = 0  # Evita subir um pool de processos a cada teste
+access_log.path = None  # Sem arquivo de log de acesso nos testes
+
+@fixture(autouse=True)
+def clear_link_cache():
+    link_cache.clear()
+    password_cache.clear()
+    user_cache.clear()
+    trending_links.clear()
+    yield
+    link_cache.clear()
+    password_cache.clear()
+    user_cache.clear()
+    trending_links.clear()
 
 @fixture()
 def client(db_session: Session):
     def get_db_override():
         return db_session
 
+    @asynccontextmanager
+    async def open_db_session():
+        yield db_session
+
+    session_factory = click_buffer.session_factory
+    click_buffer.session_factory = click_events.session_factory = trending_links.session_factory = sessionmaker(bind=db_session.get_bind())
     with TestClient(app) as client:
-        app.dependency_overrides[get_db] = get_db_override
+        for dependency in (get_db, get_write_db, get_read_db, get_async_db, get_async_read_db):
+            app.dependency_overrides[dependency] = get_db_override
+        for dependency in (get_async_sessionmaker, get_async_read_sessionmaker):
+            app.dependency_overrides[dependency] = lambda: open_db_session
+        yield client
+
+    app.dependency_overrides.clear()
+    click_buffer.session_factory = click_events.session_factory = trending_links.session_factory = session_factory
+
+@fixture()
+def async_client(tmp_path):
+    database_url = f"sqlite:///{tmp_path / 'db.sqlite3'}"
+    engine = create_engine(database_url)
+    table_registry.metadata.create_all(engine)
+    AsyncTestSession = async_sessionmaker(create_async_engine(get_async_url(database_url), poolclass=NullPool), expire_on_commit=False)
+
+    async def get_async_db_override():
+        async with AsyncTestSession() as db:
+            yield db
+
+    session_factory = click_buffer.session_factory
+    click_buffer.session_factory = click_events.session_factory = trending_links.session_factory = sessionmaker(bind=engine)
+    with TestClient(app) as client, Session(engine) as db_session:
+        app.dependency_overrides[get_async_db] = get_async_db_override
+        app.dependency_overrides[get_async_read_db] = get_async_db_override
+        app.dependency_overrides[get_async_sessionmaker] = app.dependency_overrides[get_async_read_sessionmaker] = lambda: AsyncTestSession
+        client.db_session = db_session
         yield client
 
     app.dependency_overrides.clear()
+    click_buffer.session_factory = click_events.session_factory = trending_links.session_factory = session_factory
+    engine.dispose()
 
 @fixture()
 def client_with_invalid_user(client):
@@ -92,7 +148,7 @@ def user(db_session: Session, request_mock: Request):
     db_session.refresh(user)
 
     user.session_id = generate_session_id(Response())
-    jwt = generate_jwt_token(user.id, user.username, user.session_id, request_mock, Response(), False, db_session)
+    jwt = generate_jwt_token(user.id, user.username, user.session_id, request_mock, Response(), False, db_session, user.email, user.token_version)
 
     user.clean_password = clean_password
     user.token_jwt = jwt['access_token']
@@ -0,0 +1,115 @@
+import orjson
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+from pytest import fixture
+from src.access_log import AccessLogWriter, AccessLogMiddleware, access_log, parse_sample_rates
+
+def read_lines(path) -> list[dict]:
+    return [orjson.loads(line) for line in path.read_text().splitlines()]
+
+@fixture()
+def writer(tmp_path):
+    writer = AccessLogWriter(str(tmp_path / 'logs' / 'access.log'), 1024 * 1024, 2, 100)
+    writer.start()
+    yield writer
+    writer.stop()
+
+def make_app(writer: AccessLogWriter, sample_rates: dict[str, float], default_rate: float = 1.0) -> FastAPI:
+    app = FastAPI()
+
+    @app.get('/hot')
+    async def hot():
+        return {'ok': True}
+
+    @app.get('/fail')
+    async def fail():
+        raise HTTPException(status_code=404, detail='Not found')
+
+    app.add_middleware(AccessLogMiddleware, writer=writer, sample_rates=sample_rates, default_rate=default_rate, error_rate=1.0)
+    return app
+
+def test_parse_sample_rates():
+    assert parse_sample_rates('redirect=0.01, get_url = 0.5,,invalido') == {'redirect': 0.01, 'get_url': 0.5}
+    assert parse_sample_rates('') == {}
+
+def test_writer_writes_lines(writer, tmp_path):
+    writer.enqueue(b'{"a":1}')
+    writer.enqueue(b'{"a":2}')
+    writer.stop()
+
+    assert read_lines(tmp_path / 'logs' / 'access.log') == [{'a': 1}, {'a': 2}]
+    assert writer.stats() == {'queued': 0, 'written': 2, 'dropped': 0}
+
+def test_writer_rotates(tmp_path):
+    writer = AccessLogWriter(str(tmp_path / 'access.log'), 100, 2, 100)
+    writer.start()
+    for i in range(20):
+        writer.enqueue(orjson.dumps({'line': i, 'padding': 'x' * 20}))
+    writer.stop()
+
+    assert (tmp_path / 'access.log.1').exists()
+    assert (tmp_path / 'access.log.2').exists()
+    assert not (tmp_path / 'access.log.3').exists()
+
+def test_writer_drops_when_full(tmp_path):
+    writer = AccessLogWriter(str(tmp_path / 'access.log'), 1024, 1, 2)  # Sem start: nada consome a fila
+    for _ in range(5):
+        writer.enqueue(b'{}')
+
+    assert writer.stats() == {'queued': 2, 'written': 0, 'dropped': 3}
+
+def test_writer_disabled():
+    writer = AccessLogWriter(None, 1024, 1, 10)
+    writer.start()
+    writer.enqueue(b'{}')
+    writer.stop()
+
+    assert writer.stats() == {'queued': 0, 'written': 0, 'dropped': 0}
+
+def test_middleware_line(writer, tmp_path):
+    client = TestClient(make_app(writer, {}))
+    client.get('/hot?q=1', headers={'User-Agent': 'pytest', 'Referer': 'https://google.com/', 'X-Forwarded-For': '1.2.3.4, 10.0.0.1'})
+    writer.stop()
+
+    [line] = read_lines(tmp_path / 'logs' / 'access.log')
+    assert line['method'] == 'GET'
+    assert line['path'] == '/hot'
+    assert line['route'] == 'hot'
+    assert line['status'] == 200
+    assert line['duration_ms'] >= 0
+    assert line['ip'] == '1.2.3.4'
+    assert line['user_agent'] == 'pytest'
+    assert line['referer'] == 'https://google.com/'
+    assert line['sample_rate'] == 1.0
+
+def test_middleware_samples_success_but_keeps_errors(writer, tmp_path):
+    client = TestClient(make_app(writer, {'hot': 0.0}))
+    for _ in range(10):
+        client.get('/hot')
+    client.get('/fail')
+    client.get('/naoexiste')
+    writer.stop()
+
+    lines = read_lines(tmp_path / 'logs' / 'access.log')
+    assert [(line['route'], line['status']) for line in lines] == [('fail', 404), (None, 404)]
+
+def test_middleware_disabled_writer():
+    writer = AccessLogWriter(None, 1024, 1, 10)
+    client = TestClient(make_app(writer, {}))
+
+    assert client.get('/hot').status_code == 200
+    assert writer.stats()['written'] == 0
+
+def test_app_access_log(client, simple_url, tmp_path):
+    access_log.path = str(tmp_path / 'access.log')
+    access_log.start()
+    try:
+        client.get(f'/api/stats/{simple_url.short_url}')
+    finally:
+        access_log.stop()
+        access_log.path = None
+
+    [line] = read_lines(tmp_path / 'access.log')
+    assert line['route'] == 'get_stats'
+    assert line['path'] == f'/api/stats/{simple_url.short_url}'
+    assert line['status'] == 200
@@ -0,0 +1,109 @@
+from datetime import datetime, timedelta, timezone
+from sqlalchemy.orm import sessionmaker
+from src.analytics import ClickEvents, classify_referrer, classify_device, purge_click_buckets, truncate_to_bucket, load_unique_visitors, load_visitor_summary, REFERRERS, DEVICES
+from src.db.models import ClickBucket, LinkVisitorBucket
+from src.hll import HyperLogLog
+
+# 2026-10-18 15:42:10 UTC
+TIMESTAMP = datetime(2026, 10, 18, 15, 42, 10, tzinfo=timezone.utc).timestamp()
+
+def test_classify_referrer():
+    assert REFERRERS[classify_referrer(None)] == 'direct'
+    assert REFERRERS[classify_referrer('https://www.google.com/search?q=encurtar')] == 'search'
+    assert REFERRERS[classify_referrer('https://t.co/abc')] == 'social'
+    assert REFERRERS[classify_referrer('https://m.facebook.com/')] == 'social'
+    assert REFERRERS[classify_referrer('https://example.com/')] == 'other'
+
+def test_classify_device():
+    assert DEVICES[classify_device('Mozilla/5.0 (iPhone; CPU iPhone OS 17_0 like Mac OS X) Mobile/15E148')] == 'mobile'
+    assert DEVICES[classify_device('Mozilla/5.0 (compatible; Googlebot/2.1)')] == 'bot'
+    assert DEVICES[classify_device('Mozilla/5.0 (Windows NT 10.0; Win64; x64)')] == 'desktop'
+    assert DEVICES[classify_device(None)] == 'other'
+
+def test_truncate_to_bucket():
+    value = datetime(2026, 10, 18, 15, 42, 10)
+
+    assert truncate_to_bucket(value, 'minute') == datetime(2026, 10, 18, 15, 42)
+    assert truncate_to_bucket(value, 'hour', ceil=True) == datetime(2026, 10, 18, 16)
+    assert truncate_to_bucket(datetime(2026, 10, 18, 16), 'hour', ceil=True) == datetime(2026, 10, 18, 16)
+    assert truncate_to_bucket(datetime(2026, 10, 18, 12, tzinfo=timezone(timedelta(hours=-3))), 'day') == datetime(2026, 10, 18)
+
+def test_click_events_rolls_up_into_buckets(db_session, simple_url):
+    events = ClickEvents(sessionmaker(bind=db_session.get_bind()), capacity=100, flush_interval=60)
+    events.add(simple_url.id, 'https://www.google.com/', 'Mozilla/5.0 (Windows NT 10.0)', 'BR', timestamp=TIMESTAMP)
+    events.add(simple_url.id, None, 'Mozilla/5.0 (Windows NT 10.0)', 'BR', timestamp=TIMESTAMP + 60)
+    events.add(simple_url.id, None, 'Mozilla/5.0 (Windows NT 10.0)', 'BR', timestamp=TIMESTAMP + 61)
+
+    assert events.flush(db_session) == 3
+    assert events.pending() == 0
+
+    buckets = {(bucket.resolution, bucket.bucket_start, bucket.referrer): bucket.clicks for bucket in db_session.query(ClickBucket).all()}
+    assert buckets[('minute', datetime(2026, 10, 18, 15, 42), 'search')] == 1
+    assert buckets[('minute', datetime(2026, 10, 18, 15, 43), 'direct')] == 2
+    assert buckets[('hour', datetime(2026, 10, 18, 15), 'direct')] == 2
+    assert buckets[('day', datetime(2026, 10, 18), 'search')] == 1
+
+def test_click_events_adds_to_existing_buckets(db_session, simple_url):
+    events = ClickEvents(sessionmaker(bind=db_session.get_bind()), capacity=100, flush_interval=60)
+    for _ in range(2):
+        events.add(simple_url.id, timestamp=TIMESTAMP)
+        events.flush(db_session)
+
+    bucket = db_session.query(ClickBucket).filter(ClickBucket.resolution == 'day').one()
+    assert bucket.clicks == 2
+
+def test_click_events_merges_unique_visitors(db_session, simple_url):
+    session_factory = sessionmaker(bind=db_session.get_bind())
+    first_worker = ClickEvents(session_factory, capacity=100, flush_interval=60)
+    second_worker = ClickEvents(session_factory, capacity=100, flush_interval=60)
+    for _ in range(5):
+        first_worker.add(simple_url.id, user_agent='Mozilla/5.0', ip='127.0.0.1', timestamp=TIMESTAMP)
+    first_worker.add(simple_url.id, user_agent='Mozilla/5.0', ip='10.0.0.1', timestamp=TIMESTAMP)
+    second_worker.add(simple_url.id, user_agent='Mozilla/5.0', ip='127.0.0.1', timestamp=TIMESTAMP + 86400)
+    second_worker.add(simple_url.id, user_agent='curl/8.0', ip='127.0.0.1', timestamp=TIMESTAMP + 86400)
+
+    first_worker.flush(db_session)
+    second_worker.flush(db_session)
+
+    assert load_unique_visitors(db_session, simple_url.id) == 3
+
+def test_load_unique_visitors_without_clicks(db_session, simple_url):
+    assert load_unique_visitors(db_session, simple_url.id) == 0
+
+def test_load_visitor_summary(db_session, simple_url):
+    now = datetime.now(timezone.utc)
+    events = ClickEvents(sessionmaker(bind=db_session.get_bind()), capacity=100, flush_interval=60)
+    for ip, age in (('127.0.0.1', timedelta(minutes=5)), ('10.0.0.1', timedelta(days=2)), ('10.0.0.2', timedelta(days=10))):
+        events.add(simple_url.id, ip=ip, timestamp=(now - age).timestamp())
+    events.add(simple_url.id, ip='127.0.0.1', timestamp=(now - timedelta(days=3)).timestamp())
+    events.flush(db_session)
+
+    assert load_visitor_summary(db_session, simple_url.id) == {'unique_visitors': 3, 'unique_visitors_24h': 1, 'unique_visitors_7d': 2}
+    assert db_session.query(LinkVisitorBucket).count() == 3  # O clique de 10 dias atrás só entra no total
+
+def test_click_events_ring_buffer_drops_oldest():
+    events = ClickEvents(None, capacity=2, flush_interval=60)
+    for link_id in range(3):
+        events.add(link_id, timestamp=TIMESTAMP)
+
+    assert events.pending() == 2
+    assert events.dropped == 1
+    assert [row['link_id'] for row in events.aggregate(events._events) if row['resolution'] == 'day'] == [1, 2]
+
+def test_purge_click_buckets(db_session, simple_url):
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    for resolution, age in (('minute', timedelta(days=3)), ('minute', timedelta(hours=1)), ('hour', timedelta(days=3))):
+        db_session.add(ClickBucket(link_id=simple_url.id, resolution=resolution, bucket_start=now - age, referrer='direct', device='desktop', country='??', clicks=1))
+    db_session.commit()
+
+    assert purge_click_buckets(db_session) == 1
+    assert db_session.query(ClickBucket).count() == 2
+
+def test_purge_click_buckets_removes_old_sketches(db_session, simple_url):
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    for age in (timedelta(days=9), timedelta(days=7), timedelta(days=1)):
+        db_session.add(LinkVisitorBucket(link_id=simple_url.id, bucket_start=now - age, sketch=HyperLogLog().to_bytes()))
+    db_session.commit()
+
+    assert purge_click_buckets(db_session) == 1
+    assert sorted(now - row.bucket_start for row in db_session.query(LinkVisitorBucket)) == [timedelta(days=1), timedelta(days=7)]
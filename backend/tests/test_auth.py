@@ -1,4 +1,5 @@
 from src.db.models import RefreshToken, User
+from src.security import decode_jwt_token
 
 def test_login_non_existent_user(client):
     response = client.post('/api/auth/login', json={'email': 'email@test.com', 'password': 'test_password'})
@@ -158,6 +159,14 @@ def test_update_email_success(logged_client, user, db_session):
     user_db = db_session.query(User).filter(User.id == user.id).first()
     assert user_db.email == 'new@email.com'
 
+def test_update_email_reissues_access_token(logged_client, user, db_session):
+    response = logged_client.patch('/api/auth/me/email', json={'email': 'new@email.com'})
+
+    claims = decode_jwt_token(response.cookies['access_token'])
+    assert claims['email'] == 'new@email.com'
+    assert claims['ver'] == 1
+    assert decode_jwt_token(user.token_jwt)['ver'] == 0
+
 def test_update_password_with_invalid_user(client_with_invalid_user):
     response = client_with_invalid_user.patch('/api/auth/me/password', json={'password': 'newpassword1'})
 
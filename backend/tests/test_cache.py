@@ -0,0 +1,105 @@
+from datetime import datetime
+from src.cache import LinkCache, PasswordCache, CachedLink, MISS, link_cache_ttls
+from src.db.models import Link
+from src.schemas import LinkPublicSchema
+
+def make_link(short_url: str) -> CachedLink:
+    link = Link(original_url='https://www.google.com/', short_url=short_url, user_id=None)
+    link.id = 1
+    link.created_at = None
+    return CachedLink.from_model(link)
+
+def test_cache_miss_and_hit():
+    cache = LinkCache(max_size=10, ttl=60, negative_ttl=60)
+
+    assert cache.get('abcde') is MISS
+    cache.set('abcde', make_link('abcde'))
+
+    assert cache.get('abcde').short_url == 'abcde'
+    assert cache.stats()['hits'] == 1
+    assert cache.stats()['misses'] == 1
+
+def test_cache_negative_entry():
+    cache = LinkCache(max_size=10, ttl=60, negative_ttl=60)
+    cache.set('abcde', None)
+
+    assert cache.get('abcde') is None
+    assert cache.stats()['negative_hits'] == 1
+
+def test_cache_ttl_expired():
+    cache = LinkCache(max_size=10, ttl=0, negative_ttl=0)
+    cache.set('abcde', make_link('abcde'))
+    cache.set('fghij', None)
+
+    assert cache.get('abcde') is MISS
+    assert cache.get('fghij') is MISS
+    assert cache.stats()['size'] == 0
+
+def test_cache_lru_eviction():
+    cache = LinkCache(max_size=2, ttl=60, negative_ttl=60)
+    cache.set('link1', make_link('link1'))
+    cache.set('link2', make_link('link2'))
+    cache.get('link1')  # link1 passa a ser o mais recente
+    cache.set('link3', make_link('link3'))
+
+    assert cache.get('link2') is MISS
+    assert cache.get('link1') is not MISS
+    assert cache.get('link3') is not MISS
+    assert cache.stats()['evictions'] == 1
+
+def test_cache_invalidate():
+    cache = LinkCache(max_size=10, ttl=60, negative_ttl=60)
+    cache.set('link1', make_link('link1'))
+    cache.set('link2', None)
+    cache.invalidate('link1', 'link2')
+
+    assert cache.get('link1') is MISS
+    assert cache.get('link2') is MISS
+
+def test_link_cache_ttls_with_several_workers():
+    assert link_cache_ttls(1, 60, 30, 5) == (60, 30)
+    assert link_cache_ttls(4, 60, 30, 5) == (5, 5)
+    assert link_cache_ttls(4, 2, 1, 5) == (2, 1)
+
+def test_password_cache_hit():
+    cache = PasswordCache(max_size=10, ttl=60)
+    cache.add('abcde', 'secret', '$argon2id$hash')
+
+    assert cache.is_verified('abcde', 'secret', '$argon2id$hash')
+    assert not cache.is_verified('abcde', 'wrong', '$argon2id$hash')
+    assert not cache.is_verified('fghij', 'secret', '$argon2id$hash')
+    assert cache.stats()['hits'] == 1
+
+def test_password_cache_new_hash_misses():
+    cache = PasswordCache(max_size=10, ttl=60)
+    cache.add('abcde', 'secret', '$argon2id$old')
+
+    assert not cache.is_verified('abcde', 'secret', '$argon2id$new')
+
+def test_password_cache_does_not_store_password():
+    cache = PasswordCache(max_size=10, ttl=60)
+    cache.add('abcde', 'secret', '$argon2id$hash')
+
+    assert all('secret' not in key and b'secret' not in key[1] for key in cache._entries)
+
+def test_password_cache_ttl_and_size():
+    cache = PasswordCache(max_size=1, ttl=0)
+    cache.add('abcde', 'secret', 'hash')
+
+    assert not cache.is_verified('abcde', 'secret', 'hash')
+
+    cache = PasswordCache(max_size=1, ttl=60)
+    cache.add('abcde', 'secret', 'hash')
+    cache.add('fghij', 'secret', 'hash')
+
+    assert not cache.is_verified('abcde', 'secret', 'hash')
+    assert cache.is_verified('fghij', 'secret', 'hash')
+
+def test_cached_link_public_payload_matches_schema():
+    link = Link(original_url='https://www.google.com/', short_url='abcde', user_id=None, clicks=7)
+    link.id = 1
+    link.created_at = datetime(2026, 10, 18, 15, 42, 10)
+
+    payload = CachedLink.from_model(link).public_payload
+
+    assert payload == LinkPublicSchema(original_url=link.original_url, clicks=7, created_at=link.created_at).model_dump_json().encode()
@@ -0,0 +1,49 @@
+from sqlalchemy.orm import sessionmaker
+from src.clicks import ClickBuffer
+from src.db.models import Link
+
+def test_click_buffer_flush_batches_increments(db_session, simple_url):
+    buffer = ClickBuffer(sessionmaker(bind=db_session.get_bind()), flush_interval=60, flush_threshold=1000)
+    for _ in range(10):
+        buffer.add(simple_url.id)
+
+    assert buffer.pending(simple_url.id) == 10
+    assert buffer.flush(db_session) == 10
+    assert buffer.pending(simple_url.id) == 0
+
+    link = db_session.query(Link).filter(Link.id == simple_url.id).first()
+    assert link.clicks == 10
+
+def test_click_buffer_flush_without_pending_clicks(db_session):
+    buffer = ClickBuffer(sessionmaker(bind=db_session.get_bind()), flush_interval=60, flush_threshold=1000)
+
+    assert buffer.flush() == 0
+
+class BrokenSession:
+    def execute(self, *args, **kwargs):
+        raise RuntimeError('database is locked')
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+def test_click_buffer_keeps_clicks_on_error(simple_url):
+    buffer = ClickBuffer(BrokenSession, flush_interval=60, flush_threshold=1000)
+    buffer.add(simple_url.id, 3)
+
+    assert buffer.flush() == 0
+    assert buffer.pending(simple_url.id) == 3
+
+def test_click_buffer_threshold_wakes_flusher(db_session, simple_url):
+    buffer = ClickBuffer(sessionmaker(bind=db_session.get_bind()), flush_interval=60, flush_threshold=5)
+    buffer.start()
+    for _ in range(5):
+        buffer.add(simple_url.id)
+    buffer.stop()
+
+    db_session.expire_all()
+    link = db_session.query(Link).filter(Link.id == simple_url.id).first()
+    assert link.clicks == 5
+    assert buffer.pending(simple_url.id) == 0
@@ -0,0 +1,78 @@
+import asyncio
+import pytest
+from fastapi import HTTPException
+from src.hashing import PasswordHasher, pwd_context
+
+@pytest.fixture()
+def pool_hasher():
+    hasher = PasswordHasher(workers=1, max_concurrency=4, queue_timeout=5)
+    yield hasher
+    hasher.shutdown()
+
+def test_hasher_process_pool(pool_hasher):
+    hashed_password = pool_hasher.hash('password123')
+
+    assert pwd_context.verify('password123', hashed_password)
+    assert pool_hasher.verify('password123', hashed_password)
+    assert not pool_hasher.verify('invalid_password', hashed_password)
+    assert pool_hasher.stats()['calls'] == 3
+    assert pool_hasher.stats()['in_flight'] == 0
+
+def test_hasher_process_pool_async(pool_hasher):
+    async def run():
+        hashed_password = await pool_hasher.hash_async('password123')
+        return hashed_password, await pool_hasher.verify_async('password123', hashed_password)
+
+    hashed_password, valid = asyncio.run(run())
+
+    assert valid
+    assert hashed_password.startswith('$argon2')
+
+def test_hasher_hash_many():
+    hasher = PasswordHasher(workers=0, max_concurrency=2, queue_timeout=5)
+
+    hashed_passwords = hasher.hash_many(['one', 'two', 'three'])
+
+    assert [pwd_context.verify(password, hashed) for password, hashed in zip(['one', 'two', 'three'], hashed_passwords)] == [True] * 3
+    assert hasher.stats()['calls'] == 3
+    assert hasher.stats()['in_flight'] == 0
+
+def test_hasher_latency_is_a_snapshot():
+    hasher = PasswordHasher(workers=0, max_concurrency=1, queue_timeout=5)
+    hasher.hash('one')
+
+    latency = hasher.latency()
+    hasher.hash('two')
+
+    assert latency.count == 1
+    assert hasher.latency().count == 2
+    assert hasher.stats()['queue_seconds'] >= 0
+
+def test_hasher_hash_many_uses_its_own_slots():
+    hasher = PasswordHasher(workers=0, max_concurrency=1, queue_timeout=0.01, bulk_concurrency=1)
+    hasher._acquire()  # Vaga interativa ocupada
+
+    assert pwd_context.verify('one', hasher.hash_many(['one'])[0])
+    hasher._release()
+
+def test_hasher_hash_many_fails_items_without_slot():
+    hasher = PasswordHasher(workers=0, max_concurrency=4, queue_timeout=0.01, bulk_concurrency=1)
+    hasher._bulk_slots.acquire()  # Outro lote ocupando a única vaga
+
+    assert hasher.hash_many(['one', 'two']) == [None, None]
+    assert hasher.stats()['rejected'] == 2
+    assert hasher.stats()['in_flight'] == 0
+
+    hasher._bulk_slots.release()
+    hashed_passwords = hasher.hash_many(['one', 'two'])
+    assert all(pwd_context.verify(password, hashed) for password, hashed in zip(['one', 'two'], hashed_passwords))
+
+def test_hasher_rejects_when_saturated():
+    hasher = PasswordHasher(workers=0, max_concurrency=1, queue_timeout=0.01)
+    hasher._acquire()
+
+    with pytest.raises(HTTPException) as exc:
+        hasher.hash('password123')
+
+    assert exc.value.status_code == 503
+    assert hasher.stats()['rejected'] == 1
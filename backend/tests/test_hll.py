@@ -0,0 +1,65 @@
+import pytest
+from src.hll import HyperLogLog
+
+def test_hll_count_is_approximate():
+    sketch = HyperLogLog()
+    for index in range(20000):
+        sketch.add(f'visitor-{index}')
+
+    assert abs(sketch.count() - 20000) / 20000 < 0.05
+
+def test_hll_small_counts_are_exact_enough():
+    sketch = HyperLogLog()
+    for index in range(10):
+        sketch.add(f'visitor-{index}')
+
+    assert sketch.count() == 10
+
+def test_hll_ignores_duplicates():
+    sketch = HyperLogLog()
+    for _ in range(1000):
+        sketch.add('127.0.0.1|Mozilla/5.0')
+
+    assert sketch.count() == 1
+
+def test_hll_merge_is_union():
+    first, second, union = HyperLogLog(), HyperLogLog(), HyperLogLog()
+    for index in range(3000):
+        first.add(f'visitor-{index}')
+        union.add(f'visitor-{index}')
+    for index in range(2000, 5000):
+        second.add(f'visitor-{index}')
+        union.add(f'visitor-{index}')
+
+    assert first.merge(second).registers == union.registers
+    assert abs(first.count() - 5000) / 5000 < 0.05
+
+def test_hll_union_matches_merge():
+    sketches = [HyperLogLog() for _ in range(3)]
+    for index in range(3000):
+        sketches[index % 3].add(f'visitor-{index}')
+
+    merged = HyperLogLog()
+    for sketch in sketches:
+        merged.merge(sketch)
+
+    assert HyperLogLog.union(sketches).registers == merged.registers
+    assert HyperLogLog.union(sketches[:1]).registers == sketches[0].registers
+    assert HyperLogLog.union([]).count() == 0
+
+def test_hll_merge_with_different_precision():
+    with pytest.raises(ValueError):
+        HyperLogLog(10).merge(HyperLogLog(11))
+
+def test_hll_serialization_is_compact():
+    sketch = HyperLogLog()
+    sketch.add('visitor')
+    data = sketch.to_bytes()
+
+    assert len(data) < 64
+    assert HyperLogLog.from_bytes(data).registers == sketch.registers
+
+    for index in range(100000):
+        sketch.add(f'visitor-{index}')
+    assert len(sketch.to_bytes()) <= 2048 + 64
+    assert HyperLogLog.from_bytes(sketch.to_bytes()).count() == sketch.count()
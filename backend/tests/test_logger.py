@@ -0,0 +1,76 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pytest import fixture
+from src.logger import WebhookShipper, coalesce_messages, DISCORD_MESSAGE_LIMIT
+
+@fixture()
+def webhook_stub():
+    received = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers['Content-Length']))
+            received.append(json.loads(body)['content'])
+            self.send_response(204)
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    server.url = f'http://127.0.0.1:{server.server_address[1]}/webhook'
+    server.received = received
+    yield server
+
+    server.shutdown()
+    server.server_close()
+
+def test_coalesce_messages_respects_discord_limit():
+    messages = [f'log {i} ' + 'x' * 100 for i in range(50)]
+    contents = coalesce_messages(messages)
+
+    assert len(contents) < len(messages)
+    assert all(len(content) <= DISCORD_MESSAGE_LIMIT for content in contents)
+    assert '\n'.join(contents).split('\n') == messages
+
+def test_coalesce_messages_truncates_big_message():
+    contents = coalesce_messages(['x' * 5000])
+
+    assert len(contents) == 1
+    assert len(contents[0]) == DISCORD_MESSAGE_LIMIT
+
+def test_shipper_sends_batched_messages(webhook_stub):
+    shipper = WebhookShipper(webhook_stub.url, max_queue=100, batch_interval=0.1)
+    for i in range(20):
+        shipper.enqueue(f'log {i}')
+
+    shipper.start()
+    shipper.stop()
+
+    assert len(webhook_stub.received) == 1
+    assert webhook_stub.received[0].split('\n') == [f'log {i}' for i in range(20)]
+    assert shipper.stats()['sent'] == 1
+
+def test_shipper_drops_messages_when_queue_is_full(webhook_stub):
+    shipper = WebhookShipper(webhook_stub.url, max_queue=5, batch_interval=0.1)
+    for i in range(8):
+        shipper.enqueue(f'log {i}')
+
+    assert shipper.stats()['dropped'] == 3
+
+    shipper.start()
+    shipper.stop()
+
+    assert webhook_stub.received[0].split('\n') == [f'log {i}' for i in range(5)]
+
+def test_shipper_without_webhook_url():
+    shipper = WebhookShipper(None)
+    shipper.enqueue('log')
+    shipper.start()
+
+    assert shipper.stats()['queued'] == 0
+    shipper.stop()
@@ -0,0 +1,136 @@
+from pytest import fixture, raises
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+from src import scheduler as scheduler_module
+from src.metrics import Histogram, Metrics, metrics, instrument_engine, format_histogram, format_labels
+from src.scheduler import FileLockLeader, leader_only
+
+@fixture(autouse=True)
+def reset_metrics():
+    metrics.reset()
+    yield
+    metrics.reset()
+
+@fixture()
+def instrumented_client(client, db_session, monkeypatch):
+    monkeypatch.setattr('src.routes.metrics.METRICS_TOKEN', 'segredo')
+    client.headers['Authorization'] = 'Bearer segredo'
+    instrument_engine(db_session.get_bind(), 'test')
+    yield client
+    metrics.pools.pop('test', None)
+
+def test_histogram_buckets():
+    histogram = Histogram((0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 2.0):
+        histogram.observe(value)
+
+    assert histogram.counts == [2, 1, 1]
+    assert histogram.count == 4
+    assert histogram.sum == 2.65
+
+def test_format_histogram_is_cumulative():
+    histogram = Histogram((0.1, 1.0))
+    for value in (0.05, 0.5, 2.0):
+        histogram.observe(value)
+
+    lines = format_histogram('latency_seconds', 'Latência.', [({'route': 'get_url'}, histogram)])
+
+    assert lines == [
+        '# HELP latency_seconds Latência.',
+        '# TYPE latency_seconds histogram',
+        'latency_seconds_bucket{route="get_url",le="0.1"} 1',
+        'latency_seconds_bucket{route="get_url",le="1.0"} 2',
+        'latency_seconds_bucket{route="get_url",le="+Inf"} 3',
+        'latency_seconds_sum{route="get_url"} 2.55',
+        'latency_seconds_count{route="get_url"} 3'
+    ]
+
+def test_format_labels_escapes():
+    assert format_labels({'path': 'a"b\\c\n'}) == '{path="a\\"b\\\\c\\n"}'
+    assert format_labels({}) == ''
+
+def test_instrument_engine(tmp_path):
+    registry = Metrics()
+    engine = create_engine(f"sqlite:///{tmp_path / 'db.sqlite3'}")
+    instrument_engine(engine, 'primary', registry)
+
+    with engine.connect() as conn:
+        conn.execute(text('SELECT 1'))
+        conn.execute(text('SELECT 2'))
+        with raises(OperationalError):
+            conn.execute(text('SELECT * FROM naoexiste'))
+
+    assert registry.db_queries['primary'].count == 2
+    assert registry.db_errors['primary'] == 1
+    assert registry.pool_checkouts['primary'] == 1
+    assert registry.pool_connects['primary'] == 1
+    output = registry.render()
+    assert 'shorturl_db_pool_checkouts_total{engine="primary"} 1' in output
+    assert 'shorturl_db_pool_checked_out{engine="primary"} 0' in output
+    assert 'shorturl_db_query_duration_seconds_count{engine="primary"} 2' in output
+    engine.dispose()
+
+def test_metrics_endpoint(instrumented_client, simple_url):
+    instrumented_client.get(f'/api/stats/{simple_url.short_url}')
+    instrumented_client.get('/api/stats/naoexiste')
+
+    response = instrumented_client.get('/metrics')
+
+    assert response.status_code == 200
+    assert response.headers['content-type'].startswith('text/plain; version=0.0.4')
+    assert 'shorturl_http_requests_total{route="get_stats",status="200"} 1' in response.text
+    assert 'shorturl_http_requests_total{route="get_stats",status="404"} 1' in response.text
+    assert 'shorturl_http_request_duration_seconds_count{route="get_stats"} 2' in response.text
+    assert 'shorturl_cache_hits_total{cache="link"}' in response.text
+    assert 'shorturl_argon2_duration_seconds_count' in response.text
+    assert metrics.routes['get_stats'].db_queries > 0
+    assert metrics.routes['get_stats'].db_time > 0
+
+def test_metrics_light_mode_on_redirect(instrumented_client, simple_url):
+    instrumented_client.get(f'/{simple_url.short_url}', follow_redirects=False)
+
+    route = metrics.routes['redirect']
+    assert route.statuses == {302: 1}
+    assert route.latency.count == 1
+    assert route.db_queries == 0  # Consultas só entram no total por engine
+    assert metrics.db_queries['test'].count > 0
+
+def test_metrics_disabled_without_token(client, monkeypatch):
+    monkeypatch.setattr('src.routes.metrics.METRICS_TOKEN', '')
+
+    assert client.get('/metrics').status_code == 404
+
+def test_metrics_token(client, monkeypatch):
+    monkeypatch.setattr('src.routes.metrics.METRICS_TOKEN', 'segredo')
+
+    assert client.get('/metrics').status_code == 401
+    assert client.get('/metrics', headers={'Authorization': 'Bearer errado'}).status_code == 401
+    assert client.get('/metrics', headers={'Authorization': 'Bearer segredo'}).status_code == 200
+
+def test_scheduler_job_metrics(tmp_path, monkeypatch):
+    monkeypatch.setattr(scheduler_module, 'leader', FileLockLeader(str(tmp_path / 'scheduler.lock')))
+    scheduler_module.leader.try_acquire()
+
+    def clean_expired_links():
+        pass
+
+    def failing_job():
+        raise RuntimeError('falhou')
+
+    leader_only(clean_expired_links)()
+    with raises(RuntimeError):
+        leader_only(failing_job)()
+    scheduler_module.leader.release()
+
+    assert metrics.jobs['clean_expired_links'].count == 1
+    assert metrics.job_failures == {'failing_job': 1}
+    assert 'shorturl_scheduler_job_duration_seconds_count{job="clean_expired_links"} 1' in metrics.render()
+
+def test_rate_limited_counter(client):
+    class Route:
+        name = 'create_url'
+
+    metrics.count_rate_limited({'route': Route()})
+    metrics.count_rate_limited({})
+
+    assert metrics.rate_limited == {'create_url': 1, 'unmatched': 1}
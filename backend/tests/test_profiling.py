@@ -0,0 +1,123 @@
+import sys
+import threading
+from collections import Counter
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from pytest import fixture
+from src.profiling import (
+    StackSampler, ContinuousProfiler, ProfilingMiddleware, collapse_stack, format_collapsed, parse_collapsed,
+    list_profiles, load_continuous, profile_path
+)
+
+def make_app(directory, token: str = 'segredo', sample_rate: float = 0.0, max_files: int = 100) -> FastAPI:
+    app = FastAPI()
+
+    @app.get('/hot')
+    async def hot():
+        return {'ok': True}
+
+    app.add_middleware(ProfilingMiddleware, directory=str(directory), token=token, sample_rate=sample_rate, interval=0.001, max_files=max_files)
+    return app
+
+@fixture()
+def busy_thread():
+    stopped = threading.Event()
+
+    def busy_loop():
+        while not stopped.is_set():
+            sum(range(100))
+
+    thread = threading.Thread(target=busy_loop, name='busy')
+    thread.start()
+    yield thread
+    stopped.set()
+    thread.join()
+
+def test_collapse_stack():
+    stack = collapse_stack(sys._getframe(), 'MainThread')
+
+    assert stack.startswith('MainThread;')
+    assert stack.endswith('test_collapse_stack (test_profiling.py)')
+
+def test_collapsed_roundtrip():
+    stacks = Counter({'main;a (x.py);b (x.py)': 3, 'main;a (x.py)': 1})
+    text = format_collapsed(stacks)
+
+    assert text == 'main;a (x.py);b (x.py) 3\nmain;a (x.py) 1\n'
+    assert parse_collapsed('# comentário\n' + text + 'invalida\n') == stacks
+
+def test_sampler_captures_other_threads(busy_thread):
+    sampler = StackSampler(0.001)
+    for _ in range(5):
+        sampler.sample()
+
+    assert sampler.samples == 5
+    assert any(stack.startswith('busy;') and 'busy_loop (test_profiling.py)' in stack for stack in sampler.stacks())
+
+def test_continuous_profiler_merges_workers(tmp_path, busy_thread):
+    profiler = ContinuousProfiler(str(tmp_path), 0.001, 60)
+    profiler.start()
+    while profiler.samples < 3:
+        busy_thread.join(0.005)
+    profiler.stop()
+    (tmp_path / 'continuous-1.folded').write_text('busy;outro (x.py) 7\n')
+
+    stacks = load_continuous(str(tmp_path))
+    assert stacks['busy;outro (x.py)'] == 7
+    assert any('busy_loop' in stack for stack in stacks)
+    assert list_profiles(str(tmp_path)) == []  # Os arquivos contínuos não entram na lista de requisições
+
+def test_profile_path_rejects_traversal(tmp_path):
+    (tmp_path / 'a.folded').write_text('x 1\n')
+
+    assert profile_path('a.folded', str(tmp_path)) == str(tmp_path / 'a.folded')
+    assert profile_path('../a.folded', str(tmp_path)) is None
+    assert profile_path('b.folded', str(tmp_path)) is None
+
+def test_middleware_profiles_with_header(tmp_path):
+    client = TestClient(make_app(tmp_path))
+
+    assert 'x-profile-id' not in client.get('/hot').headers
+    assert 'x-profile-id' not in client.get('/hot', headers={'X-Profile': 'errado'}).headers
+    response = client.get('/hot', headers={'X-Profile': 'segredo'})
+
+    assert response.status_code == 200
+    name = response.headers['x-profile-id']
+    [profile] = list_profiles(str(tmp_path))
+    assert profile['name'] == name
+    assert (tmp_path / name).read_text().startswith('# GET /hot route=hot duration_ms=')
+
+def test_middleware_without_token_ignores_header(tmp_path):
+    client = TestClient(make_app(tmp_path, token=''))
+
+    assert 'x-profile-id' not in client.get('/hot', headers={'X-Profile': ''}).headers
+    assert list_profiles(str(tmp_path)) == []
+
+def test_middleware_sample_rate_and_max_files(tmp_path):
+    client = TestClient(make_app(tmp_path, token='', sample_rate=1.0, max_files=2))
+    names = [client.get('/hot').headers['x-profile-id'] for _ in range(3)]
+
+    assert sorted(profile['name'] for profile in list_profiles(str(tmp_path))) == sorted(names[1:])
+
+def test_profiling_routes(client, tmp_path, monkeypatch):
+    (tmp_path / '1-1-abc.folded').write_text('# GET /x\nmain;a (x.py) 2\n')
+    (tmp_path / 'continuous-1.folded').write_text('main;a (x.py) 2\n')
+    (tmp_path / 'continuous-2.folded').write_text('main;a (x.py) 3\nmain;b (x.py) 1\n')
+    monkeypatch.setattr('src.routes.profiling.PROFILING_DIR', str(tmp_path))
+
+    assert client.get('/api/profiling/profiles').status_code == 404  # Sem token configurado
+    monkeypatch.setattr('src.routes.profiling.PROFILING_TOKEN', 'segredo')
+    assert client.get('/api/profiling/profiles').status_code == 401
+
+    headers = {'Authorization': 'Bearer segredo'}
+    profiles = client.get('/api/profiling/profiles', headers=headers).json()['profiles']
+    assert [profile['name'] for profile in profiles] == ['1-1-abc.folded']
+
+    response = client.get('/api/profiling/profiles/1-1-abc.folded', headers=headers)
+    assert response.status_code == 200
+    assert 'main;a (x.py) 2' in response.text
+    assert client.get('/api/profiling/profiles/naoexiste.folded', headers=headers).status_code == 404
+
+    response = client.get('/api/profiling/continuous', headers=headers)
+    assert response.text == 'main;a (x.py) 5\nmain;b (x.py) 1\n'
+    assert 'continuous.folded' in response.headers['content-disposition']
@@ -0,0 +1,96 @@
+import time
+import redis
+from fakeredis import FakeRedisConnection, FakeServer
+from limits import parse
+from limits.storage import storage_from_string
+from limits.strategies import SlidingWindowCounterRateLimiter
+from pytest import raises
+from src.rate_limit import SQLiteStorage, TimedRateLimiter
+
+def redis_storage(server: FakeServer):
+    # Mesmo caminho do RATE_LIMIT_STORAGE_URI=redis://, com o pool apontando para o servidor falso
+    pool = redis.ConnectionPool(connection_class=FakeRedisConnection, server=server)
+    return storage_from_string('redis://localhost:6379', connection_pool=pool)
+
+def test_sqlite_storage_from_uri(tmp_path):
+    storage = storage_from_string(f'sqlite:///{tmp_path}/ratelimit.db')
+
+    assert isinstance(storage, SQLiteStorage)
+    assert storage.path == f'{tmp_path}/ratelimit.db'
+    assert storage.check()
+
+def test_sqlite_storage_sliding_window(tmp_path):
+    limiter = SlidingWindowCounterRateLimiter(SQLiteStorage(f'sqlite:///{tmp_path}/ratelimit.db'))
+    item = parse('3/minute')
+
+    assert all(limiter.hit(item, '127.0.0.1') for _ in range(3))
+    assert not limiter.hit(item, '127.0.0.1')
+    assert limiter.hit(item, '10.0.0.1')
+    assert limiter.get_window_stats(item, '127.0.0.1').remaining == 0
+
+def test_sqlite_storage_shared_between_workers(tmp_path):
+    uri = f'sqlite:///{tmp_path}/ratelimit.db'
+    first = SlidingWindowCounterRateLimiter(SQLiteStorage(uri))
+    second = SlidingWindowCounterRateLimiter(SQLiteStorage(uri))
+    item = parse('2/minute')
+
+    assert first.hit(item, '127.0.0.1')
+    assert second.hit(item, '127.0.0.1')
+    assert not first.hit(item, '127.0.0.1')
+    assert not second.test(item, '127.0.0.1')
+
+def test_sqlite_storage_cost(tmp_path):
+    limiter = SlidingWindowCounterRateLimiter(SQLiteStorage(f'sqlite:///{tmp_path}/ratelimit.db'))
+    item = parse('10/minute')
+
+    assert limiter.hit(item, '127.0.0.1', cost=8)
+    assert not limiter.hit(item, '127.0.0.1', cost=3)
+    assert limiter.hit(item, '127.0.0.1', cost=2)
+
+def test_sqlite_storage_compaction(tmp_path):
+    storage = SQLiteStorage(f'sqlite:///{tmp_path}/ratelimit.db', compact_interval=0)
+    storage.incr('expired', 0.01)
+    storage.incr('active', 60)
+    time.sleep(0.02)
+
+    assert storage.get('expired') == 0
+    assert storage.compact() == 1
+    assert storage.get('active') == 1
+
+def test_timed_rate_limiter_stats(tmp_path):
+    limiter = TimedRateLimiter(SlidingWindowCounterRateLimiter(SQLiteStorage(f'sqlite:///{tmp_path}/ratelimit.db')))
+    item = parse('5/minute')
+
+    limiter.hit(item, '127.0.0.1')
+    limiter.test(item, '127.0.0.1')
+
+    assert limiter.stats()['lookups'] == 2
+    assert limiter.stats()['errors'] == 0
+    assert limiter.stats()['max_ms'] >= limiter.stats()['avg_ms'] > 0
+
+def test_redis_storage_shared_between_workers():
+    server = FakeServer()
+    first = SlidingWindowCounterRateLimiter(redis_storage(server))
+    second = SlidingWindowCounterRateLimiter(redis_storage(server))
+    item = parse('2/minute')
+
+    assert first.hit(item, '127.0.0.1')
+    assert second.hit(item, '127.0.0.1')
+    assert not first.hit(item, '127.0.0.1')
+    assert not second.test(item, '127.0.0.1')
+    assert first.hit(item, '10.0.0.1')
+    assert second.get_window_stats(item, '127.0.0.1').remaining == 0
+
+def test_redis_storage_outage_counts_errors():
+    server = FakeServer()
+    storage = redis_storage(server)
+    limiter = TimedRateLimiter(SlidingWindowCounterRateLimiter(storage))
+    item = parse('5/minute')
+
+    assert limiter.hit(item, '127.0.0.1')
+    server.connected = False
+    assert not storage.check()
+    with raises(redis.ConnectionError):
+        limiter.hit(item, '127.0.0.1')
+
+    assert limiter.stats()['errors'] == 1
@@ -0,0 +1,116 @@
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from src.app import app
+from src.cache import link_cache
+from src.clicks import click_buffer
+from src.db.database import get_async_read_sessionmaker
+from src.db.models import Link
+from src.settings import FRONTEND_URL
+from src.trending import trending_links
+
+def test_redirect_success(client, simple_url):
+    response = client.get(f'/{simple_url.short_url}', follow_redirects=False)
+
+    assert response.status_code == 302
+    assert response.headers['location'] == simple_url.original_url
+    assert response.headers['cache-control'] == 'public, max-age=60'
+    assert response.headers['etag'].startswith('"')
+    assert response.headers['content-length'] == '0'
+
+def test_redirect_records_click(client, simple_url, db_session):
+    for _ in range(2):
+        client.get(f'/{simple_url.short_url}', follow_redirects=False)
+
+    assert click_buffer.pending(simple_url.id) == 2
+    assert trending_links.top('1h', 1)[0]['short_url'] == simple_url.short_url
+
+    click_buffer.flush()
+    db_session.expire_all()
+    assert db_session.query(Link).filter(Link.id == simple_url.id).first().clicks == 2
+
+def test_redirect_etag_changes_with_url(client, simple_url, db_session):
+    first = client.get(f'/{simple_url.short_url}', follow_redirects=False).headers['etag']
+
+    simple_url.original_url = 'https://www.example.com/'
+    db_session.commit()
+    link_cache.invalidate(simple_url.short_url)
+
+    assert client.get(f'/{simple_url.short_url}', follow_redirects=False).headers['etag'] != first
+
+def test_redirect_if_none_match(client, simple_url):
+    etag = client.get(f'/{simple_url.short_url}', follow_redirects=False).headers['etag']
+
+    response = client.get(f'/{simple_url.short_url}', headers={'If-None-Match': f'"outra", W/{etag}'}, follow_redirects=False)
+
+    assert response.status_code == 304
+    assert response.headers['etag'] == etag
+    assert response.headers['cache-control'] == 'public, max-age=60'
+    assert 'location' not in response.headers
+    assert click_buffer.pending(simple_url.id) == 1  # Só o primeiro GET conta; a revalidação não
+
+def test_redirect_cache_hit_opens_no_session(client, simple_url, db_session, monkeypatch):
+    client.get(f'/{simple_url.short_url}', follow_redirects=False)  # Carrega o cache
+    opened = []
+
+    @asynccontextmanager
+    async def open_db():
+        opened.append(True)
+        yield db_session
+
+    monkeypatch.setitem(app.dependency_overrides, get_async_read_sessionmaker, lambda: open_db)
+    response = client.get(f'/{simple_url.short_url}', follow_redirects=False)
+
+    assert response.status_code == 302
+    assert opened == []
+
+    link_cache.clear()
+    assert client.get(f'/{simple_url.short_url}', follow_redirects=False).headers['location'] == simple_url.original_url
+    assert opened == [True]
+
+def test_redirect_if_none_match_stale(client, simple_url):
+    response = client.get(f'/{simple_url.short_url}', headers={'If-None-Match': '"outra"'}, follow_redirects=False)
+
+    assert response.status_code == 302
+    assert response.headers['location'] == simple_url.original_url
+
+def test_redirect_not_found(client):
+    response = client.get('/naoexiste', follow_redirects=False)
+
+    assert response.status_code == 302
+    assert response.headers['location'] == f'{FRONTEND_URL}/naoexiste'
+    assert response.headers['cache-control'] == 'no-store'
+
+def test_redirect_protected_link(client, protected_url):
+    response = client.get(f'/{protected_url.short_url}', follow_redirects=False)
+
+    assert response.status_code == 302
+    assert response.headers['location'] == f'{FRONTEND_URL}/{protected_url.short_url}'
+    assert response.headers['location'] != protected_url.original_url
+    assert response.headers['cache-control'] == 'no-store'
+    assert 'etag' not in response.headers
+    assert click_buffer.pending(protected_url.id) == 0
+
+def test_redirect_protected_link_ignores_if_none_match(client, protected_url):
+    response = client.get(f'/{protected_url.short_url}', headers={'If-None-Match': '*'}, follow_redirects=False)
+
+    assert response.status_code == 302
+    assert response.headers['location'] == f'{FRONTEND_URL}/{protected_url.short_url}'
+
+def test_redirect_expiring_link_caps_max_age(client, db_session):
+    link = Link(original_url='https://www.google.com/', short_url='expira', user_id=None, expires_at=datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(seconds=30))
+    db_session.add(link)
+    db_session.commit()
+
+    response = client.get('/expira', follow_redirects=False)
+    max_age = int(response.headers['cache-control'].split('=')[1])
+
+    assert response.status_code == 302
+    assert 0 < max_age <= 30
+
+def test_redirect_expired_link(client, db_session):
+    db_session.add(Link(original_url='https://www.google.com/', short_url='expirado', user_id=None, expires_at=datetime(2020, 1, 1)))
+    db_session.commit()
+
+    response = client.get('/expirado', follow_redirects=False)
+
+    assert response.headers['location'] == f'{FRONTEND_URL}/expirado'
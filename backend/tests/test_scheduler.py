@@ -0,0 +1,47 @@
+from src.scheduler import FileLockLeader, leader_only, stop_scheduler
+import src.scheduler as scheduler_module
+
+def test_file_lock_single_leader(tmp_path):
+    path = str(tmp_path / 'scheduler.lock')
+    first = FileLockLeader(path)
+    second = FileLockLeader(path)
+
+    assert first.try_acquire()
+    assert not second.try_acquire()
+    assert first.is_leader and not second.is_leader
+
+    first.release()
+
+    assert second.try_acquire()
+    second.release()
+
+def test_leader_only_skips_followers(tmp_path, monkeypatch):
+    calls = []
+    path = str(tmp_path / 'scheduler.lock')
+    holder = FileLockLeader(path)
+    holder.try_acquire()
+    monkeypatch.setattr(scheduler_module, 'leader', FileLockLeader(path))
+    job = leader_only(lambda: calls.append(1))
+
+    job()
+    assert calls == []
+
+    holder.release()
+    scheduler_module.leader.try_acquire()
+    job()
+    assert calls == [1]
+    scheduler_module.leader.release()
+
+def test_stop_scheduler_truncates_wal_on_leader(tmp_path, monkeypatch):
+    modes = []
+    monkeypatch.setattr(scheduler_module, 'checkpoint_wal', modes.append)
+    monkeypatch.setattr(scheduler_module.trending_links, 'snapshot', lambda: None)
+    monkeypatch.setattr(scheduler_module, 'leader', FileLockLeader(str(tmp_path / 'scheduler.lock')))
+
+    stop_scheduler()
+    assert modes == []
+
+    scheduler_module.leader.try_acquire()
+    stop_scheduler()
+    assert modes == ['TRUNCATE']
+    assert not scheduler_module.leader.is_leader
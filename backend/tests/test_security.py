@@ -2,8 +2,14 @@ import pytest
 from starlette.responses import Response
 from freezegun import freeze_time
 import uuid
-from src.db.models import RefreshToken
-from src.security import generate_password_hash, verify_password, generate_jwt_token, decode_jwt_token, get_user, generate_session_id
+from types import SimpleNamespace
+from datetime import datetime, timedelta, timezone
+from jwt import encode
+from sqlalchemy import event
+from src.cache import user_cache
+from src.settings import JWT_SECRET_KEY
+from src.db.models import RefreshToken, User
+from src.security import generate_password_hash, verify_password, generate_jwt_token, decode_jwt_token, get_user, generate_session_id, invalidate_all_sessions
 
 def test_generate_password_hash():
     password = 'password123'
@@ -121,3 +127,66 @@ def test_get_user_with_access_token_invalid(request_mock, user, db_session):
     assert user_data['id'] == user.id
     assert user_data['username'] == user.username
     assert user_data['email'] == user.email
+
+def test_get_user_from_claims_without_queries(request_mock, user, db_session):
+    request_mock.cookies = {'access_token': user.token_jwt, 'session_id': user.session_id}
+    get_user(request_mock, Response(), db_session)  # Primeira requisição do usuário neste processo: carrega o cache
+
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(db_session.get_bind(), 'before_cursor_execute', listener)
+    user_data = get_user(request_mock, Response(), db_session)
+    event.remove(db_session.get_bind(), 'before_cursor_execute', listener)
+
+    assert user_data == {'id': user.id, 'username': user.username, 'email': user.email}
+    assert statements == []
+
+def test_get_user_with_revoked_access_token(request_mock, user, db_session):
+    invalidate_all_sessions(user.id, user.session_id, False, db_session)
+    request_mock.cookies = {'access_token': user.token_jwt, 'session_id': user.session_id}
+
+    assert get_user(request_mock, Response(), db_session) is False
+
+def test_get_user_with_token_revoked_by_another_process(request_mock, user, db_session):
+    # Outro worker revogou: este processo não tem a versão nova em cache
+    user_cache.clear()
+    db_session.query(User).filter(User.id == user.id).update({'token_version': User.token_version + 1})
+    db_session.commit()
+    request_mock.cookies = {'access_token': user.token_jwt, 'session_id': user.session_id}
+
+    assert get_user(request_mock, Response(), db_session) is False
+    assert get_user(request_mock, Response(), db_session, fresh=True) is False
+
+def test_get_user_stale_cached_version_expires_with_ttl(request_mock, user, db_session, monkeypatch):
+    clock = SimpleNamespace(monotonic=lambda: 1000.0)
+    monkeypatch.setattr('src.cache.time', clock)
+    user_cache.set(user)  # Versão antiga em cache neste processo; outro worker revogou os tokens
+    db_session.query(User).filter(User.id == user.id).update({'token_version': User.token_version + 1})
+    db_session.commit()
+    request_mock.cookies = {'access_token': user.token_jwt, 'session_id': user.session_id}
+
+    assert get_user(request_mock, Response(), db_session)  # Atraso aceito: até USER_CACHE_TTL
+
+    clock.monotonic = lambda: 1000.0 + user_cache.ttl
+    assert get_user(request_mock, Response(), db_session) is False
+
+def test_get_user_with_malformed_claims(request_mock, user, db_session):
+    token = encode({'sub': 'abc', 'type': 'access', 'exp': datetime.now(timezone.utc) + timedelta(minutes=5)}, JWT_SECRET_KEY, algorithm='HS256')
+    request_mock.cookies = {'access_token': token, 'session_id': user.session_id}
+
+    assert get_user(request_mock, Response(), db_session) is False
+
+def test_get_user_fresh_reads_current_data(request_mock, user, db_session):
+    db_session.query(User).filter(User.id == user.id).update({'username': 'Renamed'})
+    db_session.commit()
+    request_mock.cookies = {'access_token': user.token_jwt, 'session_id': user.session_id}
+
+    assert get_user(request_mock, Response(), db_session)['username'] == 'User'
+    assert get_user(request_mock, Response(), db_session, fresh=True)['username'] == 'Renamed'
+
+def test_get_user_with_legacy_access_token(request_mock, user, db_session):
+    session_id = str(uuid.uuid4())
+    token = generate_jwt_token(user.id, user.username, session_id, request_mock, Response(), False, db_session)
+    request_mock.cookies = {'access_token': token['access_token'], 'session_id': session_id}
+
+    assert get_user(request_mock, Response(), db_session)['email'] == user.email
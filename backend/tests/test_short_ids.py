@@ -0,0 +1,47 @@
+from src.db.models import ShortIdSequence
+from src.short_ids import SequenceAllocator, RandomAllocator, encode_base62, get_allocator, permute, SHORT_ID_LENGTH
+
+def test_encode_base62():
+    assert encode_base62(0) == '00000000'
+    assert encode_base62(61) == '0000000Z'
+    assert encode_base62(62) == '00000010'
+
+def test_permute_has_no_collisions():
+    ids = {encode_base62(permute(value)) for value in range(10000)}
+
+    assert len(ids) == 10000
+    assert all(len(short_id) == SHORT_ID_LENGTH for short_id in ids)
+
+def test_sequence_allocator_leases_blocks(db_session):
+    allocator = SequenceAllocator(block_size=2)
+    ids = [allocator.allocate(db_session) for _ in range(5)]
+
+    assert len(set(ids)) == 5
+    assert ids[0] == encode_base62(permute(0))
+    assert db_session.query(ShortIdSequence).first().next_value == 6
+
+def test_sequence_allocators_do_not_overlap(db_session):
+    first_worker = SequenceAllocator(block_size=10)
+    second_worker = SequenceAllocator(block_size=10)
+
+    ids = [first_worker.allocate(db_session) for _ in range(15)] + [second_worker.allocate(db_session) for _ in range(15)]
+
+    assert len(set(ids)) == 30
+
+def test_random_allocator(db_session):
+    short_id = RandomAllocator().allocate(db_session)
+
+    assert len(short_id) == SHORT_ID_LENGTH
+
+def test_sequence_allocator_allocate_many_leases_enough(db_session):
+    allocator = SequenceAllocator(block_size=2)
+
+    ids = allocator.allocate_many(db_session, 5)
+
+    assert ids == [encode_base62(permute(value)) for value in range(5)]
+    assert allocator.allocate(db_session) == encode_base62(permute(5))
+
+def test_get_allocator_defaults_to_random():
+    assert isinstance(get_allocator('random'), RandomAllocator)
+    assert isinstance(get_allocator(''), RandomAllocator)
+    assert isinstance(get_allocator('sequence'), SequenceAllocator)
@@ -0,0 +1,115 @@
+import time
+from datetime import datetime, timedelta, timezone
+from src.db.models import TrendingSnapshot
+from src.trending import DecayedSpaceSaving, TrendingLinks
+
+def test_space_saving_counts_heavy_hitters():
+    sketch = DecayedSpaceSaving(capacity=3, tau=3600, now=0)
+    for key, clicks in (('a', 50), ('b', 30), ('c', 5), ('d', 1), ('e', 1)):
+        for _ in range(clicks):
+            sketch.add(key, now=0)
+
+    top = sketch.top(2, now=0)
+
+    assert [key for key, _, _ in top] == ['a', 'b']
+    assert round(top[0][1]) == 50
+    assert len(sketch) == 3
+
+def test_space_saving_evicted_count_becomes_error():
+    sketch = DecayedSpaceSaving(capacity=2, tau=3600, now=0)
+    sketch.add('a', now=0)
+    sketch.add('a', now=0)
+    sketch.add('b', now=0)
+    sketch.add('c', now=0)
+
+    counts = {key: (round(count), round(error)) for key, count, error in sketch.items(now=0)}
+    assert counts == {'a': (2, 0), 'c': (2, 1)}
+
+def test_space_saving_decay():
+    sketch = DecayedSpaceSaving(capacity=10, tau=60, now=0)
+    for _ in range(100):
+        sketch.add('old', now=0)
+    for _ in range(10):
+        sketch.add('new', now=300)
+
+    top = sketch.top(2, now=300)
+
+    assert top[0][0] == 'new'
+    assert round(top[1][1], 3) == round(100 * 2.718281828 ** -5, 3)
+
+def test_space_saving_rescales_landmark():
+    sketch = DecayedSpaceSaving(capacity=10, tau=1, now=0)
+    sketch.add('a', now=0)
+    sketch.add('a', now=1000)
+
+    assert sketch.landmark == 1000
+    assert round(sketch.top(1, now=1000)[0][1], 6) == 1
+
+def test_trending_snapshot_and_restore(db_session):
+    trending = TrendingLinks(None, capacity=10, worker='a')
+    for _ in range(3):
+        trending.add('abcde')
+    trending.add('fghij')
+
+    assert trending.snapshot(db_session) == 6
+    assert db_session.query(TrendingSnapshot).count() == 6
+
+    restored = TrendingLinks(None, capacity=10, worker='b')
+    assert restored.restore(db_session) == 6
+    assert [link['short_url'] for link in restored.top('1h', 10)] == ['abcde', 'fghij']
+    assert restored.top('24h', 1)[0]['score'] == 3
+
+def test_trending_merges_workers(db_session):
+    first = TrendingLinks(None, capacity=10, worker='a')
+    second = TrendingLinks(None, capacity=10, worker='b')
+    for _ in range(2):
+        first.add('abcde')
+    first.add('fghij')
+    for _ in range(2):
+        second.add('fghij')
+
+    first.snapshot(db_session)
+    second.snapshot(db_session)
+    first.snapshot(db_session)  # Salvar de novo substitui só as linhas do próprio worker
+
+    assert db_session.query(TrendingSnapshot).count() == 9
+    for trending in (first, second):
+        top = {link['short_url']: round(link['score']) for link in trending.top('24h', 10)}
+        assert top == {'abcde': 2, 'fghij': 3}
+
+def test_trending_adopts_stale_workers(db_session):
+    dead = TrendingLinks(None, capacity=10, worker='morto')
+    dead.add('abcde')
+    dead.snapshot(db_session)
+
+    leader = TrendingLinks(None, capacity=10, worker='lider', stale_after=60)
+    leader.restore(db_session)
+    assert leader.adopt_stale(db_session) == 0  # Snapshot recente: o worker ainda pode estar vivo
+
+    db_session.query(TrendingSnapshot).update({TrendingSnapshot.taken_at: datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(minutes=5)})
+    db_session.commit()
+    assert leader.adopt_stale(db_session) == 3
+    assert db_session.query(TrendingSnapshot).count() == 0
+    assert [link['short_url'] for link in leader.top('24h', 10)] == ['abcde']
+
+    leader.snapshot(db_session)
+    assert {row.worker for row in db_session.query(TrendingSnapshot)} == {'lider'}
+    assert round(leader.top('24h', 1)[0]['score']) == 1
+
+def test_trending_discard():
+    trending = TrendingLinks(None, capacity=10)
+    trending.add('abcde')
+    trending.discard('abcde')
+
+    assert trending.top('5m', 10) == []
+
+def test_trending_discard_removes_peer_counts(db_session):
+    other = TrendingLinks(None, capacity=10, worker='a')
+    other.add('abcde')
+    other.snapshot(db_session)
+
+    trending = TrendingLinks(None, capacity=10, worker='b')
+    trending.restore(db_session)
+    trending.discard('abcde')
+
+    assert trending.top('5m', 10) == []
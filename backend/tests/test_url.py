@@ -1,4 +1,16 @@
-from src.db.models import Link
+import csv
+import io
+import json
+from datetime import datetime
+from src.db.models import Link, ClickBucket
+from src.security import generate_password_hash
+from src.clicks import click_buffer
+from src.analytics import click_events
+from src.trending import trending_links
+from src.routes import url as url_routes
+from src.routes.url import clean_expired_links
+from src.short_ids import SequenceAllocator, encode_base62, permute
+from src.utils import encode_cursor
 
 def test_get_url_not_exists(client):
     response = client.get('/api/short/abcde')
@@ -42,6 +54,7 @@ def test_increment_click_url(client, simple_url, db_session):
     assert response.status_code == 200
     assert response.json() == {'message': 'Link clicked successfully'}
 
+    click_buffer.flush(db_session)
     link = db_session.query(Link).filter(Link.id == simple_url.id).first()
     assert link.clicks == 1
 
@@ -51,9 +64,19 @@ def test_increment_multiple_clicks(client, simple_url, db_session):
         assert response.status_code == 200
         assert response.json() == {'message': 'Link clicked successfully'}
 
+    click_buffer.flush(db_session)
     link = db_session.query(Link).filter(Link.id == simple_url.id).first()
     assert link.clicks == 25
 
+def test_get_stats_includes_pending_clicks(client, simple_url):
+    client.post(f'api/click/{simple_url.short_url}')
+    client.post(f'api/click/{simple_url.short_url}')
+
+    response = client.get(f'/api/stats/{simple_url.short_url}')
+
+    assert response.status_code == 200
+    assert response.json()['clicks'] == 2
+
 def test_create_url_simple(client):
     response = client.post('/api/short', json={'original_url': 'https://www.google.com/'})
 
@@ -87,6 +110,13 @@ def test_create_url_with_invalid_short_url(client):
     assert response.status_code == 400
     assert response.json()['detail'] == 'Invalid short URL'
 
+def test_create_url_with_reserved_short_url(client):
+    for short_url in ('trending', 'profiling', 'metrics'):
+        response = client.post('/api/short', json={'original_url': 'https://www.google.com/', 'short_url': short_url})
+
+        assert response.status_code == 400
+        assert response.json()['detail'] == 'Invalid short URL'
+
 def test_create_url_with_existing_short_url(client, simple_url):
     short_url = simple_url.short_url
 
@@ -131,6 +161,100 @@ def test_get_stats_with_protected_link(client, protected_url):
     assert response.status_code == 401
     assert response.json()['detail'] == 'Link is password protected'
 
+def test_click_url_records_click_event(client, simple_url, db_session):
+    client.post(f'/api/click/{simple_url.short_url}', headers={'Referer': 'https://www.google.com/', 'User-Agent': 'Mozilla/5.0 (Android 14; Mobile)'})
+    click_events.flush()
+
+    buckets = db_session.query(ClickBucket).filter(ClickBucket.link_id == simple_url.id).all()
+    assert {bucket.resolution for bucket in buckets} == {'minute', 'hour', 'day'}
+    assert {(bucket.referrer, bucket.device, bucket.clicks) for bucket in buckets} == {('search', 'mobile', 1)}
+
+def test_get_stats_unique_visitors(client, simple_url):
+    for ip in ('127.0.0.1', '127.0.0.1', '10.0.0.1'):
+        client.post(f'/api/click/{simple_url.short_url}', headers={'X-Forwarded-For': ip})
+    click_events.flush()
+
+    response = client.get(f'/api/stats/{simple_url.short_url}')
+
+    assert response.json()['clicks'] == 3
+    assert response.json()['unique_visitors'] == 2
+    assert response.json()['unique_visitors_24h'] == 2
+    assert response.json()['unique_visitors_7d'] == 2
+
+def test_get_trending_links(client, simple_url, protected_url):
+    for _ in range(2):
+        client.post(f'/api/click/{simple_url.short_url}')
+    client.get(f'/api/short/{simple_url.short_url}')
+    client.post(f'/api/click/{protected_url.short_url}')
+
+    response = client.get('/api/stats/trending', params={'window': '1h', 'k': 10})
+
+    assert response.status_code == 200
+    assert response.json()['window'] == '1h'
+    assert [link['short_url'] for link in response.json()['links']] == [simple_url.short_url]
+    assert round(response.json()['links'][0]['score']) == 3
+
+def test_get_trending_links_invalid_window(client):
+    response = client.get('/api/stats/trending', params={'window': '7d'})
+
+    assert response.status_code == 422
+
+def test_delete_short_url_removes_trending(logged_client, url_with_user):
+    trending_links.add(url_with_user.short_url)
+
+    logged_client.delete(f'/api/short/{url_with_user.short_url}')
+
+    assert trending_links.top('1h', 10) == []
+
+def test_get_stats_timeseries(client, simple_url, db_session):
+    for hour, clicks in ((10, 3), (12, 5)):
+        db_session.add(ClickBucket(link_id=simple_url.id, resolution='hour', bucket_start=datetime(2026, 10, 18, hour), referrer='direct', device='desktop', country='BR', clicks=clicks))
+    db_session.add(ClickBucket(link_id=simple_url.id, resolution='hour', bucket_start=datetime(2026, 10, 18, 12), referrer='social', device='mobile', country='BR', clicks=1))
+    db_session.commit()
+
+    response = client.get(f'/api/stats/{simple_url.short_url}/timeseries', params={'resolution': 'hour', 'start': '2026-10-18T09:30:00Z', 'end': '2026-10-18T13:00:00Z'})
+
+    assert response.status_code == 200
+    assert [point['clicks'] for point in response.json()['points']] == [0, 3, 0, 6]
+    assert response.json()['points'][0]['timestamp'] == '2026-10-18T09:00:00'
+    assert response.json()['referrers'] == {'direct': 8, 'social': 1}
+    assert response.json()['devices'] == {'desktop': 8, 'mobile': 1}
+    assert response.json()['countries'] == {'BR': 9}
+
+def test_get_stats_timeseries_default_range(client, simple_url):
+    response = client.get(f'/api/stats/{simple_url.short_url}/timeseries', params={'resolution': 'minute'})
+
+    assert response.status_code == 200
+    assert len(response.json()['points']) == 60
+    assert sum(point['clicks'] for point in response.json()['points']) == 0
+
+def test_get_stats_timeseries_invalid_range(client, simple_url):
+    response = client.get(f'/api/stats/{simple_url.short_url}/timeseries', params={'start': '2026-10-18T10:00:00', 'end': '2026-10-18T09:00:00'})
+
+    assert response.status_code == 400
+    assert response.json()['detail'] == 'Invalid time range'
+
+def test_get_stats_timeseries_extreme_dates(client, simple_url):
+    for params in (
+        {'end': '9999-12-31T23:59:59'},
+        {'resolution': 'day', 'start': '9999-12-30T00:00:00', 'end': '9999-12-31T23:59:59'},
+        {'end': '0001-01-01T00:00:00'}
+    ):
+        response = client.get(f'/api/stats/{simple_url.short_url}/timeseries', params=params)
+
+        assert response.status_code == 400, params
+        assert response.json()['detail'] == 'Invalid time range'
+
+def test_get_stats_timeseries_range_too_large(client, simple_url):
+    response = client.get(f'/api/stats/{simple_url.short_url}/timeseries', params={'resolution': 'minute', 'start': '2026-01-01T00:00:00', 'end': '2026-10-18T00:00:00'})
+
+    assert response.status_code == 400
+
+def test_get_stats_timeseries_with_protected_link(client, protected_url):
+    response = client.get(f'/api/stats/{protected_url.short_url}/timeseries')
+
+    assert response.status_code == 401
+
 def test_get_all_user_links_with_invalid_user(client_with_invalid_user):
     response = client_with_invalid_user.get('/api/user/links')
 
@@ -149,6 +273,106 @@ def test_get_all_user_links_success(logged_client, user, db_session):
     assert response.json()['links'][1]['short_url'] == 'teste2'
     assert len(response.json()['links']) == 2
 
+def test_get_user_links_paginated(logged_client, user, db_session):
+    for index in range(5):
+        db_session.add(Link(original_url='https://www.google.com/', short_url=f'teste{index}', user_id=user.id))
+    db_session.commit()
+
+    first_page = logged_client.get('/api/user/links', params={'limit': 2}).json()
+    second_page = logged_client.get('/api/user/links', params={'limit': 2, 'cursor': first_page['next_cursor']}).json()
+    last_page = logged_client.get('/api/user/links', params={'limit': 2, 'cursor': second_page['next_cursor']}).json()
+
+    assert [link['short_url'] for link in first_page['links']] == ['teste0', 'teste1']
+    assert [link['short_url'] for link in second_page['links']] == ['teste2', 'teste3']
+    assert [link['short_url'] for link in last_page['links']] == ['teste4']
+    assert last_page['next_cursor'] is None
+
+def test_get_user_links_sorted_by_clicks(logged_client, user, db_session):
+    for index, clicks in enumerate([3, 10, 3, 0]):
+        db_session.add(Link(original_url='https://www.google.com/', short_url=f'teste{index}', user_id=user.id, clicks=clicks))
+    db_session.commit()
+
+    first_page = logged_client.get('/api/user/links', params={'limit': 2, 'sort': 'clicks', 'order': 'desc'}).json()
+    second_page = logged_client.get('/api/user/links', params={'limit': 2, 'sort': 'clicks', 'order': 'desc', 'cursor': first_page['next_cursor']}).json()
+
+    assert [link['short_url'] for link in first_page['links']] == ['teste1', 'teste2']
+    assert [link['short_url'] for link in second_page['links']] == ['teste0', 'teste3']
+
+def test_get_user_links_include_pending_clicks(logged_client, user, db_session):
+    link = Link(original_url='https://www.google.com/', short_url='teste1', user_id=user.id, clicks=3)
+    db_session.add(link)
+    db_session.commit()
+    for _ in range(2):
+        click_buffer.add(link.id)
+
+    listed = logged_client.get('/api/user/links').json()['links']
+    exported = [json.loads(line) for line in logged_client.get('/api/user/links/export').text.splitlines()]
+
+    assert listed[0]['clicks'] == exported[0]['clicks'] == 5
+
+def test_get_user_links_search_and_password(logged_client, user, db_session):
+    db_session.add(Link(original_url='https://www.google.com/', short_url='promo1', user_id=user.id, password=generate_password_hash('password123')))
+    db_session.add(Link(original_url='https://www.google.com/', short_url='promo2', user_id=user.id))
+    db_session.add(Link(original_url='https://www.google.com/', short_url='outro', user_id=user.id))
+    db_session.commit()
+
+    response = logged_client.get('/api/user/links', params={'search': 'promo'})
+
+    assert response.status_code == 200
+    assert [(link['short_url'], link['has_password']) for link in response.json()['links']] == [('promo1', True), ('promo2', False)]
+    assert 'password' not in response.json()['links'][0]
+
+def test_get_user_links_with_invalid_cursor(logged_client):
+    response = logged_client.get('/api/user/links', params={'cursor': 'invalido'})
+
+    assert response.status_code == 400
+    assert response.json()['detail'] == 'Invalid cursor'
+
+def test_get_user_links_with_out_of_range_cursor(logged_client):
+    for cursor in ([True], [10**30], [-2**63 - 1], [1.5]):
+        response = logged_client.get('/api/user/links', params={'cursor': encode_cursor(cursor)})
+
+        assert response.status_code == 400
+        assert response.json()['detail'] == 'Invalid cursor'
+
+    response = logged_client.get('/api/user/links', params={'sort': 'clicks', 'cursor': encode_cursor([2**63, 1])})
+    assert response.status_code == 400
+    assert logged_client.get('/api/user/links', params={'cursor': encode_cursor([2**63 - 1])}).status_code == 200
+
+def test_export_user_links_with_invalid_user(client_with_invalid_user):
+    response = client_with_invalid_user.get('/api/user/links/export')
+
+    assert response.status_code == 401
+
+def test_export_user_links_ndjson(logged_client, user, db_session, monkeypatch):
+    monkeypatch.setattr(url_routes, 'EXPORT_BATCH_SIZE', 2)
+    for index in range(5):
+        db_session.add(Link(original_url='https://www.google.com/', short_url=f'teste{index}', user_id=user.id, clicks=index))
+    db_session.add(Link(original_url='https://www.google.com/', short_url='outro', user_id=None))
+    db_session.commit()
+
+    response = logged_client.get('/api/user/links/export')
+    links = [json.loads(line) for line in response.text.splitlines()]
+
+    assert response.status_code == 200
+    assert response.headers['content-type'] == 'application/x-ndjson'
+    assert [link['short_url'] for link in links] == [f'teste{index}' for index in range(5)]
+    assert links[3]['clicks'] == 3
+    assert links[0]['has_password'] is False
+    assert 'password' not in links[0]
+
+def test_export_user_links_csv(logged_client, user, db_session):
+    db_session.add(Link(original_url='https://www.google.com/', short_url='teste1', user_id=user.id, password=generate_password_hash('password123')))
+    db_session.commit()
+
+    response = logged_client.get('/api/user/links/export', params={'format': 'csv'})
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+
+    assert response.status_code == 200
+    assert response.headers['content-type'].startswith('text/csv')
+    assert response.headers['content-disposition'] == 'attachment; filename="links.csv"'
+    assert [(row['short_url'], row['has_password'], row['expires_at']) for row in rows] == [('teste1', 'True', '')]
+
 def test_update_short_url_with_invalid_user(client_with_invalid_user):
     response = client_with_invalid_user.patch('/api/short/teste', json={'short_url': 'teste2'})
 
@@ -220,3 +444,218 @@ def test_delete_short_url_success(logged_client, url_with_user):
 
     assert response.status_code == 200
     assert response.json() == {'message': 'URL deleted successfully'}
+
+def test_get_url_uses_cache(client, simple_url, db_session):
+    client.get(f'/api/short/{simple_url.short_url}')
+    db_session.query(Link).filter(Link.id == simple_url.id).update({'original_url': 'https://www.bing.com/'})
+    db_session.commit()
+
+    response = client.get(f'/api/short/{simple_url.short_url}')
+
+    assert response.status_code == 200
+    assert response.json()['original_url'] == 'https://www.google.com/'
+
+def test_get_url_negative_cache_invalidated_on_create(client):
+    assert client.get('/api/short/teste').status_code == 404
+
+    client.post('/api/short', json={'original_url': 'https://www.google.com/', 'short_url': 'teste'})
+    response = client.get('/api/short/teste')
+
+    assert response.status_code == 200
+    assert response.json()['original_url'] == 'https://www.google.com/'
+
+def test_update_url_password_invalidates_cache(logged_client, url_with_user):
+    assert logged_client.get(f'/api/short/{url_with_user.short_url}').status_code == 200
+
+    logged_client.patch(f'/api/short/{url_with_user.short_url}/password', json={'password': '123456'})
+    response = logged_client.get(f'/api/short/{url_with_user.short_url}')
+
+    assert response.status_code == 401
+    assert response.json()['detail'] == 'Link is password protected'
+
+def test_get_protected_url_skips_verify_when_cached(client, protected_url, monkeypatch):
+    calls = []
+    verify = url_routes.verify_password_async
+    async def counting_verify(password, hashed_password):
+        calls.append(password)
+        return await verify(password, hashed_password)
+    monkeypatch.setattr(url_routes, 'verify_password_async', counting_verify)
+
+    for _ in range(3):
+        response = client.get(f'/api/short/{protected_url.short_url}', headers={'password': protected_url.clean_password})
+        assert response.status_code == 200
+    client.get(f'/api/short/{protected_url.short_url}', headers={'password': 'wrong_password'})
+    client.get(f'/api/short/{protected_url.short_url}', headers={'password': 'wrong_password'})
+
+    assert calls == [protected_url.clean_password, 'wrong_password', 'wrong_password']
+
+def test_update_url_password_invalidates_verified_password(logged_client, url_with_user):
+    logged_client.patch(f'/api/short/{url_with_user.short_url}/password', json={'password': '123456'})
+    assert logged_client.get(f'/api/short/{url_with_user.short_url}', headers={'password': '123456'}).status_code == 200
+
+    logged_client.patch(f'/api/short/{url_with_user.short_url}/password', json={'password': '654321'})
+    response = logged_client.get(f'/api/short/{url_with_user.short_url}', headers={'password': '123456'})
+
+    assert response.status_code == 401
+    assert response.json()['detail'] == 'Invalid password'
+
+def test_delete_short_url_invalidates_cache(logged_client, url_with_user):
+    assert logged_client.get(f'/api/short/{url_with_user.short_url}').status_code == 200
+
+    logged_client.delete(f'/api/short/{url_with_user.short_url}')
+    response = logged_client.get(f'/api/short/{url_with_user.short_url}')
+
+    assert response.status_code == 404
+
+def test_get_url_with_async_session(async_client):
+    async_client.db_session.add(Link(original_url='https://www.google.com/', short_url='abcde', user_id=None))
+    async_client.db_session.commit()
+
+    response = async_client.get('/api/short/abcde')
+
+    assert response.status_code == 200
+    assert response.json()['original_url'] == 'https://www.google.com/'
+
+def test_get_url_not_exists_with_async_session(async_client):
+    response = async_client.get('/api/short/abcde')
+
+    assert response.status_code == 404
+    assert response.json()['detail'] == 'Link not found'
+
+def test_get_expired_url_with_async_session(async_client):
+    async_client.db_session.add(Link(original_url='https://www.google.com/', short_url='abcde', user_id=None, expires_at=datetime(2020, 1, 1)))
+    async_client.db_session.commit()
+
+    response = async_client.get('/api/short/abcde')
+
+    assert response.status_code == 404
+    assert async_client.db_session.query(Link).filter(Link.short_url == 'abcde').first() is None
+
+def test_click_and_stats_with_async_session(async_client):
+    link = Link(original_url='https://www.google.com/', short_url='abcde', user_id=None)
+    async_client.db_session.add(link)
+    async_client.db_session.commit()
+
+    for _ in range(3):
+        assert async_client.post('/api/click/abcde').status_code == 200
+
+    response = async_client.get('/api/stats/abcde')
+    assert response.status_code == 200
+    assert response.json()['clicks'] == 3
+
+    click_buffer.flush()
+    async_client.db_session.refresh(link)
+    assert link.clicks == 3
+
+def test_clean_expired_links_in_batches(db_session):
+    for i in range(5):
+        db_session.add(Link(original_url='https://www.google.com/', short_url=f'expired{i}', user_id=None, expires_at=datetime(2020, 1, 1)))
+    db_session.add(Link(original_url='https://www.google.com/', short_url='active', user_id=None, expires_at=datetime(2999, 1, 1)))
+    db_session.add(Link(original_url='https://www.google.com/', short_url='forever', user_id=None))
+    db_session.commit()
+
+    assert clean_expired_links(db_session, batch_size=2, pause=0) == 5
+
+    remaining = [link.short_url for link in db_session.query(Link).order_by(Link.id).all()]
+    assert remaining == ['active', 'forever']
+
+def test_clean_expired_links_invalidates_cache(client, db_session):
+    db_session.add(Link(original_url='https://www.google.com/', short_url='expired', user_id=None, expires_at=datetime(2999, 1, 1)))
+    db_session.commit()
+    assert client.get('/api/short/expired').status_code == 200
+
+    db_session.query(Link).filter(Link.short_url == 'expired').update({'expires_at': datetime(2020, 1, 1)})
+    db_session.commit()
+    clean_expired_links(db_session, pause=0)
+
+    assert client.get('/api/short/expired').status_code == 404
+
+def test_create_url_retries_when_generated_id_is_taken(client, db_session, monkeypatch):
+    monkeypatch.setattr('src.utils.short_id_allocator', SequenceAllocator(block_size=10))
+    taken = encode_base62(permute(0))
+    db_session.add(Link(original_url='https://www.google.com/', short_url=taken, user_id=None))
+    db_session.commit()
+
+    response = client.post('/api/short', json={'original_url': 'https://www.google.com.br/'})
+
+    assert response.status_code == 200
+    assert response.json()['short_url'] == encode_base62(permute(1))
+
+def test_create_url_bulk(client, db_session):
+    response = client.post('/api/short/bulk', json=[
+        {'original_url': 'https://www.google.com/'},
+        {'original_url': 'https://www.google.com.br/', 'short_url': 'bulk1', 'password': 'secret'}
+    ])
+
+    assert response.status_code == 200
+    assert response.json()['created'] == 2
+    assert response.json()['failed'] == 0
+    assert [result['index'] for result in response.json()['results']] == [0, 1]
+    assert response.json()['results'][1]['short_url'] == 'bulk1'
+    assert db_session.query(Link).filter(Link.short_url == 'bulk1').first().password != 'secret'
+    assert client.get('/api/short/bulk1', headers={'password': 'secret'}).status_code == 200
+
+def test_create_url_bulk_password_without_hash_slot(client, db_session, monkeypatch):
+    monkeypatch.setattr('src.routes.url.password_hasher.hash_many', lambda passwords: [None] * len(passwords))
+    response = client.post('/api/short/bulk', json=[
+        {'original_url': 'https://www.google.com/', 'short_url': 'bulk1'},
+        {'original_url': 'https://www.google.com.br/', 'short_url': 'bulk2', 'password': 'secret'}
+    ])
+
+    assert response.status_code == 200
+    assert response.json()['created'] == 1
+    assert not response.json()['results'][1]['success']
+    assert response.json()['results'][1]['detail'] == 'Server is busy, please try again later'
+    assert db_session.query(Link).filter(Link.short_url == 'bulk2').first() is None
+
+def test_create_url_bulk_ndjson(client):
+    body = '{"original_url": "https://www.google.com/"}\n{"original_url": "https://www.google.com.br/"}\n'
+    response = client.post('/api/short/bulk', content=body, headers={'Content-Type': 'application/x-ndjson'})
+
+    assert response.status_code == 200
+    assert response.json()['created'] == 2
+    short_urls = [result['short_url'] for result in response.json()['results']]
+    assert len(set(short_urls)) == 2
+    for short_url in short_urls:
+        assert client.get(f'/api/short/{short_url}').status_code == 200
+
+def test_create_url_bulk_partial_failures(client, simple_url):
+    response = client.post('/api/short/bulk', json=[
+        {'original_url': 'https://www.google.com/', 'short_url': simple_url.short_url},
+        {'original_url': 'https://www.google.com/', 'short_url': 'dup'},
+        {'original_url': 'https://www.google.com/', 'short_url': 'dup'},
+        {'original_url': 'not a url'},
+        {'original_url': 'https://www.google.com/', 'short_url': 'a'},
+        {'original_url': 'https://www.google.com/', 'password': 'ab'}
+    ])
+
+    results = response.json()['results']
+    assert response.status_code == 200
+    assert response.json()['created'] == 1
+    assert results[0]['detail'] == 'Short URL already exists'
+    assert results[1]['success'] and results[1]['short_url'] == 'dup'
+    assert results[2]['detail'] == 'Short URL already exists'
+    assert not results[3]['success']
+    assert results[4]['detail'] == 'Invalid short URL'
+    assert results[5]['detail'] == 'Password must be at least 3 characters long'
+
+def test_create_url_bulk_invalid_body(client):
+    assert client.post('/api/short/bulk', content='not json').status_code == 400
+    assert client.post('/api/short/bulk', json=[]).status_code == 400
+    assert client.post('/api/short/bulk', json={'original_url': 'https://www.google.com/'}).status_code == 400
+
+def test_create_url_bulk_too_many_items(client, monkeypatch):
+    monkeypatch.setattr('src.routes.url.BULK_MAX_ITEMS', 2)
+    response = client.post('/api/short/bulk', json=[{'original_url': 'https://www.google.com/'}] * 3)
+
+    assert response.status_code == 413
+
+def test_create_url_bulk_retries_when_generated_id_is_taken(client, db_session, monkeypatch):
+    monkeypatch.setattr('src.routes.url.short_id_allocator', SequenceAllocator(block_size=10))
+    db_session.add(Link(original_url='https://www.google.com/', short_url=encode_base62(permute(1)), user_id=None))
+    db_session.commit()
+
+    response = client.post('/api/short/bulk', json=[{'original_url': 'https://www.google.com/'}] * 2)
+
+    assert response.json()['created'] == 2
+    assert encode_base62(permute(1)) not in [result['short_url'] for result in response.json()['results']]
@@ -19,10 +19,15 @@ interface Link {
   expires_at: string | null;
 }
 
+const LINKS_PAGE_SIZE = 50;
+
 const ProfilePage = () => {
   const {} = useAuth();
   const [profile, setProfile] = useState<UserProfile | null>(null);
   const [links, setLinks] = useState<Link[]>([]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [isLoadingMore, setIsLoadingMore] = useState(false);
+  const [linksError, setLinksError] = useState('');
   const [isLoading, setIsLoading] = useState(true);
   const [modalType, setModalType] = useState<'username' | 'email' | 'password' | 'delete' | 'edit' | 'create' | 'password-info' | 'expiration-info' | null>(null);
   
@@ -240,27 +245,40 @@ const ProfilePage = () => {
     }
   };
 
-  const fetchUserLinks = async () => {
+  // Newest first, one page at a time: without a cursor the list restarts from the first page
+  const fetchUserLinks = async (cursor: string | null = null) => {
+    setLinksError('');
     try {
-      const response = await fetch(`${apiUrl}/user/links`, {
+      const params = new URLSearchParams({ sort: 'created_at', order: 'desc', limit: String(LINKS_PAGE_SIZE) });
+      if (cursor) params.set('cursor', cursor);
+      const response = await fetch(`${apiUrl}/user/links?${params}`, {
         headers: {
           'Content-Type': 'application/json',
         },
         credentials: 'include',
       });
-      if (response.ok) {
-        const data = await response.json();
-        // Sort links by creation date (newest first)
-        const sortedLinks = data.links.sort((a: Link, b: Link) => 
-          new Date(b.created_at).getTime() - new Date(a.created_at).getTime()
-        );
-        setLinks(sortedLinks);
+      if (!response.ok) {
+        setLinksError(response.status === 429
+          ? 'Você atingiu o limite de requisições. Tente novamente mais tarde.'
+          : 'Não foi possível carregar seus links. Tente novamente.');
+        return;
       }
+      const data = await response.json();
+      setLinks(previous => cursor ? [...previous, ...data.links] : data.links);
+      setNextCursor(data.next_cursor);
     } catch (error) {
       console.error('Failed to fetch user links:', error);
+      setLinksError('Não foi possível carregar seus links. Tente novamente.');
     }
   };
 
+  const loadMoreLinks = async () => {
+    if (!nextCursor) return;
+    setIsLoadingMore(true);
+    await fetchUserLinks(nextCursor);
+    setIsLoadingMore(false);
+  };
+
   useEffect(() => {
     const fetchData = async () => {
       setIsLoading(true);
@@ -1249,6 +1267,23 @@ const ProfilePage = () => {
                 </table>
               </div>
             </div>
+
+            {(linksError || nextCursor) && (
+              <div className="px-6 py-4 border-t border-gray-100 dark:border-gray-700 flex flex-col items-center space-y-3">
+                {linksError && (
+                  <p className="text-sm text-red-600 dark:text-red-400">{linksError}</p>
+                )}
+                {(nextCursor || (linksError && links.length === 0)) && (
+                  <button
+                    onClick={() => (linksError && links.length === 0 ? fetchUserLinks() : loadMoreLinks())}
+                    disabled={isLoadingMore}
+                    className="inline-flex items-center justify-center px-4 py-2 border border-gray-300 dark:border-gray-600 text-sm font-medium rounded-lg text-gray-700 dark:text-gray-200 bg-white dark:bg-gray-800 hover:bg-gray-50 dark:hover:bg-gray-700 disabled:opacity-50 disabled:cursor-not-allowed transition-all duration-200"
+                  >
+                    {isLoadingMore ? 'Carregando...' : linksError && links.length === 0 ? 'Tentar novamente' : 'Carregar mais'}
+                  </button>
+                )}
+              </div>
+            )}
           </div>
         </div>
       </div>